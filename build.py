@@ -0,0 +1,9 @@
+"""Build script of the poetry backend.
+
+Renders the land pattern corpus of kidraw.ipc.corpus, which wheels
+ship. It is generated rather than checked in, so that it always
+matches the code it is fingerprinted against.
+"""
+from kidraw.ipc import corpus
+
+corpus.build()
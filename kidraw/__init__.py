@@ -1,18 +1,41 @@
 import os
 import os.path
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
-__all__ = ["footprint", "ipc", "schematic"]
+__all__ = ["footprint", "geometry", "ipc", "schematic"]
 
 class Library:
     def __init__(self, name):
         self._name = name
         self.devices = []
 
-    def save(self):
-        sch = [x.schematic.sch() for x in self.devices]
-        doc = [x.schematic.doc() for x in self.devices]
-        footprints = [(d.schematic.filename + "_" + f.filename, str(f)) for d in self.devices for f in d.footprints]
+    def save(self, compact=False, threads=None):
+        """Write the library to disk.
+
+        If compact is True, footprints are written in the compact
+        .kicad_mod format, see kidraw.footprint.sexpr.
+
+        If threads is given, devices are rendered by a pool of that
+        many threads. Rendering does not modify the devices, so this
+        is safe, and on free-threaded Python it is also faster.
+        """
+        if threads:
+            with ThreadPoolExecutor(threads) as pool:
+                self._save(pool.map, compact)
+        else:
+            self._save(map, compact)
+
+    def _save(self, map_fn, compact):
+        from kidraw.footprint import sexpr
+
+        def render_footprint(df):
+            d, f = df
+            return d.schematic.filename + "_" + f.filename, sexpr.dumps(f, compact)
+
+        sch = list(map_fn(lambda d: d.schematic.sch(), self.devices))
+        doc = list(map_fn(lambda d: d.schematic.doc(), self.devices))
+        footprints = list(map_fn(render_footprint, [(d, f) for d in self.devices for f in d.footprints]))
 
         with open(self._name + ".lib", "w") as f:
             f.write("""EESchema-LIBRARY Version 2.3
@@ -32,6 +55,6 @@ class Library:
 
 
 class Device:
-    def __init__(self, schematic=None, footprints=[]):
+    def __init__(self, schematic=None, footprints=None):
         self.schematic = schematic
-        self.footprints = footprints
+        self.footprints = [] if footprints is None else footprints
@@ -1,9 +1,13 @@
 import math
-from copy import deepcopy
+import weakref
+from array import array
+from bisect import bisect_right
+from collections.abc import MutableSequence
+from copy import copy, deepcopy
 from enum import Enum
 from itertools import starmap
 
-from kidraw import ipc
+from kidraw import geometry, ipc
 
 
 class Layer(Enum):
@@ -20,6 +24,37 @@ class Layer(Enum):
     BottomCourtyard = "B.CrtYd"
     BottomAssembly = "B.Fab"
 
+    @property
+    def flipped(self):
+        """The matching layer on the other side of the board."""
+        return _FLIPPED_LAYERS[self]
+
+
+_FLIPPED_LAYERS = {
+    l: Layer[l.name.replace("Top", "Bottom") if l.name.startswith("Top")
+             else l.name.replace("Bottom", "Top")]
+    for l in Layer
+}
+
+# Layers of the different pad types, by the copper side they are on.
+_SMD_LAYERS = {
+    Layer.TopCopper: "F.Cu F.Paste F.Mask",
+    Layer.BottomCopper: "B.Cu B.Paste B.Mask",
+}
+_THROUGH_HOLE_LAYERS = {
+    Layer.TopCopper: "*.Cu *.Mask F.SilkS",
+    Layer.BottomCopper: "*.Cu *.Mask B.SilkS",
+}
+_CONNECT_LAYERS = {
+    Layer.TopCopper: "F.Cu F.Mask",
+    Layer.BottomCopper: "B.Cu B.Mask",
+}
+
+
+def _angle(a):
+    a %= 360
+    return int(a) if a == int(a) else a
+
 
 class PadShape(Enum):
     Circle = "circle"
@@ -28,6 +63,7 @@ class PadShape(Enum):
     # TODO: trapezoid
 
 
+# TODO: store coordinates as integer nm, like ipc.Dimension.
 class _Struct:
     __attributes__ = {}
 
@@ -41,6 +77,20 @@ class _Struct:
         if k not in self.__attributes__:
             raise ValueError(f"Not allowed to set {k} in this object")
         super(_Struct, self).__setattr__(k, v)
+        # Weak references to the feature containers whose extents
+        # depend on this object, see _Extents._watch.
+        owners = self.__dict__.get("_owners")
+        if owners:
+            for ref in owners:
+                c = ref()
+                if c is not None:
+                    c.invalidate()
+
+    def __getstate__(self):
+        # Copies do not belong to the containers of the original.
+        state = dict(self.__dict__)
+        state.pop("_owners", None)
+        return state
 
 
 class Text(_Struct):
@@ -52,6 +102,8 @@ class Text(_Struct):
         "hidden": False,
         "font_size": (1, 1),
         "line_width": 0.15,
+        # Text on the bottom side of the board reads mirrored.
+        "mirror": False,
     }
 
     @property
@@ -72,8 +124,23 @@ class Text(_Struct):
       (size {0.font_size[0]} {0.font_size[1]})
       (thickness {0.line_width})
     )
-  )
-)""".format(self, "" if self.hidden else "#")
+{2}  )
+)""".format(self, "" if self.hidden else "#",
+           "    (justify mirror)\n" if self.mirror else "")
+
+    def transformed(self, t, flip=False):
+        """Returns a copy of the text, moved by the geometry.Affine t.
+
+        If flip is True, the text also moves to the other side of the
+        board, and its mirroring is toggled.
+        """
+        ret = copy(self)
+        if self.position is not None:
+            ret.position = t.apply(self.position)
+        if flip:
+            ret.layer = self.layer.flipped
+            ret.mirror = not self.mirror
+        return ret
 
 
 class Line(_Struct):
@@ -99,6 +166,13 @@ class Line(_Struct):
   (width {self.line_width})
 )"""
 
+    def transformed(self, t, flip=False):
+        ret = copy(self)
+        ret.start, ret.end = t.apply(self.start), t.apply(self.end)
+        if flip:
+            ret.layer = self.layer.flipped
+        return ret
+
 
 class Circle(_Struct):
     __attributes__ = {
@@ -122,6 +196,13 @@ class Circle(_Struct):
   (width {self.line_width})
 )"""
 
+    def transformed(self, t, flip=False):
+        ret = copy(self)
+        ret.center = t.apply(self.center)
+        if flip:
+            ret.layer = self.layer.flipped
+        return ret
+
 
 class Arc(_Struct):
     __attributes__ = {
@@ -151,12 +232,29 @@ class Arc(_Struct):
   (width {self.line_width})
 )"""
 
+    def transformed(self, t, flip=False):
+        ret = copy(self)
+        a = math.radians(self.start_angle)
+        start = t.apply((self.center[0] + math.sin(a) * self.radius,
+                         self.center[1] + math.cos(a) * self.radius))
+        ret.center = t.apply(self.center)
+        ret.start_angle = round(math.degrees(math.atan2(start[0] - ret.center[0],
+                                                        start[1] - ret.center[1])), 9)
+        sweep = self.end_angle - self.start_angle
+        # Mirroring reverses the direction of the arc.
+        ret.end_angle = ret.start_angle + (-sweep if t.mirrored else sweep)
+        if flip:
+            ret.layer = self.layer.flipped
+        return ret
+
 
 class Poly(_Struct):
     __attributes__ = {
         "points": [],
         "layer": Layer.TopSilkscreen,
         "line_width": 0.15,
+        # If False, only the outline of the polygon is drawn.
+        "filled": True,
     }
 
     @property
@@ -171,17 +269,52 @@ class Poly(_Struct):
 
     def __str__(self):
         pts = "\n".join(starmap("    (xy {0} {1})".format, self.points))
+        fill = "" if self.filled else "  (fill none)\n"
         return f"""(fp_poly
   (pts
     {pts}
   )
   (layer {self.layer.value})
   (width {self.line_width})
-)"""
+{fill})"""
+
+    def transformed(self, t, flip=False):
+        ret = copy(self)
+        ret.points = t.apply_all(self.points)
+        if flip:
+            ret.layer = self.layer.flipped
+        return ret
 
 # TODO: bezier curve, if I can find any use for one.
 
 
+def _pad_angle(angle, t):
+    """Returns the angle of a pad after transforming it by t.
+
+    Pads are symmetric, so quarter turns leave the angle alone and
+    swap the pad's dimensions instead.
+    """
+    if t.mirrored:
+        angle = -angle
+    if t.angle % 90:
+        # KiCad angles are counterclockwise on screen, which is
+        # clockwise in footprint coordinates.
+        angle -= t.angle
+    return _angle(angle)
+
+
+def _transformed_pad(pad, t, flip):
+    """Returns a copy of pad, moved by the geometry.Affine t."""
+    ret = copy(pad)
+    ret.center = t.apply(pad.center)
+    ret.angle = _pad_angle(pad.angle, t)
+    if t.angle % 180 == 90:
+        ret.size = pad.size[::-1]
+    if flip:
+        ret.layer = pad.layer.flipped
+    return ret
+
+
 class ThroughHolePad(_Struct):
     __attributes__ = {
         "name": 0,
@@ -194,6 +327,8 @@ class ThroughHolePad(_Struct):
         "solder_mask_margin": 0,
         "thermal_width": 0,
         "thermal_gap": 0,
+        # The side of the board the component is on.
+        "layer": Layer.TopCopper,
     }
 
     @property
@@ -213,13 +348,20 @@ class ThroughHolePad(_Struct):
   (at {0.center[0]:.3f} {0.center[1]:.3f} {0.angle})
   (size {0.size[0]:.3f} {0.size[1]:.3f})
   {1}
-  (layers *.Cu *.Mask F.SilkS)
+  (layers {3})
   (solder_mask_margin {0.solder_mask_margin})
   (clearance {0.clearance})
   {2}(zone_connect 1)
   {2}(thermal_width {0.thermal_width})
   {2}(thermal_gap {0.thermal_gap})
-)""".format(self, d, "#" if self.thermal_gap == 0 else "")
+)""".format(self, d, "#" if self.thermal_gap == 0 else "",
+           _THROUGH_HOLE_LAYERS[self.layer])
+
+    def transformed(self, t, flip=False):
+        ret = _transformed_pad(self, t, flip)
+        if isinstance(self.drill_size, tuple) and t.angle % 180 == 90:
+            ret.drill_size = self.drill_size[::-1]
+        return ret
 
 
 class SurfaceMountPad(_Struct):
@@ -235,6 +377,8 @@ class SurfaceMountPad(_Struct):
         "solder_paste_ratio": 1,
         "thermal_width": 0,
         "thermal_gap": 0,
+        # The copper layer of the side of the board the pad is on.
+        "layer": Layer.TopCopper,
     }
 
     @property
@@ -250,7 +394,7 @@ class SurfaceMountPad(_Struct):
         return """(pad {0.name} smd {0.shape.value}
   (at {0.center[0]:.3f} {0.center[1]:.3f} {0.angle})
   (size {0.size[0]:.3f} {0.size[1]:.3f})
-  (layers F.Cu F.Paste F.Mask)
+  (layers {3})
   (solder_mask_margin {0.solder_mask_margin})
   (clearance {0.clearance})
   (solder_paste_margin {0.solder_paste_margin})
@@ -258,7 +402,11 @@ class SurfaceMountPad(_Struct):
   {2}(zone_connect 1)
   {2}(thermal_width {0.thermal_width})
   {2}(thermal_gap {0.thermal_gap})
-)""".format(self, ratio, "#" if self.thermal_gap == 0 else "")
+)""".format(self, ratio, "#" if self.thermal_gap == 0 else "",
+           _SMD_LAYERS[self.layer])
+
+    def transformed(self, t, flip=False):
+        return _transformed_pad(self, t, flip)
 
 
 class TestPad(_Struct):
@@ -270,6 +418,8 @@ class TestPad(_Struct):
         "size": (0, 0),
         "clearance": 0,
         "solder_mask_margin": 0,
+        # The copper layer of the side of the board the pad is on.
+        "layer": Layer.TopCopper,
     }
 
     @property
@@ -284,16 +434,863 @@ class TestPad(_Struct):
         return f"""(pad {self.name} connect {self.shape.value}
   (at {self.center[0]:.3f} {self.center[1]:.3f} {self.angle})
   (size {self.size[0]:.3f} {self.size[1]:.3f})
-  (layers F.Cu F.Mask)
+  (layers {_CONNECT_LAYERS[self.layer]})
   (solder_mask_margin {self.solder_mask_margin})
   (clearance {self.clearance})
 )"""
 
+    def transformed(self, t, flip=False):
+        return _transformed_pad(self, t, flip)
+
 
 class Connector(TestPad):
     pass
 
 
+def _feature_layer(f):
+    # Features without a layer are accounted for on top copper.
+    return getattr(f, "layer", Layer.TopCopper)
+
+
+def _union(a, b):
+    if a is None:
+        return b
+    (axmin, axmax), (aymin, aymax) = a
+    (bxmin, bxmax), (bymin, bymax) = b
+    return ((min(axmin, bxmin), max(axmax, bxmax)),
+            (min(aymin, bymin), max(aymax, bymax)))
+
+
+class _Extents:
+    """Mixin that maintains per-layer extents of a feature container.
+
+    Extents grow incrementally as features are appended, and are
+    recomputed lazily after any other mutation, including setting an
+    attribute of a feature. Mutating the value of an attribute in
+    place, for example appending to a Poly's points, is not tracked:
+    assign a new value instead.
+
+    Containers made by shared() share feature objects with the
+    container they came from. To modify a feature in place, get it
+    with edit(), which copies it first if it is shared.
+    """
+
+    _extents = None
+    # True once feature objects may be referenced by another
+    # container, in which case _copies holds the features that were
+    # since copied by edit(), by id.
+    _shared_features = False
+    _copies = None
+
+    def invalidate(self):
+        self._extents = None
+
+    def _share_features(self, other):
+        for c in (self, other):
+            c._shared_features = True
+            c._copies = {}
+
+    def _private(self, f):
+        return not self._shared_features or id(f) in self._copies
+
+    def _copy_feature(self, f):
+        f = copy(f)
+        self._copies[id(f)] = f
+        return f
+
+    def _watch(self, f):
+        # Have f invalidate the extents when it is modified.
+        if not isinstance(f, _Struct):
+            return
+        owners = f.__dict__.get("_owners")
+        if owners is None:
+            f.__dict__["_owners"] = [weakref.ref(self)]
+        elif not any(ref() is self for ref in owners):
+            # Containers are compared by value, so cannot go in a WeakSet.
+            owners[:] = [ref for ref in owners if ref() is not None]
+            owners.append(weakref.ref(self))
+
+    def _grow(self, f):
+        if self._extents is not None:
+            self._watch(f)
+            layer = _feature_layer(f)
+            self._extents[layer] = _union(self._extents.get(layer), f.bounding_box)
+
+    def _compute_extents(self):
+        ret = {}
+        for f in self:
+            self._watch(f)
+            layer = _feature_layer(f)
+            ret[layer] = _union(ret.get(layer), f.bounding_box)
+        return ret
+
+    @property
+    def extents(self):
+        """Bounding box of the features on each layer, as a dict."""
+        # Read the cache only once, it may be invalidated by another
+        # thread in between.
+        ret = self._extents
+        if ret is None:
+            ret = self._extents = self._compute_extents()
+        return dict(ret)
+
+    @property
+    def bounding_box(self):
+        """Bounding box of all features, including the origin."""
+        ret = ((0, 0), (0, 0))
+        for bb in self.extents.values():
+            ret = _union(ret, bb)
+        return ret
+
+
+class FeatureList(_Extents, MutableSequence):
+    """The default container for Footprint features.
+
+    It behaves like a list, and additionally keeps track of the
+    extents of its contents so that Footprint.bounding_box does not
+    need to rescan every feature.
+    """
+
+    # True if _items is also used by another FeatureList, and must be
+    # copied before modifying it.
+    _shared_items = False
+
+    def __init__(self, features=()):
+        self._items = []
+        self._extents = {}
+        self.extend(features)
+
+    def shared(self):
+        """Returns a copy of the list, which shares its contents with this one.
+
+        Both lists copy their contents on write: the list of features
+        is copied when either list is first modified, and features
+        are copied by edit().
+        """
+        ret = FeatureList()
+        ret._items = self._items
+        if self._extents is not None:
+            ret._extents = dict(self._extents)
+            for f in self._items:
+                ret._watch(f)
+        self._shared_items = ret._shared_items = True
+        self._share_features(ret)
+        return ret
+
+    def _own(self):
+        if self._shared_items:
+            self._items = list(self._items)
+            self._shared_items = False
+
+    def edit(self, i):
+        """Returns feature i, for modification in place."""
+        f = self._items[i]
+        if not self._private(f):
+            self._own()
+            f = self._items[i] = self._copy_feature(f)
+        self.invalidate()
+        return f
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, i):
+        return self._items[i]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, MutableSequence)):
+            return self._items == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"FeatureList({self._items!r})"
+
+    def append(self, f):
+        self._own()
+        self._items.append(f)
+        self._grow(f)
+
+    def extend(self, features):
+        for f in features:
+            self.append(f)
+
+    def __setitem__(self, i, f):
+        self._own()
+        self._items[i] = f
+        self.invalidate()
+
+    def __delitem__(self, i):
+        self._own()
+        del self._items[i]
+        self.invalidate()
+
+    def insert(self, i, f):
+        self._own()
+        self._items.insert(i, f)
+        self._grow(f)
+
+    def clear(self):
+        self._items = []
+        self._shared_items = False
+        self._extents = {}
+
+
+class _LineView(Line):
+    """A Line whose attributes live in a row of a FeatureTable."""
+
+    def __init__(self, table, row):
+        object.__setattr__(self, "_table", table)
+        object.__setattr__(self, "_row", row)
+
+    def __setattr__(self, k, v):
+        super().__setattr__(k, v)
+        self._table.invalidate()
+
+    @property
+    def start(self):
+        t, i = self._table, self._row
+        return (t._line_x1[i], t._line_y1[i])
+
+    @start.setter
+    def start(self, v):
+        t, i = self._table, self._row
+        t._line_x1[i], t._line_y1[i] = v
+
+    @property
+    def end(self):
+        t, i = self._table, self._row
+        return (t._line_x2[i], t._line_y2[i])
+
+    @end.setter
+    def end(self, v):
+        t, i = self._table, self._row
+        t._line_x2[i], t._line_y2[i] = v
+
+    @property
+    def layer(self):
+        return _LAYERS[self._table._line_layer[self._row]]
+
+    @layer.setter
+    def layer(self, v):
+        self._table._line_layer[self._row] = _LAYER_CODES[v]
+
+    @property
+    def line_width(self):
+        t = self._table
+        return t._widths[t._line_width[self._row]]
+
+    @line_width.setter
+    def line_width(self, v):
+        t = self._table
+        t._line_width[self._row] = t._width_code(v)
+
+    def __copy__(self):
+        return Line(start=self.start, end=self.end, layer=self.layer,
+                    line_width=self.line_width)
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+
+class _SurfaceMountPadView(SurfaceMountPad):
+    """A SurfaceMountPad whose attributes live in a row of a FeatureTable."""
+
+    def __init__(self, table, row):
+        object.__setattr__(self, "_table", table)
+        object.__setattr__(self, "_row", row)
+
+    @property
+    def name(self):
+        return self._table._pad_name[self._row]
+
+    @name.setter
+    def name(self, v):
+        self._table._pad_name[self._row] = v
+
+    @property
+    def shape(self):
+        return _PAD_SHAPES[self._table._pad_shape[self._row]]
+
+    @shape.setter
+    def shape(self, v):
+        self._table._pad_shape[self._row] = _PAD_SHAPE_CODES[v]
+
+    @property
+    def center(self):
+        t, i = self._table, self._row
+        return (t._pad_x[i], t._pad_y[i])
+
+    @center.setter
+    def center(self, v):
+        t, i = self._table, self._row
+        t._pad_x[i], t._pad_y[i] = v
+
+    @property
+    def size(self):
+        t, i = self._table, self._row
+        return (t._pad_w[i], t._pad_h[i])
+
+    @size.setter
+    def size(self, v):
+        t, i = self._table, self._row
+        t._pad_w[i], t._pad_h[i] = v
+
+    @property
+    def layer(self):
+        return _LAYERS[self._table._pad_layer[self._row]]
+
+    @layer.setter
+    def layer(self, v):
+        self._table._pad_layer[self._row] = _LAYER_CODES[v]
+
+    def __getattr__(self, k):
+        # Only reached for the rarely-changed pad attributes, which
+        # the table stores sparsely.
+        if k not in SurfaceMountPad.__attributes__:
+            raise AttributeError(k)
+        return self._table._pad_extra.get(self._row, {}).get(
+            k, SurfaceMountPad.__attributes__[k])
+
+    def __setattr__(self, k, v):
+        if k in _SurfaceMountPadView.__dict__:
+            super().__setattr__(k, v)
+            self._table.invalidate()
+            return
+        if k not in SurfaceMountPad.__attributes__:
+            raise ValueError(f"Not allowed to set {k} in this object")
+        extra = self._table._pad_extra
+        if v == SurfaceMountPad.__attributes__[k] and type(v) is type(SurfaceMountPad.__attributes__[k]):
+            extra.get(self._row, {}).pop(k, None)
+        else:
+            extra.setdefault(self._row, {})[k] = v
+        self._table.invalidate()
+
+    def __copy__(self):
+        return SurfaceMountPad(**{k: getattr(self, k) for k in SurfaceMountPad.__attributes__})
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+
+_LAYERS = list(Layer)
+_LAYER_CODES = {l: i for i, l in enumerate(_LAYERS)}
+_PAD_SHAPES = list(PadShape)
+# bytes.translate() table from a layer code to that of the flipped layer.
+_FLIP_CODES = bytes([_LAYER_CODES[l.flipped] for l in _LAYERS]).ljust(256, b"\0")
+_PAD_SHAPE_CODES = {s: i for i, s in enumerate(_PAD_SHAPES)}
+
+_OBJECT, _LINE, _PAD = 0, 1, 2
+
+
+class FeatureTable(_Extents, MutableSequence):
+    """Columnar storage for Footprint features.
+
+    Lines and surface mount pads, which make up the bulk of large
+    footprints, are stored as typed arrays (one array per coordinate,
+    plus a layer column) rather than as individual objects. Indexing
+    and iteration return lightweight views that behave like the
+    regular Line and SurfaceMountPad objects, and write through to the
+    table when modified. Any other feature type is stored as-is.
+
+    Use it by passing it as a Footprint's feature list:
+
+    >>> f = Footprint(name="BGA", features=FeatureTable())
+    >>> f.from_ipc(drawing)
+
+    Appending is cheap. Inserting or deleting in the middle of the
+    table rebuilds it, and is O(n).
+    """
+
+    def __init__(self, features=()):
+        self._reset()
+        self.extend(features)
+
+    def _reset(self):
+        self._extents = {}
+        self._kind = array("B")
+        self._row = array("L")
+        self._objects = []
+
+        self._line_x1, self._line_y1 = array("d"), array("d")
+        self._line_x2, self._line_y2 = array("d"), array("d")
+        self._line_layer = array("B")
+        self._line_width = array("H")
+        # Line widths are few and far between, so are stored as
+        # indexes into a palette of values. This also preserves their
+        # exact type, which matters for serialization.
+        self._widths = []
+
+        self._pad_x, self._pad_y = array("d"), array("d")
+        self._pad_w, self._pad_h = array("d"), array("d")
+        self._pad_shape = array("B")
+        self._pad_layer = array("B")
+        self._pad_name = []
+        # Pad attributes other than the above are almost always the
+        # default, so are stored sparsely as {row: {attr: value}}.
+        self._pad_extra = {}
+
+    def _width_code(self, w):
+        for i, v in enumerate(self._widths):
+            if v == w and type(v) is type(w):
+                return i
+        self._widths.append(w)
+        return len(self._widths) - 1
+
+    def __len__(self):
+        return len(self._kind)
+
+    def _view(self, kind, row):
+        if kind == _LINE:
+            return _LineView(self, row)
+        if kind == _PAD:
+            return _SurfaceMountPadView(self, row)
+        return self._objects[row]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._view(self._kind[j], self._row[j])
+                    for j in range(*i.indices(len(self)))]
+        return self._view(self._kind[i], self._row[i])
+
+    def __iter__(self):
+        view = self._view
+        for kind, row in zip(self._kind, self._row):
+            yield view(kind, row)
+
+    def append(self, f):
+        if type(f) in (Line, _LineView):
+            self._kind.append(_LINE)
+            self._row.append(len(self._line_x1))
+            self._line_x1.append(f.start[0])
+            self._line_y1.append(f.start[1])
+            self._line_x2.append(f.end[0])
+            self._line_y2.append(f.end[1])
+            self._line_layer.append(_LAYER_CODES[f.layer])
+            self._line_width.append(self._width_code(f.line_width))
+        elif type(f) in (SurfaceMountPad, _SurfaceMountPadView):
+            row = len(self._pad_x)
+            self._kind.append(_PAD)
+            self._row.append(row)
+            self._pad_x.append(f.center[0])
+            self._pad_y.append(f.center[1])
+            self._pad_w.append(f.size[0])
+            self._pad_h.append(f.size[1])
+            self._pad_shape.append(_PAD_SHAPE_CODES[f.shape])
+            self._pad_layer.append(_LAYER_CODES[f.layer])
+            self._pad_name.append(f.name)
+            for k in ("angle", "clearance", "solder_mask_margin",
+                      "solder_paste_margin", "solder_paste_ratio",
+                      "thermal_width", "thermal_gap"):
+                v, default = getattr(f, k), SurfaceMountPad.__attributes__[k]
+                if v != default or type(v) is not type(default):
+                    self._pad_extra.setdefault(row, {})[k] = v
+        else:
+            self._kind.append(_OBJECT)
+            self._row.append(len(self._objects))
+            self._objects.append(f)
+        self._grow(f)
+
+    def _watch(self, f):
+        # Lines and pads are copied into the columns, whose views
+        # invalidate the table themselves.
+        if type(f) not in (Line, _LineView, SurfaceMountPad, _SurfaceMountPadView):
+            super()._watch(f)
+
+    def _rebuild(self, features):
+        features = [copy(f) if isinstance(f, (_LineView, _SurfaceMountPadView)) else f
+                    for f in features]
+        self._reset()
+        self.extend(features)
+
+    def __setitem__(self, i, f):
+        if isinstance(i, int) and self._kind[i] == _LINE and type(f) is Line:
+            v = _LineView(self, self._row[i])
+            v.start, v.end, v.layer, v.line_width = f.start, f.end, f.layer, f.line_width
+            return
+        features = list(self)
+        features[i] = f
+        self._rebuild(features)
+
+    def __delitem__(self, i):
+        features = list(self)
+        del features[i]
+        self._rebuild(features)
+
+    def insert(self, i, f):
+        if i >= len(self):
+            self.append(f)
+            return
+        features = list(self)
+        features.insert(i, f)
+        self._rebuild(features)
+
+    def clear(self):
+        self._reset()
+
+    def _copy(self):
+        ret = FeatureTable()
+        ret._extents = None if self._extents is None else dict(self._extents)
+        ret._kind, ret._row = array("B", self._kind), array("L", self._row)
+        ret._objects = list(self._objects)
+        if ret._extents is not None:
+            for f in ret._objects:
+                ret._watch(f)
+        ret._line_x1, ret._line_y1 = array("d", self._line_x1), array("d", self._line_y1)
+        ret._line_x2, ret._line_y2 = array("d", self._line_x2), array("d", self._line_y2)
+        ret._line_layer = array("B", self._line_layer)
+        ret._line_width = array("H", self._line_width)
+        ret._widths = list(self._widths)
+        ret._pad_x, ret._pad_y = array("d", self._pad_x), array("d", self._pad_y)
+        ret._pad_w, ret._pad_h = array("d", self._pad_w), array("d", self._pad_h)
+        ret._pad_shape = array("B", self._pad_shape)
+        ret._pad_layer = array("B", self._pad_layer)
+        ret._pad_name = list(self._pad_name)
+        ret._pad_extra = {row: dict(extra) for row, extra in self._pad_extra.items()}
+        return ret
+
+    def shared(self):
+        """Returns a copy of the table, for use by a derived footprint.
+
+        Columns are compact, and are simply copied. Features stored
+        as objects are shared with this table until edit()ed.
+        """
+        ret = self._copy()
+        self._share_features(ret)
+        return ret
+
+    def edit(self, i):
+        """Returns feature i, for modification in place."""
+        self.invalidate()
+        kind, row = self._kind[i], self._row[i]
+        if kind != _OBJECT:
+            return self._view(kind, row)
+        f = self._objects[row]
+        if not self._private(f):
+            f = self._objects[row] = self._copy_feature(f)
+        return f
+
+    def transformed(self, t, flip=False):
+        """Returns a new table, with every feature moved by the geometry.Affine t.
+
+        Lines and pads are transformed a whole column at a time. If
+        flip is True, features also move to the other side of the
+        board.
+        """
+        ret = self._copy()
+        ret._extents = None
+        ret._objects = [f.transformed(t, flip) for f in self._objects]
+        ret._line_x1, ret._line_y1 = t.apply_columns(self._line_x1, self._line_y1)
+        ret._line_x2, ret._line_y2 = t.apply_columns(self._line_x2, self._line_y2)
+        ret._pad_x, ret._pad_y = t.apply_columns(self._pad_x, self._pad_y)
+        if t.angle % 180 == 90:
+            ret._pad_w, ret._pad_h = ret._pad_h, ret._pad_w
+        if t.angle % 90:
+            rows = range(len(ret._pad_x))
+        elif t.mirrored:
+            rows = [row for row, extra in ret._pad_extra.items() if "angle" in extra]
+        else:
+            rows = ()
+        for row in rows:
+            extra = ret._pad_extra.setdefault(row, {})
+            angle = _pad_angle(extra.get("angle", 0), t)
+            if angle == 0:
+                extra.pop("angle", None)
+            else:
+                extra["angle"] = angle
+
+        if flip:
+            ret._line_layer = array("B", ret._line_layer.tobytes().translate(_FLIP_CODES))
+            ret._pad_layer = array("B", ret._pad_layer.tobytes().translate(_FLIP_CODES))
+        return ret
+
+    def _compute_extents(self):
+        ret = {}
+        lines = zip(self._line_layer, self._line_x1, self._line_x2,
+                    self._line_y1, self._line_y2)
+        for layer, x1, x2, y1, y2 in lines:
+            ret[layer] = _union(ret.get(layer), ((min(x1, x2), max(x1, x2)),
+                                                 (min(y1, y2), max(y1, y2))))
+        ret = {_LAYERS[k]: v for k, v in ret.items()}
+        if self._pad_x:
+            margin = [0] * len(self._pad_x)
+            for row, extra in self._pad_extra.items():
+                margin[row] = extra.get("solder_mask_margin", 0)
+            codes = set(self._pad_layer)
+            for code in codes:
+                if len(codes) == 1:
+                    rows = range(len(self._pad_x))
+                else:
+                    rows = [i for i, c in enumerate(self._pad_layer) if c == code]
+                x, y, w, h = self._pad_x, self._pad_y, self._pad_w, self._pad_h
+                pads = (
+                    (min(x[i] - w[i] / 2 - margin[i] for i in rows),
+                     max(x[i] + w[i] / 2 + margin[i] for i in rows)),
+                    (min(y[i] - h[i] / 2 - margin[i] for i in rows),
+                     max(y[i] + h[i] / 2 + margin[i] for i in rows)))
+                layer = _LAYERS[code]
+                ret[layer] = _union(ret.get(layer), pads)
+        for f in self._objects:
+            self._watch(f)
+            layer = _feature_layer(f)
+            ret[layer] = _union(ret.get(layer), f.bounding_box)
+        return ret
+
+
+_IPC_LAYERS = {
+    ipc.Drawing.Layer.Silkscreen: Layer.TopSilkscreen,
+    ipc.Drawing.Layer.Courtyard: Layer.TopCourtyard,
+    ipc.Drawing.Layer.Assembly: Layer.TopAssembly,
+    ipc.Drawing.Layer.Documentation: Layer.TopAssembly,
+}
+
+
+def _ipc_points(f, merge_collinear):
+    if merge_collinear:
+        return geometry.merge_collinear(f.points)
+    return f.points
+
+
+def _ipc_is_poly(points, polygons):
+    return polygons and len(points) >= 4 and points[0] == points[-1]
+
+
+def _from_ipc_feature(f, polygons=False, merge_collinear=False):
+    """Returns the list of Footprint features for one IPC feature."""
+    if isinstance(f, ipc.Drawing.Pad) and f.drill is not None:
+        if not f.obround:
+            shape = PadShape.Rectangle
+        elif f.size[0] == f.size[1]:
+            shape = PadShape.Circle
+        else:
+            shape = PadShape.Obround
+        return [ThroughHolePad(
+            name=f.number,
+            shape=shape,
+            # Pin grids put pads on the X axis, and -0.0 prints as -0.000.
+            center=(f.center[0], 0.0 - f.center[1]),
+            size=f.size,
+            drill_size=f.drill,
+            solder_mask_margin=f.mask_margin or 0)]
+    if isinstance(f, ipc.Drawing.Pad):
+        return [SurfaceMountPad(
+            name=f.number,
+            shape=PadShape.Obround if f.obround else PadShape.Rectangle,
+            # As for through-hole pads, keep pads on the X axis at 0.000.
+            center=(f.center[0], 0.0 - f.center[1]),
+            size=f.size,
+            # Scaling turns a zero margin into 0.0, which would print
+            # differently.
+            solder_mask_margin=f.mask_margin or 0)]
+    if isinstance(f, ipc.Drawing.Line):
+        layer = _IPC_LAYERS[f.layer]
+        points = _ipc_points(f, merge_collinear)
+        if _ipc_is_poly(points, polygons):
+            # KiCad stores coordinates with a precision of 1um, and
+            # Poly does not round on output.
+            return [Poly(
+                points=[(round(x, 3), round(-y, 3)) for x, y in points[:-1]],
+                layer=layer,
+                line_width=f.width,
+                filled=False)]
+        return [Line(start=(a[0], -a[1]), end=(b[0], -b[1]), layer=layer, line_width=f.width)
+                for a, b in zip(points, points[1:])]
+    if isinstance(f, ipc.Drawing.Circle):
+        # Hack: to draw a filled circle, we draw a zero-length line of
+        # width == diameter.
+        return [Line(
+            start=(f.center[0], -f.center[1]),
+            end=(f.center[0], -f.center[1]),
+            layer=_IPC_LAYERS[f.layer],
+            line_width=2 * f.radius)]
+    raise ValueError("Unknown IPC footprint feature type", type(f))
+
+
+class IPCFeatures(_Extents, MutableSequence):
+    """Footprint features backed by a kidraw.ipc Drawing.
+
+    IPC features are converted to Footprint features only when they
+    are accessed. Serializing the footprint with kidraw.footprint.sexpr
+    and computing its extents read the IPC features directly, so a
+    footprint that is only ever written out never allocates its
+    features.
+
+    Accessing or modifying a feature converts (only) the IPC feature
+    it came from, and the result is kept from then on. Later changes
+    to the Drawing itself are not tracked.
+    """
+
+    def __init__(self, drawing, polygons=False, merge_collinear=False):
+        self.polygons = polygons
+        self.merge_collinear = merge_collinear
+        # Each group is either an IPC feature which has not been
+        # converted yet, or the list of features it was converted to.
+        self._groups = list(drawing.features)
+        self._offsets = None
+
+    def shared(self):
+        """Returns a copy of the view, for use by a derived footprint.
+
+        Features that were already converted are shared with this view
+        until edit()ed.
+        """
+        ret = IPCFeatures.__new__(IPCFeatures)
+        ret.polygons, ret.merge_collinear = self.polygons, self.merge_collinear
+        ret._groups = [list(g) if isinstance(g, list) else g for g in self._groups]
+        ret._offsets = None if self._offsets is None else list(self._offsets)
+        ret._extents = None
+        if self._extents is not None:
+            ret._extents = dict(self._extents)
+            for g in ret._groups:
+                if isinstance(g, list):
+                    for f in g:
+                        ret._watch(f)
+        self._share_features(ret)
+        return ret
+
+    def edit(self, i):
+        """Returns feature i, for modification in place."""
+        g, j = self._locate(i)
+        if not self._private(g[j]):
+            g[j] = self._copy_feature(g[j])
+        self.invalidate()
+        return g[j]
+
+    def _size(self, g):
+        if isinstance(g, list):
+            return len(g)
+        if isinstance(g, ipc.Drawing.Line):
+            points = _ipc_points(g, self.merge_collinear)
+            if _ipc_is_poly(points, self.polygons):
+                return 1
+            return len(points) - 1
+        return 1
+
+    def _index(self):
+        # _offsets[k] is the index of the first feature of group k.
+        if self._offsets is None:
+            offsets = [0]
+            for g in self._groups:
+                offsets.append(offsets[-1] + self._size(g))
+            self._offsets = offsets
+        return self._offsets
+
+    def _materialize(self, k):
+        g = self._groups[k]
+        if not isinstance(g, list):
+            g = self._groups[k] = _from_ipc_feature(g, self.polygons, self.merge_collinear)
+            if self._extents is not None:
+                for f in g:
+                    self._watch(f)
+        return g
+
+    def _locate(self, i):
+        offsets = self._index()
+        if i < 0:
+            i += offsets[-1]
+        if not 0 <= i < offsets[-1]:
+            raise IndexError("feature index out of range")
+        k = bisect_right(offsets, i) - 1
+        return self._materialize(k), i - offsets[k]
+
+    def _flatten(self):
+        self._groups = [list(self)]
+        self._offsets = None
+
+    def __len__(self):
+        return self._index()[-1]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        g, j = self._locate(i)
+        return g[j]
+
+    def __iter__(self):
+        for k in range(len(self._groups)):
+            yield from self._materialize(k)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, MutableSequence)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def append(self, f):
+        self._groups.append([f])
+        if self._offsets is not None:
+            self._offsets.append(self._offsets[-1] + 1)
+        self._grow(f)
+
+    def __setitem__(self, i, f):
+        if isinstance(i, slice):
+            self._flatten()
+            self._groups[0][i] = f
+        else:
+            g, j = self._locate(i)
+            g[j] = f
+        self._offsets = None
+        self.invalidate()
+
+    def __delitem__(self, i):
+        if isinstance(i, slice):
+            self._flatten()
+            del self._groups[0][i]
+        else:
+            g, j = self._locate(i)
+            del g[j]
+        self._offsets = None
+        self.invalidate()
+
+    def insert(self, i, f):
+        if i >= len(self):
+            self.append(f)
+            return
+        g, j = self._locate(max(i, -len(self)))
+        g.insert(j, f)
+        self._offsets = None
+        self._grow(f)
+
+    def clear(self):
+        self._groups = []
+        self._offsets = None
+        self._extents = {}
+
+    def _compute_extents(self):
+        ret = {}
+        for g in self._groups:
+            if isinstance(g, list):
+                for f in g:
+                    self._watch(f)
+                    layer = _feature_layer(f)
+                    ret[layer] = _union(ret.get(layer), f.bounding_box)
+                continue
+            if isinstance(g, ipc.Drawing.Pad):
+                layer = Layer.TopCopper
+                (x, y), (w, h) = g.center, g.size
+                margin = g.mask_margin or 0
+                w, h = w + 2 * margin, h + 2 * margin
+                bb = ((x - w / 2, x + w / 2), (-y - h / 2, -y + h / 2))
+            elif isinstance(g, ipc.Drawing.Line):
+                layer = _IPC_LAYERS[g.layer]
+                points = _ipc_points(g, self.merge_collinear)
+                if _ipc_is_poly(points, self.polygons):
+                    # Poly bounding boxes include the origin.
+                    xs = [0] + [round(x, 3) for x, _ in points]
+                    ys = [0] + [round(-y, 3) for _, y in points]
+                else:
+                    xs = [x for x, _ in points]
+                    ys = [-y for _, y in points]
+                bb = ((min(xs), max(xs)), (min(ys), max(ys)))
+            else:
+                layer = _IPC_LAYERS[g.layer]
+                x, y = g.center
+                bb = ((x, x), (-y, -y))
+            ret[layer] = _union(ret.get(layer), bb)
+        return ret
+
+
 class Footprint(_Struct):
     __attributes__ = {
         "name": None,
@@ -303,14 +1300,22 @@ class Footprint(_Struct):
         "features": [],
     }
 
+    def __setattr__(self, k, v):
+        if k == "features" and not isinstance(v, _Extents):
+            v = FeatureList(v)
+        super().__setattr__(k, v)
+
+    @property
+    def extents(self):
+        """Bounding box of the features on each layer, as a dict.
+
+        Pads are accounted for on Layer.TopCopper.
+        """
+        return self.features.extents
+
     @property
     def bounding_box(self):
-        xmin, xmax, ymin, ymax = 0, 0, 0, 0
-        for f in self.features:
-            xmin = min(xmin, f.bounding_box[0][0])
-            xmax = max(xmax, f.bounding_box[0][1])
-            ymin = min(ymin, f.bounding_box[1][0])
-            ymax = max(ymax, f.bounding_box[1][1])
+        (xmin, xmax), (ymin, ymax) = self.features.bounding_box
         if self.refdes.position is not None:
             xmin = min(xmin, self.refdes.position[0])
             xmax = max(xmax, self.refdes.position[0])
@@ -327,59 +1332,87 @@ class Footprint(_Struct):
     def filename(self):
         return self.name.replace(" ", "_")
 
-    def from_ipc(self, ipc_drawing):
-        """Translate a kidraw.ipc Drawing into Footprint features."""
+    def derive(self, **kwargs):
+        """Returns a variant of the footprint, with the given attributes changed.
+
+        Unless replaced by kwargs, the variant shares its features with
+        this footprint, and either one copies what it changes: adding
+        or removing features copies the list of features, and
+        features.edit(i) copies feature i before returning it. Use
+        edit() rather than features[i] to modify a feature in place.
+
+        >>> t = f.derive(name="SOT23-5 test")
+        >>> t.features.append(TestPad(name=6, size=(1, 1)))
+        >>> t.features.edit(0).shape = PadShape.Rectangle
+        """
+        ret = copy(self)
+        ret.refdes, ret.value = copy(self.refdes), copy(self.value)
+        if "features" not in kwargs:
+            ret.features = self.features.shared()
+        for k, v in kwargs.items():
+            setattr(ret, k, v)
+        return ret
+
+    def transformed(self, t, flip=False):
+        """Returns a copy of the footprint, moved by the geometry.Affine t.
+
+        t is applied in footprint coordinates, where Y points down. If
+        flip is True, features also move to the matching layers on the
+        other side of the board, and text is mirrored.
+
+        The new footprint's features are a FeatureTable, which
+        transforms lines and pads a whole column at a time.
+        """
+        features = self.features
+        if not isinstance(features, FeatureTable):
+            features = FeatureTable(features)
+        return Footprint(name=self.name,
+                         description=self.description,
+                         refdes=self.refdes.transformed(t, flip),
+                         value=self.value.transformed(t, flip),
+                         features=features.transformed(t, flip))
+
+    def translated(self, dx, dy):
+        return self.transformed(geometry.Affine.translation(dx, dy))
+
+    def rotated(self, degrees):
+        """Returns a copy of the footprint, rotated counterclockwise as seen in KiCad."""
+        return self.transformed(geometry.Affine.rotation(-degrees))
+
+    def mirrored(self):
+        """Returns a copy of the footprint, mirrored left to right."""
+        return self.transformed(geometry.Affine.mirror_x())
+
+    def flipped(self):
+        """Returns the bottom side twin of the footprint.
+
+        The footprint is mirrored left to right and moved to the bottom
+        layers, so that it reads correctly when the board is viewed
+        from below.
+        """
+        return self.transformed(geometry.Affine.mirror_x(), flip=True)
+
+    def from_ipc(self, ipc_drawing, polygons=False, merge_collinear=False,
+                 lazy=False):
+        """Translate a kidraw.ipc Drawing into Footprint features.
+
+        By default, each segment of IPC polylines becomes a separate
+        Line. If merge_collinear is True, consecutive collinear
+        segments are merged first. If polygons is True, closed
+        polylines (such as pin outlines and courtyards) become a single
+        unfilled Poly instead of one Line per segment.
+
+        If lazy is True and the footprint has no features yet, the
+        features are an IPCFeatures view of ipc_drawing, which only
+        converts IPC features as they are accessed.
+        """
+        if lazy and not self.features:
+            self.features = IPCFeatures(ipc_drawing, polygons, merge_collinear)
+            return self
         for f in ipc_drawing.features:
-            if isinstance(f, ipc.Drawing.Pad):
-                self.features.append(SurfaceMountPad(
-                    name=f.number,
-                    shape=PadShape.Obround if f.obround else PadShape.Rectangle,
-                    center=(f.center[0], -f.center[1]),
-                    size=f.size))
-            elif isinstance(f, ipc.Drawing.Line):
-                layer = {
-                    ipc.Drawing.Layer.Silkscreen: Layer.TopSilkscreen,
-                    ipc.Drawing.Layer.Courtyard: Layer.TopCourtyard,
-                    ipc.Drawing.Layer.Assembly: Layer.TopAssembly,
-                    ipc.Drawing.Layer.Documentation: Layer.TopAssembly,
-                }[f.layer]
-                for a, b in zip(f.points, f.points[1:]):
-                    self.features.append(Line(
-                        start=(a[0], -a[1]),
-                        end=(b[0], -b[1]),
-                        layer=layer,
-                        line_width=f.width))
-            elif isinstance(f, ipc.Drawing.Circle):
-                layer = {
-                    ipc.Drawing.Layer.Silkscreen: Layer.TopSilkscreen,
-                    ipc.Drawing.Layer.Courtyard: Layer.TopCourtyard,
-                    ipc.Drawing.Layer.Assembly: Layer.TopAssembly,
-                    ipc.Drawing.Layer.Documentation: Layer.TopAssembly,
-                }[f.layer]
-                # Hack: to draw a filled circle, we draw a zero-length
-                # line of width == diameter.
-                self.features.append(Line(
-                    start=(f.center[0], -f.center[1]),
-                    end=(f.center[0], -f.center[1]),
-                    layer=layer,
-                    line_width=2 * f.radius))
-            else:
-                raise ValueError("Unknown IPC footprint feature type", type(f))
+            self.features.extend(_from_ipc_feature(f, polygons, merge_collinear))
         return self
 
     def __str__(self):
-        refdes = deepcopy(self.refdes)
-        if refdes.position is None:
-            refdes.position = (0, self.bounding_box[1][0] - 1)
-        value = deepcopy(self.value)
-        if value.position is None:
-            value.position = (0, self.bounding_box[1][1] + 1)
-        return """(module {0.filename}
-(layer F.Cu)
-(tedit 0)
-(at 0 0)
-(descr "{0.description}")
-{2}
-{3}
-{1}
-)""".format(self, "\n".join(str(f) for f in self.features), refdes, value)
+        from kidraw.footprint import sexpr
+        return sexpr.dumps(self)
@@ -61,3 +61,35 @@ def QFN(A, T, W, pitch, num_pins, profile=ipc.LandPatternSize.Nominal):
                      description=f"{num_pins}-pin Quad Flat No-Leads")
     f.from_ipc(lib.QFN(profile, A, T, W, pitch, num_pins))
     return f
+
+
+def BGA(A, B, ball, pitch, rows, columns, mask=None, collapsing=True, nsmd=True,
+        profile=ipc.LandPatternSize.Nominal):
+    c = lib.BGA(profile, A, B, ball, pitch, rows, columns, mask, collapsing, nsmd)
+    n = sum(1 for f in c.features if isinstance(f, ipc.Drawing.Pad))
+    f = fp.Footprint(name=f"{n}-BGA",
+                     description=f"{n}-ball Ball Grid Array, {pitch}mm pitch")
+    f.from_ipc(c)
+    return f
+
+
+def DIP(A, B, lead, num_pins, pitch=2.54, row_spacing=7.62, profile=ipc.LandPatternSize.Nominal):
+    f = fp.Footprint(name=f"{num_pins}-DIP",
+                     description=f"{num_pins}-pin Dual In-line Package")
+    f.from_ipc(lib.DIP(profile, A, B, lead, num_pins, pitch, row_spacing))
+    return f
+
+
+def pin_header(positions, rows=1, pitch=2.54, profile=ipc.LandPatternSize.Nominal):
+    f = fp.Footprint(name=f"PinHeader_{rows}x{positions // rows}_P{pitch}mm",
+                     description=f"{positions}-pin header, {rows} rows, {pitch}mm pitch")
+    f.from_ipc(lib.pin_header(profile, positions, rows, pitch))
+    return f
+
+
+def connector(A, B, lead, pitch, positions, rows=1, row_pitch=None,
+              profile=ipc.LandPatternSize.Nominal):
+    f = fp.Footprint(name=f"{positions}-Connector",
+                     description=f"{positions}-position through-hole connector, {pitch}mm pitch")
+    f.from_ipc(lib.connector(profile, A, B, lead, pitch, positions, rows, row_pitch))
+    return f
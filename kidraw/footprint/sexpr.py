@@ -0,0 +1,424 @@
+"""Fast .kicad_mod serialization of Footprints.
+
+The output is byte-identical to str() of the footprint and its
+features, but is produced by writer functions generated for each
+feature class. A writer formats a whole feature with a single %
+operation over precomputed layer and shape strings, and appends the
+result to a shared output buffer instead of building intermediate
+strings.
+
+There is also a compact mode, which writes each feature on a single
+line and leaves out default values.
+
+>>> from kidraw.footprint import sexpr
+>>> s = sexpr.dumps(footprint)
+>>> s = sexpr.dumps(footprint, compact=True)
+>>> with open("foo.kicad_mod", "w") as f:
+...     sexpr.dump(footprint, f)
+"""
+import math
+from copy import copy
+
+from kidraw import footprint as fp
+from kidraw import ipc
+from kidraw.geometry import format_nm, round_nm, to_nm
+
+# Feature class name -> (bindings, template, arguments). The generated
+# writer for a class evaluates the bindings as local variables, then
+# writes template % (arguments).
+_SPECS = {
+    "Text": (
+        ["p = f.position", "s = f.font_size"],
+        '(fp_text %s "%s"\n'
+        "  (at %.3f %.3f)\n"
+        "  (layer %s)\n"
+        "  %shide\n"
+        "  (effects\n"
+        "    (font\n"
+        "      (size %s %s)\n"
+        "      (thickness %s)\n"
+        "    )\n"
+        "%s"
+        "  )\n"
+        ")",
+        ["f._type", "f.text", "p[0]", "p[1]", "LAYERS[f.layer]",
+         '"" if f.hidden else "#"', "s[0]", "s[1]", "f.line_width",
+         '"    (justify mirror)\\n" if f.mirror else ""']),
+    "Line": (
+        ["s = f.start", "e = f.end"],
+        "(fp_line\n"
+        "  (start %.3f %.3f)\n"
+        "  (end %.3f %.3f)\n"
+        "  (layer %s)\n"
+        "  (width %s)\n"
+        ")",
+        ["s[0]", "s[1]", "e[0]", "e[1]", "LAYERS[f.layer]", "f.line_width"]),
+    "Circle": (
+        ["c = f.center"],
+        "(fp_circle\n"
+        "  (center %.3f %.3f)\n"
+        "  (end %.3f %.3f)\n"
+        "  (layer %s)\n"
+        "  (width %s)\n"
+        ")",
+        ["c[0]", "c[1]", "c[0] + f.radius", "c[1]", "LAYERS[f.layer]",
+         "f.line_width"]),
+    "Arc": (
+        ["c = f.center", "a = math.radians(f.start_angle)"],
+        "(fp_arc\n"
+        "  (start %s %s)\n"
+        "  (end %s %s)\n"
+        "  (angle %s)\n"
+        "  (layer %s)\n"
+        "  (width %s)\n"
+        ")",
+        ["c[0]", "c[1]", "c[0] + math.sin(a) * f.radius",
+         "c[1] + math.cos(a) * f.radius", "f.end_angle - f.start_angle",
+         "LAYERS[f.layer]", "f.line_width"]),
+    "Poly": (
+        [],
+        "(fp_poly\n"
+        "  (pts\n"
+        "    %s\n"
+        "  )\n"
+        "  (layer %s)\n"
+        "  (width %s)\n"
+        "%s)",
+        ['"\\n".join(["    (xy %s %s)" % (x, y) for x, y in f.points])',
+         "LAYERS[f.layer]", "f.line_width",
+         '"" if f.filled else "  (fill none)\\n"']),
+    "ThroughHolePad": (
+        ["c = f.center", "s = f.size", "d = f.drill_size",
+         't = "#" if f.thermal_gap == 0 else ""'],
+        "(pad %s thru_hole %s\n"
+        "  (at %.3f %.3f %s)\n"
+        "  (size %.3f %.3f)\n"
+        "  %s\n"
+        "  (layers %s)\n"
+        "  (solder_mask_margin %s)\n"
+        "  (clearance %s)\n"
+        "  %s(zone_connect 1)\n"
+        "  %s(thermal_width %s)\n"
+        "  %s(thermal_gap %s)\n"
+        ")",
+        ["f.name", "SHAPES[f.shape]", "c[0]", "c[1]", "f.angle", "s[0]", "s[1]",
+         '"(drill oval %.3f %.3f)" % d if isinstance(d, tuple) else "(drill %s)" % (d,)',
+         "THROUGH_HOLE_LAYERS[f.layer]", "f.solder_mask_margin", "f.clearance", "t", "t", "f.thermal_width",
+         "t", "f.thermal_gap"]),
+    "SurfaceMountPad": (
+        ["c = f.center", "s = f.size", 't = "#" if f.thermal_gap == 0 else ""'],
+        "(pad %s smd %s\n"
+        "  (at %.3f %.3f %s)\n"
+        "  (size %.3f %.3f)\n"
+        "  (layers %s)\n"
+        "  (solder_mask_margin %s)\n"
+        "  (clearance %s)\n"
+        "  (solder_paste_margin %s)\n"
+        "  (solder_paste_margin_ratio %s)\n"
+        "  %s(zone_connect 1)\n"
+        "  %s(thermal_width %s)\n"
+        "  %s(thermal_gap %s)\n"
+        ")",
+        ["f.name", "SHAPES[f.shape]", "c[0]", "c[1]", "f.angle", "s[0]", "s[1]",
+         "SMD_LAYERS[f.layer]", "f.solder_mask_margin", "f.clearance", "f.solder_paste_margin",
+         "int(-50 * (1 - f.solder_paste_ratio))", "t", "t", "f.thermal_width",
+         "t", "f.thermal_gap"]),
+    "TestPad": (
+        ["c = f.center", "s = f.size"],
+        "(pad %s connect %s\n"
+        "  (at %.3f %.3f %s)\n"
+        "  (size %.3f %.3f)\n"
+        "  (layers %s)\n"
+        "  (solder_mask_margin %s)\n"
+        "  (clearance %s)\n"
+        ")",
+        ["f.name", "SHAPES[f.shape]", "c[0]", "c[1]", "f.angle", "s[0]", "s[1]",
+         "CONNECT_LAYERS[f.layer]", "f.solder_mask_margin", "f.clearance"]),
+}
+
+# Same as _SPECS, for the compact output mode. Each feature is a
+# single line, numbers are written without trailing zeros, and fields
+# that are equal to KiCad's defaults are omitted.
+#
+# The readable output keeps formatting numbers with %.3f, so that
+# existing .kicad_mod files are reproduced byte for byte.
+_COMPACT_SPECS = {
+    "Text": (
+        ["p = f.position", "s = f.font_size"],
+        '(fp_text %s "%s" (at %s %s) (layer %s)%s (effects (font (size %s %s) (thickness %s))%s))',
+        ["f._type", "f.text", "num(p[0])", "num(p[1])", "LAYERS[f.layer]",
+         '" hide" if f.hidden else ""', "num(s[0])", "num(s[1])",
+         "num(f.line_width)", '" (justify mirror)" if f.mirror else ""']),
+    "Line": (
+        ["s = f.start", "e = f.end"],
+        "(fp_line (start %s %s) (end %s %s) (layer %s) (width %s))",
+        ["num(s[0])", "num(s[1])", "num(e[0])", "num(e[1])", "LAYERS[f.layer]",
+         "num(f.line_width)"]),
+    "Circle": (
+        ["c = f.center"],
+        "(fp_circle (center %s %s) (end %s %s) (layer %s) (width %s))",
+        ["num(c[0])", "num(c[1])", "num(c[0] + f.radius)", "num(c[1])",
+         "LAYERS[f.layer]", "num(f.line_width)"]),
+    "Arc": (
+        ["c = f.center", "a = math.radians(f.start_angle)"],
+        "(fp_arc (start %s %s) (end %s %s) (angle %s) (layer %s) (width %s))",
+        ["num(c[0])", "num(c[1])", "num(c[0] + math.sin(a) * f.radius)",
+         "num(c[1] + math.cos(a) * f.radius)", "num(f.end_angle - f.start_angle)",
+         "LAYERS[f.layer]", "num(f.line_width)"]),
+    "Poly": (
+        [],
+        "(fp_poly (pts%s) (layer %s) (width %s)%s)",
+        ['"".join([" (xy %s %s)" % (num(x), num(y)) for x, y in f.points])',
+         "LAYERS[f.layer]", "num(f.line_width)",
+         '"" if f.filled else " (fill none)"']),
+    "ThroughHolePad": (
+        ["c = f.center", "s = f.size", "d = f.drill_size"],
+        "(pad %s thru_hole %s (at %s %s%s) (size %s %s) %s (layers %s)%s%s%s)",
+        ["f.name", "SHAPES[f.shape]", "num(c[0])", "num(c[1])", 'opt("", f.angle)',
+         "num(s[0])", "num(s[1])",
+         '"(drill oval %s %s)" % (num(d[0]), num(d[1])) if isinstance(d, tuple) else "(drill %s)" % num(d)',
+         "THROUGH_HOLE_LAYERS[f.layer]",
+         'opt(" (solder_mask_margin %s)", f.solder_mask_margin)',
+         'opt(" (clearance %s)", f.clearance)',
+         'thermal(f)']),
+    "SurfaceMountPad": (
+        ["c = f.center", "s = f.size"],
+        "(pad %s smd %s (at %s %s%s) (size %s %s) (layers %s)%s%s%s%s%s)",
+        ["f.name", "SHAPES[f.shape]", "num(c[0])", "num(c[1])", 'opt("", f.angle)',
+         "num(s[0])", "num(s[1])", "SMD_LAYERS[f.layer]",
+         'opt(" (solder_mask_margin %s)", f.solder_mask_margin)',
+         'opt(" (clearance %s)", f.clearance)',
+         'opt(" (solder_paste_margin %s)", f.solder_paste_margin)',
+         'opt(" (solder_paste_margin_ratio %s)", int(-50 * (1 - f.solder_paste_ratio)))',
+         'thermal(f)']),
+    "TestPad": (
+        ["c = f.center", "s = f.size"],
+        "(pad %s connect %s (at %s %s%s) (size %s %s) (layers %s)%s%s)",
+        ["f.name", "SHAPES[f.shape]", "num(c[0])", "num(c[1])", 'opt("", f.angle)',
+         "num(s[0])", "num(s[1])", "CONNECT_LAYERS[f.layer]",
+         'opt(" (solder_mask_margin %s)", f.solder_mask_margin)',
+         'opt(" (clearance %s)", f.clearance)']),
+}
+
+
+def _num(x):
+    """Format a number in mm with at most 3 decimals, and no trailing zeros.
+
+    Rounding to the micrometre is done exactly, in integer nanometres,
+    and so is symmetric around zero. This is unlike %.3f, which rounds
+    the binary approximation of x.
+    """
+    return format_nm(round_nm(to_nm(x), 1000))
+
+
+def _opt(template, x):
+    if x == 0:
+        return ""
+    if template:
+        return template % _num(x)
+    return " " + _num(x)
+
+
+def _thermal(f):
+    if f.thermal_gap == 0:
+        return ""
+    return " (zone_connect 1) (thermal_width %s) (thermal_gap %s)" % (
+        _num(f.thermal_width), _num(f.thermal_gap))
+
+
+_NAMESPACE = {
+    "math": math,
+    "num": _num,
+    "opt": _opt,
+    "thermal": _thermal,
+    "LAYERS": {l: l.value for l in fp.Layer},
+    "SHAPES": {s: s.value for s in fp.PadShape},
+    "SMD_LAYERS": fp._SMD_LAYERS,
+    "THROUGH_HOLE_LAYERS": fp._THROUGH_HOLE_LAYERS,
+    "CONNECT_LAYERS": fp._CONNECT_LAYERS,
+}
+
+# (feature class, compact) -> writer function.
+_writers = {}
+
+
+def _compile(name, compact):
+    """Generate and compile the writer function for a feature class."""
+    bindings, template, args = (_COMPACT_SPECS if compact else _SPECS)[name]
+    src = [f"def write_{name}(f, w):"]
+    src += [f"    {b}" for b in bindings]
+    src.append(f"    w(TEMPLATE % ({', '.join(f'({a})' for a in args)},))")
+    ns = dict(_NAMESPACE, TEMPLATE=template)
+    exec(compile("\n".join(src), f"<kidraw.footprint.sexpr.{name}>", "exec"), ns)
+    return ns[f"write_{name}"]
+
+
+def _writer(cls, compact=False):
+    w = _writers.get((cls, compact))
+    if w is None:
+        # Subclasses (e.g. Connector, FeatureTable views) share the
+        # writer of the nearest known base class. Unknown feature
+        # types fall back to their own __str__.
+        w = _write_str
+        for base in cls.__mro__:
+            if base.__module__ == fp.__name__ and base.__name__ in _SPECS:
+                w = _compile(base.__name__, compact)
+                break
+        _writers[cls, compact] = w
+    return w
+
+
+def _write_str(f, w):
+    w(str(f))
+
+
+def write_feature(f, w, compact=False):
+    """Write a single feature by calling w with its serialization."""
+    _writer(type(f), compact)(f, w)
+
+
+def _write_table(t, w):
+    """Write a FeatureTable's rows straight from its columns."""
+    layers = [l.value for l in fp._LAYERS]
+    shapes = [s.value for s in fp._PAD_SHAPES]
+    pad_layers = [fp._SMD_LAYERS.get(l) for l in fp._LAYERS]
+    line = _SPECS["Line"][1]
+    pad = _SPECS["SurfaceMountPad"][1]
+    defaults = fp.SurfaceMountPad.__attributes__
+    write_object = write_feature
+    for kind, i in zip(t._kind, t._row):
+        if kind == fp._LINE:
+            w(line % (t._line_x1[i], t._line_y1[i], t._line_x2[i], t._line_y2[i],
+                      layers[t._line_layer[i]], t._widths[t._line_width[i]]))
+            w("\n")
+        elif kind == fp._PAD:
+            extra = t._pad_extra.get(i)
+            if extra:
+                x = dict(defaults, **extra)
+            else:
+                x = defaults
+            th = "#" if x["thermal_gap"] == 0 else ""
+            w(pad % (t._pad_name[i], shapes[t._pad_shape[i]],
+                     t._pad_x[i], t._pad_y[i], x["angle"], t._pad_w[i], t._pad_h[i],
+                     pad_layers[t._pad_layer[i]], x["solder_mask_margin"], x["clearance"], x["solder_paste_margin"],
+                     int(-50 * (1 - x["solder_paste_ratio"])),
+                     th, th, x["thermal_width"], th, x["thermal_gap"]))
+            w("\n")
+        else:
+            write_object(t._objects[i], w)
+            w("\n")
+
+
+def _write_ipc(features, w, compact):
+    """Write an IPCFeatures, formatting unconverted IPC features directly."""
+    layers = {k: v.value for k, v in fp._IPC_LAYERS.items()}
+    line = _SPECS["Line"][1]
+    pad = _SPECS["SurfaceMountPad"][1]
+    x = fp.SurfaceMountPad.__attributes__
+    pad_layers = fp._SMD_LAYERS[fp.Layer.TopCopper]
+    pad_rest = (x["clearance"], x["solder_paste_margin"],
+                int(-50 * (1 - x["solder_paste_ratio"])),
+                "#", "#", x["thermal_width"], "#", x["thermal_gap"])
+    rect, obround = fp.PadShape.Rectangle.value, fp.PadShape.Obround.value
+    polygons, merge = features.polygons, features.merge_collinear
+    writers = {}
+    for g in features._groups:
+        if isinstance(g, list):
+            objects = g
+        elif compact:
+            # Compact output is rare enough not to warrant its own
+            # direct path, convert without keeping the result.
+            objects = fp._from_ipc_feature(g, polygons, merge)
+        elif isinstance(g, ipc.Drawing.Pad) and g.drill is None:
+            (cx, cy), (sx, sy) = g.center, g.size
+            # 0.0 - cy, as in fp._from_ipc_feature, so that pads on
+            # the X axis do not print as -0.000.
+            w(pad % ((g.number, obround if g.obround else rect, cx, 0.0 - cy, x["angle"], sx, sy,
+                      pad_layers, g.mask_margin or 0) + pad_rest))
+            w("\n")
+            continue
+        elif isinstance(g, ipc.Drawing.Line):
+            points = fp._ipc_points(g, merge)
+            if fp._ipc_is_poly(points, polygons):
+                objects = fp._from_ipc_feature(g, polygons, merge)
+            else:
+                layer, width = layers[g.layer], g.width
+                for a, b in zip(points, points[1:]):
+                    w(line % (a[0], -a[1], b[0], -b[1], layer, width))
+                    w("\n")
+                continue
+        elif isinstance(g, ipc.Drawing.Circle):
+            cx, cy = g.center
+            w(line % (cx, -cy, cx, -cy, layers[g.layer], 2 * g.radius))
+            w("\n")
+            continue
+        else:
+            objects = fp._from_ipc_feature(g, polygons, merge)
+        for f in objects:
+            cls = type(f)
+            writer = writers.get(cls)
+            if writer is None:
+                writer = writers[cls] = _writer(cls, compact)
+            writer(f, w)
+            w("\n")
+
+
+def write(footprint, w, compact=False):
+    """Write a Footprint by calling w with successive chunks of output.
+
+    If compact is True, the output has one S-expression per line,
+    and omits fields that are equal to KiCad's defaults as well as
+    commented out placeholders. This makes for much smaller files.
+    """
+    _, (ymin, ymax) = footprint.bounding_box
+    refdes, value = footprint.refdes, footprint.value
+    if refdes.position is None:
+        refdes = copy(refdes)
+        refdes.position = (0, ymin - 1)
+    if value.position is None:
+        value = copy(value)
+        value.position = (0, ymax + 1)
+
+    if compact:
+        w("(module %s (layer F.Cu) (tedit 0)" % footprint.filename)
+        if footprint.description:
+            w(' (descr "%s")' % footprint.description)
+        w("\n")
+    else:
+        w('(module %s\n(layer F.Cu)\n(tedit 0)\n(at 0 0)\n(descr "%s")\n'
+          % (footprint.filename, footprint.description))
+    write_feature(refdes, w, compact)
+    w("\n")
+    write_feature(value, w, compact)
+    w("\n")
+
+    features = footprint.features
+    if not features:
+        if not compact:
+            w("\n")
+    elif isinstance(features, fp.FeatureTable) and not compact:
+        _write_table(features, w)
+    elif isinstance(features, fp.IPCFeatures):
+        _write_ipc(features, w, compact)
+    else:
+        writers = {}
+        for f in features:
+            cls = type(f)
+            writer = writers.get(cls)
+            if writer is None:
+                writer = writers[cls] = _writer(cls, compact)
+            writer(f, w)
+            w("\n")
+    w(")")
+
+
+def dumps(footprint, compact=False):
+    """Returns the .kicad_mod serialization of a Footprint."""
+    out = []
+    write(footprint, out.append, compact)
+    return "".join(out)
+
+
+def dump(footprint, stream, compact=False):
+    """Writes the .kicad_mod serialization of a Footprint to stream."""
+    write(footprint, stream.write, compact)
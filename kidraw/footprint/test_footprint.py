@@ -1,6 +1,8 @@
 import unittest
 
 from kidraw import footprint as fp
+from kidraw import geometry, ipc
+from kidraw.ipc import library as ipc_lib
 
 
 def CanonicalizeSExpr(s):
@@ -328,3 +330,335 @@ class FootprintTest(unittest.TestCase):
 (fp_text value "VAL" (at 0 1) (layer F.Fab) hide (effects (font (size 1 1) (thickness 0.15))))
 (fp_text user "test feature" (at 0 0) (layer F.SilkS) (effects (font (size 1 1) (thickness 0.15))))
 )""")
+
+
+class FeatureTableTest(unittest.TestCase):
+    def _features(self):
+        return [
+            fp.Line(start=(1, 2), end=(3.5, -4), layer=fp.Layer.TopAssembly, line_width=0.075),
+            fp.SurfaceMountPad(name=1, center=(-1.5, 0), size=(1, 2)),
+            fp.Text(text="test", position=(10, 10)),
+            fp.SurfaceMountPad(name="A2", shape=fp.PadShape.Obround, center=(1.5, 0), size=(1, 2), solder_mask_margin=0.1),
+            fp.Line(start=(0, 0), end=(1, 1), line_width=1),
+        ]
+
+    def testViews(self):
+        features = self._features()
+        t = fp.FeatureTable(features)
+        self.assertEqual(len(t), len(features))
+        for got, want in zip(t, features):
+            self.assertIsInstance(got, type(want))
+            self.assertEqual(str(got), str(want))
+            self.assertEqual(got.bounding_box, want.bounding_box)
+        self.assertIs(t[2], features[2])
+
+    def testWriteThrough(self):
+        t = fp.FeatureTable(self._features())
+        t[0].end = (7, 8)
+        t[0].layer = fp.Layer.BottomSilkscreen
+        t[1].center = (2, 3)
+        t[1].clearance = 0.2
+        self.assertEqual(t[0].end, (7, 8))
+        self.assertEqual(t[0].layer, fp.Layer.BottomSilkscreen)
+        self.assertEqual(t[1].center, (2, 3))
+        self.assertEqual(t[1].clearance, 0.2)
+        self.assertEqual(t[3].clearance, 0)
+        with self.assertRaises(ValueError):
+            t[0].foo = 1
+
+    def testMutation(self):
+        features = self._features()
+        t = fp.FeatureTable(features)
+        del t[1]
+        del features[1]
+        t.insert(0, fp.Line(start=(5, 5)))
+        features.insert(0, fp.Line(start=(5, 5)))
+        t[1] = fp.SurfaceMountPad(name=9)
+        features[1] = fp.SurfaceMountPad(name=9)
+        self.assertEqual([str(f) for f in t], [str(f) for f in features])
+
+    def testFootprint(self):
+        a = fp.Footprint(name="test", features=self._features())
+        b = fp.Footprint(name="test", features=fp.FeatureTable(self._features()))
+        self.assertEqual(a.bounding_box, b.bounding_box)
+        self.assertEqual(str(a), str(b))
+
+
+class FeatureListTest(unittest.TestCase):
+    def testExtents(self):
+        f = fp.Footprint(name="test")
+        self.assertIsInstance(f.features, fp.FeatureList)
+        self.assertEqual(f.bounding_box, ((0, 0), (0, 0)))
+        self.assertEqual(f.extents, {})
+
+        f.features.append(fp.Line(start=(1, 1), end=(2, 3)))
+        f.features += [fp.SurfaceMountPad(center=(-5, 0), size=(2, 2)),
+                       fp.Line(start=(0, -4), end=(0, 0), layer=fp.Layer.TopCourtyard)]
+        self.assertEqual(f.extents, {
+            fp.Layer.TopSilkscreen: ((1, 2), (1, 3)),
+            fp.Layer.TopCopper: ((-6, -4), (-1, 1)),
+            fp.Layer.TopCourtyard: ((0, 0), (-4, 0)),
+        })
+        self.assertEqual(f.bounding_box, ((-6, 2), (-4, 3)))
+
+        del f.features[1]
+        self.assertEqual(f.bounding_box, ((0, 2), (-4, 3)))
+        f.features[0] = fp.Line(start=(0, 0), end=(10, 0))
+        self.assertEqual(f.bounding_box, ((0, 10), (-4, 0)))
+        f.features[0].end = (20, 0)
+        self.assertEqual(f.bounding_box, ((0, 20), (-4, 0)))
+
+        # Features held by several containers invalidate all of them.
+        line = fp.Line(start=(0, 0), end=(1, 1))
+        f = fp.Footprint(name="test", features=[line])
+        g = fp.Footprint(name="test", features=fp.FeatureTable([fp.Circle(radius=1), line]))
+        self.assertEqual(f.extents, {fp.Layer.TopSilkscreen: ((0, 1), (0, 1))})
+        self.assertEqual(g.bounding_box, ((-1, 1), (-1, 1)))
+        line.end = (10, 10)
+        f.features[0].start = (-1, 0)
+        self.assertEqual(f.extents, {fp.Layer.TopSilkscreen: ((-1, 10), (0, 10))})
+        g.features[0].radius = 3
+        self.assertEqual(g.bounding_box, ((-3, 3), (-3, 3)))
+        derived = f.features.shared()
+        self.assertEqual(derived.bounding_box, ((-1, 10), (0, 10)))
+        line.end = (20, 20)
+        self.assertEqual(derived.bounding_box, ((-1, 20), (0, 20)))
+
+    def testAssign(self):
+        f = fp.Footprint(name="test")
+        f.features = [fp.Line(start=(1, 1), end=(2, 3))]
+        self.assertIsInstance(f.features, fp.FeatureList)
+        self.assertEqual(f.features, [f.features[0]])
+        self.assertEqual(f.bounding_box, ((0, 2), (0, 3)))
+
+    def testTable(self):
+        t = fp.FeatureTable([fp.Line(start=(1, 1), end=(2, 3)),
+                             fp.SurfaceMountPad(center=(-5, 0), size=(2, 2))])
+        f = fp.Footprint(name="test", features=t)
+        self.assertIs(f.features, t)
+        self.assertEqual(f.bounding_box, ((-6, 2), (-1, 3)))
+        t[0].end = (10, 10)
+        self.assertEqual(f.extents[fp.Layer.TopSilkscreen], ((1, 10), (1, 10)))
+
+
+class FromIPCTest(unittest.TestCase):
+    def _drawing(self):
+        d = ipc.Drawing()
+        d.features += [
+            ipc.Drawing.Pad(number=1, center=(-1, 0.5), size=(1, 0.5)),
+            ipc.Drawing.Line(layer=ipc.Drawing.Layer.Courtyard,
+                             points=[(-2, -1), (0, -1), (2, -1), (2, 1), (-2, 1), (-2, -1)],
+                             width=0.15),
+            ipc.Drawing.Line(layer=ipc.Drawing.Layer.Silkscreen,
+                             points=[(-1, 1), (0, 1), (1, 1)],
+                             width=0.15),
+            ipc.Drawing.Circle(layer=ipc.Drawing.Layer.Silkscreen, center=(-3, 0.5), radius=0.1),
+        ]
+        return d
+
+    def testSegments(self):
+        f = fp.Footprint(name="test").from_ipc(self._drawing())
+        self.assertEqual([type(x) for x in f.features],
+                         [fp.SurfaceMountPad] + [fp.Line] * 8)
+        self.assertEqual(f.features[0].center, (-1, -0.5))
+        self.assertEqual(f.features[1].layer, fp.Layer.TopCourtyard)
+
+    def testMergeCollinear(self):
+        f = fp.Footprint(name="test").from_ipc(self._drawing(), merge_collinear=True)
+        self.assertEqual(len(f.features), 7)
+        self.assertEqual(f.features[1].start, (-2, 1))
+        self.assertEqual(f.features[1].end, (2, 1))
+        self.assertEqual(f.features[5].start, (-1, -1))
+        self.assertEqual(f.features[5].end, (1, -1))
+
+    def testPolygons(self):
+        f = fp.Footprint(name="test").from_ipc(self._drawing(), polygons=True, merge_collinear=True)
+        self.assertEqual([type(x) for x in f.features],
+                         [fp.SurfaceMountPad, fp.Poly, fp.Line, fp.Line])
+        poly = f.features[1]
+        self.assertEqual(poly.points, [(-2, 1), (2, 1), (2, -1), (-2, -1)])
+        self.assertFalse(poly.filled)
+        self.assertEqual(poly.layer, fp.Layer.TopCourtyard)
+        self.assertIn("(fill none)", str(poly))
+        self.assertEqual(f.bounding_box, ((-3, 2), (-1, 1)))
+
+
+class IPCFeaturesTest(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+
+    def _both(self, d, **kwargs):
+        eager = fp.Footprint(name="test").from_ipc(d, **kwargs)
+        lazy = fp.Footprint(name="test").from_ipc(d, lazy=True, **kwargs)
+        return eager, lazy
+
+    def testSerialization(self):
+        from kidraw.footprint import sexpr
+        drawings = [
+            FromIPCTest()._drawing(),
+            ipc_lib.SOT23(ipc.LandPatternSize.Nominal, 5),
+            ipc_lib.chip(ipc.LandPatternSize.Most, ipc_lib.imperial("0603"), polarized=True),
+        ]
+        for d in drawings:
+            for kwargs in ({}, {"polygons": True}, {"merge_collinear": True},
+                           {"polygons": True, "merge_collinear": True}):
+                eager, lazy = self._both(d, **kwargs)
+                self.assertIsInstance(lazy.features, fp.IPCFeatures)
+                self.assertEqual(lazy.extents, eager.extents)
+                self.assertEqual(str(lazy), str(eager))
+                self.assertEqual(sexpr.dumps(lazy, compact=True),
+                                 sexpr.dumps(eager, compact=True))
+                # Serialization does not convert anything.
+                self.assertFalse(any(isinstance(g, list) for g in lazy.features._groups))
+                self.assertEqual(len(lazy.features), len(eager.features))
+                self.assertEqual([str(x) for x in lazy.features],
+                                 [str(x) for x in eager.features])
+
+    def testMutation(self):
+        eager, lazy = self._both(FromIPCTest()._drawing())
+        features = lazy.features
+        self.assertEqual(features[-1].layer, fp.Layer.TopSilkscreen)
+        groups = features._groups
+        self.assertIsInstance(groups[-1], list)
+        self.assertNotIsInstance(groups[1], list)
+
+        features[2].end = (5, 5)
+        eager.features[2].end = (5, 5)
+        self.assertIsInstance(groups[1], list)
+        self.assertNotIsInstance(groups[2], list)
+
+        del features[0]
+        del eager.features[0]
+        features.insert(3, fp.Circle(radius=4))
+        eager.features.insert(3, fp.Circle(radius=4))
+        features.append(fp.Line(end=(9, 9)))
+        eager.features.append(fp.Line(end=(9, 9)))
+        self.assertEqual(len(features), len(eager.features))
+        self.assertEqual(lazy.bounding_box, eager.bounding_box)
+        self.assertEqual(str(lazy), str(eager))
+        self.assertNotIsInstance(features._groups[2], list)
+
+        features[1:3] = []
+        del eager.features[1:3]
+        self.assertEqual(str(lazy), str(eager))
+
+    def testNoMaskMargin(self):
+        d = ipc.Drawing()
+        d.features.append(ipc.Drawing.Pad(number=1, center=(1, 1), size=(1, 2), mask_margin=None))
+        eager, lazy = self._both(d)
+        self.assertEqual(lazy.extents, eager.extents)
+        self.assertEqual(str(lazy), str(eager))
+
+    def testNotEmpty(self):
+        f = fp.Footprint(name="test", features=[fp.Line()])
+        f.from_ipc(FromIPCTest()._drawing(), lazy=True)
+        self.assertIsInstance(f.features, fp.FeatureList)
+        self.assertEqual(len(f.features), 10)
+
+
+class TransformTest(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+        self.drawing = ipc_lib.SOT23(ipc.LandPatternSize.Nominal, 5)
+        self.footprint = fp.Footprint(name="SOT23-5").from_ipc(self.drawing)
+
+    def _pads(self, f):
+        return sorted((p.name, round(p.center[0], 9), round(p.center[1], 9),
+                       round(p.size[0], 9), round(p.size[1], 9))
+                      for p in f.features if isinstance(p, fp.SurfaceMountPad))
+
+    def testFlipped(self):
+        f = self.footprint.flipped()
+        self.assertIsInstance(f.features, fp.FeatureTable)
+        self.assertEqual(set(f.extents),
+                         {fp.Layer.BottomCopper, fp.Layer.BottomSilkscreen,
+                          fp.Layer.BottomCourtyard, fp.Layer.BottomAssembly})
+        self.assertEqual(self._pads(f), self._pads(self.footprint.mirrored()))
+        self.assertTrue(f.refdes.mirror)
+        self.assertEqual(f.value.layer, fp.Layer.BottomAssembly)
+        s = str(f)
+        self.assertIn("(layers B.Cu B.Paste B.Mask)", s)
+        self.assertIn("(justify mirror)", s)
+        # Only the module header refers to the top side.
+        self.assertEqual(s.count("F."), 1)
+        # Up to the sign of zeros, flipping twice is a no-op.
+        self.assertEqual(str(f.flipped()), str(self.footprint).replace("-0.000", "0.000"))
+
+    def testRotated(self):
+        # Rotating before or after conversion from IPC is the same.
+        expected = fp.Footprint(name="SOT23-5").from_ipc(self.drawing.rotated(90))
+        f = self.footprint.rotated(90)
+        self.assertEqual(self._pads(f), self._pads(expected))
+        for (a, b), (c, d) in zip(f.bounding_box, expected.bounding_box):
+            self.assertAlmostEqual(a, c)
+            self.assertAlmostEqual(b, d)
+
+        f = self.footprint.rotated(45)
+        self.assertEqual({p.angle for p in f.features if isinstance(p, fp.SurfaceMountPad)}, {45})
+        with self.assertRaises(ValueError):
+            self.drawing.rotated(45)
+
+    def testFeatures(self):
+        t = geometry.Affine.translation(1, 2) @ geometry.Affine.rotation(90)
+        pad = fp.ThroughHolePad(center=(1, 0), size=(1, 2), drill_size=(0.5, 1), angle=30)
+        moved = pad.transformed(t, flip=True)
+        self.assertEqual(moved.center, (1, 3))
+        self.assertEqual((moved.size, moved.drill_size, moved.angle), ((2, 1), (1, 0.5), 30))
+        self.assertEqual(moved.layer, fp.Layer.BottomCopper)
+
+        arc = fp.Arc(center=(0, 0), radius=1, start_angle=0, end_angle=90)
+        moved = arc.transformed(geometry.Affine.mirror_x())
+        self.assertEqual((moved.start_angle, moved.end_angle), (0, -90))
+        moved = arc.transformed(geometry.Affine.rotation(90))
+        self.assertEqual((moved.start_angle, moved.end_angle), (-90, 0))
+
+        table = fp.FeatureTable([fp.SurfaceMountPad(center=(1, 2), size=(1, 2), angle=10),
+                                 fp.Line(end=(1, 1))])
+        for t in (geometry.Affine.mirror_x(), geometry.Affine.rotation(90),
+                  geometry.Affine.rotation(30) @ geometry.Affine.mirror_y()):
+            moved = table.transformed(t, flip=True)
+            self.assertEqual([str(x) for x in moved],
+                             [str(x.transformed(t, flip=True)) for x in table])
+
+
+class DeriveTest(unittest.TestCase):
+    def setUp(self):
+        self.drawing = ipc_lib.SOT23(ipc.LandPatternSize.Nominal, 5)
+
+    def _check(self, base):
+        orig = str(base)
+        n = len(base.features)
+        v = base.derive(name="variant")
+        v.refdes.text = "TP"
+        self.assertEqual(v.name, "variant")
+        self.assertEqual(base.refdes.text, "REF")
+
+        v.features.append(fp.TestPad(name=6, center=(5, 5), size=(1, 1)))
+        v.features.edit(0).center = (-5, -5)
+        self.assertEqual(v.features.edit(0).center, (-5, -5))
+        del v.features[1]
+        self.assertEqual(len(v.features), n)
+        self.assertEqual(v.bounding_box[0], (-5 - 1.225 / 2, 5.5))
+        self.assertEqual(str(base), orig)
+        self.assertEqual(base.features[0].center[0], -1.2625)
+
+        # The parent can change too, without affecting the variant.
+        base.features.edit(2).layer = fp.Layer.TopCopper
+        self.assertNotEqual(v.features[1].layer, fp.Layer.TopCopper)
+
+        v2 = v.derive(features=[])
+        self.assertEqual(len(v2.features), 0)
+        self.assertEqual(len(v.features), n)
+
+    def testFeatureList(self):
+        base = fp.Footprint(name="base").from_ipc(self.drawing)
+        v = base.derive()
+        self.assertIs(v.features._items, base.features._items)
+        self.assertIs(v.features[1], base.features[1])
+        self._check(base)
+
+    def testFeatureTable(self):
+        self._check(fp.Footprint(name="base", features=fp.FeatureTable()).from_ipc(self.drawing))
+
+    def testIPCFeatures(self):
+        self._check(fp.Footprint(name="base").from_ipc(self.drawing, lazy=True))
@@ -3,22 +3,27 @@ import unittest
 
 from kidraw import ipc
 from kidraw.footprint import library as lib
+from kidraw.footprint import sexpr
 
 
 class TestLibrary(unittest.TestCase):
-    def _check_fp(self, name, fp):
+    def _check_golden(self, name, out):
         self.maxDiff = None
         golden = os.path.join(
             os.path.dirname(__file__),
             "golden/%s.kicad_mod" % name)
         if os.environ.get("KIDRAW_WRITE_GOLDENS", False):
             with open(golden, "w") as f:
-                f.write(str(fp))
+                f.write(out)
             return
 
         with open(golden) as f:
             golden = f.read()
-        self.assertMultiLineEqual(str(fp), golden)
+        self.assertMultiLineEqual(out, golden)
+
+    def _check_fp(self, name, fp):
+        self._check_golden("compact/%s" % name, sexpr.dumps(fp, compact=True))
+        self._check_golden(name, str(fp))
 
     def testChips(self):
         self._check_fp("0805", lib.chip(
@@ -76,3 +81,24 @@ class TestLibrary(unittest.TestCase):
                          ipc.Dimension(0.18, 0.28),
                          0.5,
                          32))
+
+    def testBGA(self):
+        mask = [[not (1 <= r < 3 and 1 <= c < 3) for c in range(4)] for r in range(4)]
+        self._check_fp("BGA", lib.BGA(
+                         ipc.Dimension.from_nominal(5, 0.1),
+                         ipc.Dimension.from_nominal(5, 0.1),
+                         ipc.Dimension.from_nominal(0.5, 0.05),
+                         1,
+                         4,
+                         4,
+                         mask))
+
+    def testDIP(self):
+        self._check_fp("DIP", lib.DIP(
+                         ipc.Dimension(6.1, 7.11),
+                         ipc.Dimension(9.02, 10.16),
+                         ipc.Dimension(0.42, 0.66),
+                         8))
+
+    def testPinHeader(self):
+        self._check_fp("PinHeader", lib.pin_header(10, rows=2))
@@ -0,0 +1,126 @@
+import io
+import unittest
+
+from kidraw import footprint as fp
+from kidraw import ipc
+from kidraw.ipc import library as ipclib
+from kidraw.footprint import library as lib
+from kidraw.footprint import sexpr
+
+
+def _features():
+    return [
+        fp.Text(text="test", position=(1, 2.5), hidden=True, font_size=(1.5, 2), line_width=1),
+        fp.Text(_type="reference", text="REF"),
+        fp.Text(text="bottom", layer=fp.Layer.BottomSilkscreen, mirror=True),
+        fp.Line(start=(1.23456, -2), end=(3, 4.5), layer=fp.Layer.BottomCopper, line_width=0.5),
+        fp.Circle(center=(1, 2), radius=3, layer=fp.Layer.TopCourtyard),
+        fp.Arc(center=(3, 4), radius=10, start_angle=90, end_angle=135),
+        fp.Poly(),
+        fp.Poly(points=[(0, 0), (1, 1), (1.5, 2.6)], layer=fp.Layer.TopAssembly),
+        fp.ThroughHolePad(name=3, center=(1, 2), size=(1.5, 1.5), drill_size=0.8),
+        fp.ThroughHolePad(name=4, shape=fp.PadShape.Obround, angle=90, drill_size=(0.8, 1.2), thermal_width=1, thermal_gap=2),
+        fp.SurfaceMountPad(name=1, center=(-1.25, 0.5), size=(1, 2), solder_paste_ratio=0.5),
+        fp.SurfaceMountPad(name="A1", shape=fp.PadShape.Obround, clearance=0.2, thermal_gap=0.5),
+        fp.SurfaceMountPad(name="B1", center=(1, 1), size=(1, 1), layer=fp.Layer.BottomCopper),
+        fp.ThroughHolePad(name=6, size=(1.5, 1.5), drill_size=0.8, layer=fp.Layer.BottomCopper),
+        fp.TestPad(name=7, layer=fp.Layer.BottomCopper),
+        fp.TestPad(name=2, center=(5, 5), size=(2, 2)),
+        fp.Connector(name=5, angle=45.5),
+    ]
+
+
+def _reference(f):
+    """The footprint serialization, as originally defined."""
+    refdes = fp.Text(**{k: getattr(f.refdes, k) for k in fp.Text.__attributes__})
+    if refdes.position is None:
+        refdes.position = (0, f.bounding_box[1][0] - 1)
+    value = fp.Text(**{k: getattr(f.value, k) for k in fp.Text.__attributes__})
+    if value.position is None:
+        value.position = (0, f.bounding_box[1][1] + 1)
+    return """(module {0.filename}
+(layer F.Cu)
+(tedit 0)
+(at 0 0)
+(descr "{0.description}")
+{2}
+{3}
+{1}
+)""".format(f, "\n".join(str(x) for x in f.features), refdes, value)
+
+
+class SExprTest(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+
+    def testFeatures(self):
+        for f in _features():
+            out = []
+            sexpr.write_feature(f, out.append)
+            self.assertEqual("".join(out), str(f))
+
+    def testFootprint(self):
+        f = fp.Footprint(name="empty")
+        self.assertEqual(sexpr.dumps(f), _reference(f))
+
+        f = fp.Footprint(name="test footprint", description="Everything", features=_features())
+        f.value.position = (1, 1)
+        self.assertEqual(sexpr.dumps(f), _reference(f))
+        self.assertEqual(str(f), _reference(f))
+
+        buf = io.StringIO()
+        sexpr.dump(f, buf)
+        self.assertEqual(buf.getvalue(), _reference(f))
+
+    def testFeatureTable(self):
+        f = fp.Footprint(name="test", features=fp.FeatureTable(_features()))
+        self.assertEqual(sexpr.dumps(f), _reference(f))
+
+    def testLibrary(self):
+        D = ipc.Dimension
+        for f in (lib.chip(lib.imperial("0805"), polarized=True),
+                  lib.SOT23(5),
+                  lib.QFP(D(6.8, 7.2), D(8.8, 9.2), D(0.45, 0.75), D(0.3, 0.45), 0.8, 32)):
+            self.assertEqual(sexpr.dumps(f), _reference(f))
+            t = fp.Footprint(name=f.name, description=f.description,
+                             features=fp.FeatureTable(f.features))
+            self.assertEqual(sexpr.dumps(t), _reference(f))
+
+    def testNoNegativeZeroPads(self):
+        # SOT23-3's pin 3 sits on the X axis.
+        f = lib.SOT23(3)
+        lazy = fp.Footprint(name=f.name).from_ipc(ipclib.SOT23(ipc.LandPatternSize.Nominal, 3), lazy=True)
+        for out in (str(f), sexpr.dumps(lazy)):
+            pads = [l for l in out.splitlines() if l.startswith("  (at") and l.endswith(" 0)")]
+            self.assertTrue(any(" 0.000 " in l for l in pads))
+            self.assertFalse(any("-0.000" in l for l in pads))
+
+    def testCompact(self):
+        def compact(f):
+            out = []
+            sexpr.write_feature(f, out.append, compact=True)
+            return "".join(out)
+
+        self.assertEqual(
+            compact(fp.SurfaceMountPad(name=1, center=(-1.25, 0.5), size=(1, 2))),
+            "(pad 1 smd rect (at -1.25 0.5) (size 1 2) (layers F.Cu F.Paste F.Mask))")
+        self.assertEqual(
+            compact(fp.SurfaceMountPad(name=1, angle=90, clearance=0.2, solder_paste_ratio=0.5, thermal_width=1, thermal_gap=2)),
+            "(pad 1 smd rect (at 0 0 90) (size 0 0) (layers F.Cu F.Paste F.Mask) (clearance 0.2) (solder_paste_margin_ratio -25) (zone_connect 1) (thermal_width 1) (thermal_gap 2))")
+        self.assertEqual(
+            compact(fp.ThroughHolePad(name=2, size=(1.5, 1.5), drill_size=0.8)),
+            "(pad 2 thru_hole circle (at 0 0) (size 1.5 1.5) (drill 0.8) (layers *.Cu *.Mask F.SilkS))")
+        self.assertEqual(
+            compact(fp.Line(start=(-0.0001, 1.23456), end=(3, 4))),
+            "(fp_line (start 0 1.235) (end 3 4) (layer F.SilkS) (width 0.15))")
+        self.assertEqual(
+            compact(fp.Text(text="x", hidden=True)),
+            '(fp_text user "x" (at 0 0) (layer F.SilkS) hide (effects (font (size 1 1) (thickness 0.15))))')
+
+        f = fp.Footprint(name="test", features=_features())
+        out = sexpr.dumps(f, compact=True)
+        self.assertTrue(out.startswith("(module test (layer F.Cu) (tedit 0)\n"))
+        self.assertEqual(len(out.splitlines()), len(_features()) + 4)
+        self.assertNotIn("#", out)
+        t = fp.Footprint(name="test", features=fp.FeatureTable(_features()))
+        self.assertEqual(sexpr.dumps(t, compact=True), out)
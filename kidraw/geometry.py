@@ -0,0 +1,483 @@
+"""Small 2D geometry helpers shared by kidraw.ipc and kidraw.footprint."""
+import math
+from array import array
+
+# Coordinates closer than this (in mm) are considered equal.
+Epsilon = 1e-9
+
+# Lengths are in mm, but KiCad stores them as integer nanometres.
+# Rounding is exact on the latter.
+# TODO: ipc.Drawing and footprint feature coordinates are still float
+# mm, only Dimension and LandPatternSize math use nm so far.
+NM_PER_MM = 1000000
+
+
+def to_nm(mm):
+    """Returns the length mm, as an integer number of nanometres."""
+    return round(mm * NM_PER_MM)
+
+
+def from_nm(nm):
+    """Returns the length nm, in mm."""
+    return nm / NM_PER_MM
+
+
+def round_nm(nm, increment):
+    """Rounds nm to the nearest multiple of increment, ties away from zero."""
+    q, r = divmod(abs(nm), increment)
+    if 2 * r >= increment:
+        q += 1
+    return q * increment if nm >= 0 else -q * increment
+
+
+def format_nm(nm):
+    """Formats nm as a decimal number of mm, without trailing zeros."""
+    sign = ""
+    if nm < 0:
+        sign, nm = "-", -nm
+    mm, frac = divmod(nm, NM_PER_MM)
+    if not frac:
+        return f"{sign}{mm}"
+    return f"{sign}{mm}.{frac:06d}".rstrip("0")
+
+
+def _collinear(a, b, c):
+    """Returns True if b lies on the segment from a to c."""
+    cross = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    if abs(cross) > Epsilon:
+        return False
+    dot = (b[0] - a[0]) * (c[0] - b[0]) + (b[1] - a[1]) * (c[1] - b[1])
+    return dot >= -Epsilon
+
+
+def _same(a, b):
+    return abs(a[0] - b[0]) <= Epsilon and abs(a[1] - b[1]) <= Epsilon
+
+
+def merge_collinear(points):
+    """Returns points with redundant vertices of the polyline removed.
+
+    A vertex is redundant if it repeats the previous vertex, or if it
+    lies on the straight segment between its neighbours. If the
+    polyline is closed (the first and last points are equal), the
+    closing vertex is considered as well. Reversals (a polyline that
+    doubles back on itself) are preserved.
+    """
+    ret = []
+    for p in points:
+        if ret and _same(ret[-1], p):
+            continue
+        while len(ret) >= 2 and _collinear(ret[-2], ret[-1], p):
+            ret.pop()
+        ret.append(p)
+    if len(ret) >= 4 and _same(ret[0], ret[-1]) and _collinear(ret[-2], ret[0], ret[1]):
+        ret = ret[1:-1] + [ret[1]]
+    if len(ret) < 2:
+        # Degenerate polyline, keep its endpoints so that it still
+        # draws something.
+        return [points[0], points[-1]]
+    return ret
+
+
+def _cos_sin(degrees):
+    # Quarter turns are exact, so that rotating a footprint by 90
+    # degrees does not smear its coordinates with rounding noise.
+    q, r = divmod(degrees, 90)
+    if r == 0:
+        return ((1, 0), (0, 1), (-1, 0), (0, -1))[int(q) % 4]
+    a = math.radians(degrees)
+    return math.cos(a), math.sin(a)
+
+
+class Affine:
+    """A 2D affine transform.
+
+    It maps (x, y) to (a*x + b*y + c, d*x + e*y + f). Transforms are
+    composed with @, and as with matrices the right-hand transform is
+    applied first:
+
+    >>> t = Affine.translation(1, 2) @ Affine.rotation(90)
+    >>> t.apply((1, 0))
+    (1, 3)
+
+    Rotations are counterclockwise in a Y-up coordinate system, such
+    as kidraw.ipc's.
+    """
+
+    __slots__ = ("a", "b", "c", "d", "e", "f")
+
+    def __init__(self, a=1, b=0, c=0, d=0, e=1, f=0):
+        self.a, self.b, self.c = a, b, c
+        self.d, self.e, self.f = d, e, f
+
+    @classmethod
+    def translation(cls, dx, dy):
+        return cls(c=dx, f=dy)
+
+    @classmethod
+    def rotation(cls, degrees):
+        cos, sin = _cos_sin(degrees)
+        return cls(cos, -sin, 0, sin, cos, 0)
+
+    @classmethod
+    def mirror_x(cls):
+        """Mirror across the Y axis, i.e. negate X coordinates."""
+        return cls(a=-1)
+
+    @classmethod
+    def mirror_y(cls):
+        """Mirror across the X axis, i.e. negate Y coordinates."""
+        return cls(e=-1)
+
+    def __matmul__(self, other):
+        return Affine(
+            self.a * other.a + self.b * other.d,
+            self.a * other.b + self.b * other.e,
+            self.a * other.c + self.b * other.f + self.c,
+            self.d * other.a + self.e * other.d,
+            self.d * other.b + self.e * other.e,
+            self.d * other.c + self.e * other.f + self.f)
+
+    def __eq__(self, other):
+        if not isinstance(other, Affine):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    def __repr__(self):
+        return "Affine({0.a}, {0.b}, {0.c}, {0.d}, {0.e}, {0.f})".format(self)
+
+    @property
+    def mirrored(self):
+        """True if the transform reverses orientation."""
+        return self.a * self.e - self.b * self.d < 0
+
+    @property
+    def angle(self):
+        """The rotation of the transform in degrees, in [0, 360).
+
+        For mirrored transforms, this is the rotation applied after
+        mirroring X coordinates.
+        """
+        a, d = (-self.a, -self.d) if self.mirrored else (self.a, self.d)
+        ret = round(math.degrees(math.atan2(d, a)), 9) % 360
+        if ret % 90 == 0:
+            return int(ret)
+        return ret
+
+    def apply(self, p):
+        x, y = p
+        return (self.a * x + self.b * y + self.c, self.d * x + self.e * y + self.f)
+
+    def apply_all(self, points):
+        """Returns the list of transformed points."""
+        a, b, c, d, e, f = self.a, self.b, self.c, self.d, self.e, self.f
+        return [(a * x + b * y + c, d * x + e * y + f) for x, y in points]
+
+    def apply_columns(self, xs, ys):
+        """Transforms points given as separate X and Y sequences.
+
+        Returns two new array("d") of transformed X and Y coordinates.
+        """
+        a, b, c, d, e, f = self.a, self.b, self.c, self.d, self.e, self.f
+        # Quarter turns and mirrors, which is to say all of the common
+        # transforms, need not look at both columns at once.
+        if b == 0 and d == 0:
+            return (array("d", [a * x + c for x in xs]),
+                    array("d", [e * y + f for y in ys]))
+        if a == 0 and e == 0:
+            return (array("d", [b * y + c for y in ys]),
+                    array("d", [d * x + f for x in xs]))
+        return (array("d", [a * x + b * y + c for x, y in zip(xs, ys)]),
+                array("d", [d * x + e * y + f for x, y in zip(xs, ys)]))
+
+
+def clip_segment(a, b, box):
+    """Clips the segment from a to b to box, ((xmin, xmax), (ymin, ymax)).
+
+    Returns the (t0, t1) parameters of the part of the segment inside
+    the box, 0 <= t0 <= t1 <= 1, or None if the segment misses it.
+    This is the Liang-Barsky algorithm.
+    """
+    (xmin, xmax), (ymin, ymax) = box
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    t0, t1 = 0, 1
+    for p, q in ((-dx, a[0] - xmin), (dx, xmax - a[0]),
+                 (-dy, a[1] - ymin), (dy, ymax - a[1])):
+        if p == 0:
+            # Parallel to this edge, and outside of it.
+            if q < 0:
+                return None
+            continue
+        t = q / p
+        if p < 0:
+            if t > t1:
+                return None
+            t0 = max(t0, t)
+        else:
+            if t < t0:
+                return None
+            t1 = min(t1, t)
+    return t0, t1
+
+
+def inflate_box(box, d):
+    """Returns box grown by d on every side."""
+    (xmin, xmax), (ymin, ymax) = box
+    return (xmin - d, xmax + d), (ymin - d, ymax + d)
+
+
+def box_distance(a, b):
+    """Returns the distance between boxes a and b, 0 if they overlap."""
+    (axmin, axmax), (aymin, aymax) = a
+    (bxmin, bxmax), (bymin, bymax) = b
+    dx = max(bxmin - axmax, axmin - bxmax, 0)
+    dy = max(bymin - aymax, aymin - bymax, 0)
+    return math.hypot(dx, dy)
+
+
+def _point_segment_distance(p, a, b):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    n = dx * dx + dy * dy
+    t = 0 if n == 0 else min(1, max(0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / n))
+    return math.hypot(p[0] - a[0] - t * dx, p[1] - a[1] - t * dy)
+
+
+def segment_box_distance(a, b, box):
+    """Returns the distance between the segment from a to b and box."""
+    if clip_segment(a, b, box) is not None:
+        return 0
+    (xmin, xmax), (ymin, ymax) = box
+    # Apart, the closest points are an end of the segment, or a
+    # corner of the box.
+    return min(box_distance(((a[0], a[0]), (a[1], a[1])), box),
+               box_distance(((b[0], b[0]), (b[1], b[1])), box),
+               *(_point_segment_distance(c, a, b)
+                 for c in ((xmin, ymin), (xmin, ymax), (xmax, ymin), (xmax, ymax))))
+
+
+class GridIndex:
+    """Spatial index of boxes, ((xmin, xmax), (ymin, ymax)), on a uniform grid.
+
+    Each value is registered in the square cells of side cell that its
+    box overlaps, so that queries only look at the values of the cells
+    they overlap. Cells should be about the size of the typical box.
+    """
+
+    def __init__(self, cell):
+        if cell <= 0:
+            raise ValueError(f"Grid cells must have a positive size, not {cell}")
+        self.cell = cell
+        self._cells = {}
+        self._boxes = []
+        self._values = []
+
+    @classmethod
+    def of(cls, items):
+        """Returns a GridIndex of the (box, value) items.
+
+        The cell size is the mean box size, so that each box is in
+        a handful of cells.
+        """
+        items = list(items)
+        sides = [max(xmax - xmin, ymax - ymin) for ((xmin, xmax), (ymin, ymax)), _ in items]
+        ret = cls(max(sum(sides) / len(sides), 0.01) if sides else 1)
+        for box, value in items:
+            ret.insert(box, value)
+        return ret
+
+    def __len__(self):
+        return len(self._values)
+
+    def _span(self, box):
+        (xmin, xmax), (ymin, ymax) = box
+        c = self.cell
+        return (range(math.floor(xmin / c), math.floor(xmax / c) + 1),
+                range(math.floor(ymin / c), math.floor(ymax / c) + 1))
+
+    def insert(self, box, value):
+        i = len(self._values)
+        self._boxes.append(box)
+        self._values.append(value)
+        xs, ys = self._span(box)
+        for x in xs:
+            for y in ys:
+                self._cells.setdefault((x, y), []).append(i)
+
+    def _candidates(self, box):
+        xs, ys = self._span(box)
+        seen = set()
+        if len(xs) * len(ys) > len(self._cells):
+            # Fewer occupied cells than cells under the box.
+            for (x, y), values in self._cells.items():
+                if x in xs and y in ys:
+                    seen.update(values)
+        else:
+            for x in xs:
+                for y in ys:
+                    seen.update(self._cells.get((x, y), ()))
+        return sorted(seen)
+
+    def query(self, box):
+        """Returns the values whose boxes overlap box, in insertion order."""
+        return [self._values[i] for i in self._candidates(box)
+                if box_distance(self._boxes[i], box) == 0]
+
+    def near(self, point, r):
+        """Returns the values whose boxes are within r of point, in insertion order."""
+        x, y = point
+        box = ((x - r, x + r), (y - r, y + r))
+        return [self._values[i] for i in self._candidates(box)
+                if box_distance(self._boxes[i], ((x, x), (y, y))) <= r]
+
+
+def _merge_segments(segments):
+    """Returns segments, with collinear segments that overlap or touch merged.
+
+    Segments are pairs of points in integer nanometres, the smaller
+    point first, so that the direction of each segment is normalized.
+    """
+    lines = {}
+    for a, b in segments:
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        g = math.gcd(dx, dy)
+        dx, dy = dx // g, dy // g
+        # Segments on the same line share a direction and an offset,
+        # and are ordered by their projection on the direction.
+        lines.setdefault((dx, dy, dy * a[0] - dx * a[1]), []).append(
+            (a[0] * dx + a[1] * dy, b[0] * dx + b[1] * dy, a, b))
+    ret = []
+    for runs in lines.values():
+        runs.sort()
+        _, s1, a, b = runs[0]
+        for t0, t1, c, d in runs[1:]:
+            if t0 <= s1:
+                if t1 > s1:
+                    s1, b = t1, d
+                continue
+            ret.append((a, b))
+            s1, a, b = t1, c, d
+        ret.append((a, b))
+    return sorted(ret)
+
+
+def _chain(segments):
+    """Returns the segments joined into as few polylines as it can."""
+    ends = {}
+    for i, (a, b) in enumerate(segments):
+        ends.setdefault(a, []).append(i)
+        ends.setdefault(b, []).append(i)
+    used = [False] * len(segments)
+
+    def walk(p):
+        ret = [p]
+        while True:
+            i = next((i for i in ends[p] if not used[i]), None)
+            if i is None:
+                return ret
+            used[i] = True
+            a, b = segments[i]
+            p = b if a == p else a
+            ret.append(p)
+
+    ret = []
+    # Open polylines start and end where lines do not simply go
+    # through, the rest are loops.
+    for p in sorted(ends):
+        if len(ends[p]) != 2:
+            while not all(used[i] for i in ends[p]):
+                ret.append(walk(p))
+    for i, (a, _) in enumerate(segments):
+        if not used[i]:
+            ret.append(walk(a))
+    return ret
+
+
+def _on_segment(p, a, b):
+    cross = (b[0] - a[0]) * (p[1] - a[1]) - (b[1] - a[1]) * (p[0] - a[0])
+    return (cross == 0 and min(a[0], b[0]) <= p[0] <= max(a[0], b[0])
+            and min(a[1], b[1]) <= p[1] <= max(a[1], b[1]))
+
+
+def _inside(p, polygon):
+    """Even-odd test of p against the closed polygon."""
+    x, y = p
+    ret = False
+    for (ax, ay), (bx, by) in zip(polygon, polygon[1:]):
+        if (ay > y) != (by > y) and x < ax + (y - ay) * (bx - ax) / (by - ay):
+            ret = not ret
+    return ret
+
+
+def _bbox(points):
+    xs, ys = [x for x, _ in points], [y for _, y in points]
+    return (min(xs), max(xs)), (min(ys), max(ys))
+
+
+def _interior_removed(polylines, segments):
+    """Returns segments, without the parts that are inside the union of regions.
+
+    Closed polylines are regions. So are open polylines whose ends
+    both lie on a closed polyline, closed by the segment between
+    their ends, such as the outline of a lead drawn against the
+    outline of a package body.
+    """
+    closed = [p for p in polylines if len(p) >= 4 and p[0] == p[-1]]
+    edges = [(a, b) for p in closed for a, b in zip(p, p[1:])]
+    regions = closed + [p + [p[0]] for p in polylines
+                        if len(p) >= 3 and p[0] != p[-1]
+                        and all(any(_on_segment(q, a, b) for a, b in edges) for q in (p[0], p[-1]))]
+    if not regions:
+        return segments
+    region_index = GridIndex.of((_bbox(r), r) for r in regions)
+    segment_index = GridIndex.of((_bbox(s), s) for s in segments)
+
+    def covered(p):
+        return any(_inside(p, r) for r in region_index.near(p, 0))
+
+    # Points this far to either side of a segment tell which regions
+    # it separates.
+    eps = 1000
+    ret = []
+    for a, b in segments:
+        rx, ry = b[0] - a[0], b[1] - a[1]
+        ts = {0, 1}
+        for c, d in segment_index.query(_bbox((a, b))):
+            sx, sy = d[0] - c[0], d[1] - c[1]
+            den = rx * sy - ry * sx
+            if den == 0:
+                continue
+            t = ((c[0] - a[0]) * sy - (c[1] - a[1]) * sx) / den
+            u = ((c[0] - a[0]) * ry - (c[1] - a[1]) * rx) / den
+            if 0 < t < 1 and 0 <= u <= 1:
+                ts.add(t)
+        n = math.hypot(rx, ry)
+        nx, ny = -ry / n * eps, rx / n * eps
+        points = [a if t == 0 else b if t == 1 else (round(a[0] + t * rx), round(a[1] + t * ry))
+                  for t in sorted(ts)]
+        for p, q in zip(points, points[1:]):
+            if p == q:
+                continue
+            m = ((p[0] + q[0]) / 2, (p[1] + q[1]) / 2)
+            if not (covered((m[0] + nx, m[1] + ny)) and covered((m[0] - nx, m[1] - ny))):
+                ret.append((p, q))
+    return ret
+
+
+def simplify_polylines(polylines, union=False):
+    """Returns polylines, redrawn with as few segments as possible.
+
+    Repeated and zero-length segments are dropped, collinear segments
+    that overlap or touch are merged, and the segments are joined back
+    into polylines where they meet end to end. The result draws the
+    same lines, with coordinates snapped to whole nanometres.
+
+    If union is True, lines that separate two regions drawn by the
+    polylines are dropped as well, so that only the outline of their
+    union is left. See _interior_removed for what makes a region.
+    """
+    polylines = [[(to_nm(x), to_nm(y)) for x, y in p] for p in polylines]
+    segments = {(min(a, b), max(a, b)) for p in polylines for a, b in zip(p, p[1:]) if a != b}
+    segments = _merge_segments(segments)
+    if union:
+        segments = _merge_segments(_interior_removed(polylines, segments))
+    return [[(from_nm(x), from_nm(y)) for x, y in p] for p in _chain(segments)]
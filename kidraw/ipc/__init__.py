@@ -6,6 +6,10 @@ desired.
 """
 import math
 from enum import Enum
+from itertools import accumulate, islice, repeat
+from operator import sub
+
+from kidraw import geometry
 
 PenWidth = 0.15
 AssemblyPenWidth = 0.075
@@ -76,7 +80,18 @@ def two_terminal_symmetric_device(A, B, L, T, W, spec, polarized):
                          width=AssemblyPenWidth),
         ]
 
-    if B.nominal > pad_width:
+    if spec.silkscreen_clearance is not None:
+        x, y = A.nominal / 2, B.nominal / 2
+        ret.features.append(Drawing.Line(layer=Drawing.Layer.Silkscreen,
+                                         points=[(-x, y), (x, y), (x, -y), (-x, -y), (-x, y)],
+                                         width=PenWidth))
+        if polarized:
+            ret.features.append(Drawing.Circle(
+                layer=Drawing.Layer.Silkscreen,
+                center=(-max(x, Z / 2 + spec.silkscreen_clearance) - 0.3, y),
+                radius=0.1))
+        ret.clip_silkscreen(spec.silkscreen_clearance)
+    elif B.nominal > pad_width:
         # Silkscreen wraps around the pad side
         x, y = A.nominal / 2, B.nominal / 2
         ret.features += [
@@ -127,75 +142,105 @@ def two_terminal_symmetric_device(A, B, L, T, W, spec, polarized):
     return ret
 
 
-def _pin_line(ret, spec, A, L, T, W, pitch, start_pin, num_pins, rotation):
-    Z, G = spec.OuterPadSpan(L, T), spec.InnerPadSpan(L, T)
-    pad_width = spec.PadWidth(W)
-    if pitch - pad_width < spec.pcb_tolerance:
-        raise InfeasibleFootprint(f"Pad width {pad_width} with pitch {pitch} risks overlap given PCB etching tolerance {spec.pcb_tolerance}")
-    pad_len = (Z - G) / 2
-    pad_x = (Z + G) / 4
-
-    pin_width = W.nominal
-    pin_len = T.nominal
-    pin_x = (L.nominal - T.nominal) / 2
-
-    hip_x = A.nominal / 2
-
-    y = (num_pins / 2 - 0.5) * pitch
-
-    def r(x, y, a):
-        a = math.radians(a)
-        return (x * math.cos(a) - y * math.sin(a),
-                x * math.sin(a) + y * math.cos(a))
-
-    def rd(w, h, a):
-        if a / 90 % 2 == 0:
-            return w, h
-        return h, w
-
-    for n in range(start_pin, start_pin + num_pins):
-        ret.features.append(
-            Drawing.Pad(number=n,
-                        center=r(-pad_x, y, rotation),
-                        size=rd(pad_len, pad_width, rotation),
-                        obround=(n != 1)))
-        if n == 1:
-            ret.features.append(Drawing.Circle(
-                layer=Drawing.Layer.Silkscreen,
-                center=(-pad_x - pad_len / 2 - 2 * PenWidth, y),
-                radius=0.1))
-        ret.features.append(
-            Drawing.Line(
+class _PinRow:
+    """A row of identical gullwing pins, and their land patterns.
+
+    The pad dimensions for each of specs, and the pin dimensions, are
+    computed once. draw() can then draw the row on several sides of a
+    package.
+    """
+
+    def __init__(self, specs, A, L, T, W, pitch):
+        self.pads = []
+        for spec in specs:
+            Z, G = spec.OuterPadSpan(L, T), spec.InnerPadSpan(L, T)
+            pad_width = spec.PadWidth(W)
+            if pitch - pad_width < spec.pcb_tolerance:
+                raise InfeasibleFootprint(f"Pad width {pad_width} with pitch {pitch} risks overlap given PCB etching tolerance {spec.pcb_tolerance}")
+            # Pad length, width and center X.
+            self.pads.append(((Z - G) / 2, pad_width, (Z + G) / 4))
+
+        self.pin_width = W.nominal
+        self.pin_len = T.nominal
+        self.pin_x = (L.nominal - T.nominal) / 2
+
+        self.hip_x = A.nominal / 2
+        self.pitch = pitch
+
+    def draw(self, rets, start_pin, num_pins, rotation):
+        """Draws num_pins pins into each of rets, rotated counterclockwise by a multiple of 90 degrees.
+
+        rets are the drawings for each spec. The pin outlines do not
+        depend on the spec, and the same Line objects are added to
+        all of them.
+
+        The row is laid out top to bottom on the left side of the
+        package, then all of its points are rotated in one batch.
+        """
+        pin_x, pin_len = self.pin_x, self.pin_len
+        w = self.pin_width / 2
+        hip = self.hip_x < pin_x - pin_len / 2
+        k = pin_x - pin_len / 2
+
+        # Repeated subtraction rather than multiplication, to keep
+        # historical output stable to the last bit.
+        ys = list(accumulate(repeat(self.pitch, max(num_pins - 1, 0)), sub,
+                             initial=(num_pins / 2 - 0.5) * self.pitch))[:num_pins]
+        xs_in, ys_in = [], []
+        for y in ys:
+            for _, _, pad_x in self.pads:
+                xs_in.append(-pad_x)
+                ys_in.append(y)
+            xs_in.extend((-pin_x + pin_len / 2, -pin_x - pin_len / 2, -pin_x - pin_len / 2, -pin_x + pin_len / 2, -pin_x + pin_len / 2))
+            ys_in.extend((y + w, y + w, y - w, y - w, y + w))
+            if hip:
+                xs_in.extend((-self.hip_x, -k, -k, -self.hip_x))
+                ys_in.extend((y + w, y + w, y - w, y - w))
+        points = iter(zip(*geometry.Affine.rotation(rotation).apply_columns(xs_in, ys_in)))
+
+        swap = rotation % 180 == 90
+        for n, y in zip(range(start_pin, start_pin + num_pins), ys):
+            # Rotations can leave -0.0 coordinates, which print with a sign.
+            pads = [(px + 0.0, py + 0.0) for px, py in islice(points, len(self.pads))]
+            outline = [Drawing.Line(
                 layer=Drawing.Layer.Assembly,
-                points=[
-                    r(-pin_x + pin_len / 2, y + pin_width / 2, rotation),
-                    r(-pin_x - pin_len / 2, y + pin_width / 2, rotation),
-                    r(-pin_x - pin_len / 2, y - pin_width / 2, rotation),
-                    r(-pin_x + pin_len / 2, y - pin_width / 2, rotation),
-                    r(-pin_x + pin_len / 2, y + pin_width / 2, rotation),
-                ],
-                width=AssemblyPenWidth))
-
-        if hip_x < pin_x - (pin_len / 2):
-            k = pin_x - pin_len / 2
-            ret.features.append(
-                Drawing.Line(
+                points=list(islice(points, 5)),
+                width=AssemblyPenWidth)]
+            if hip:
+                outline.append(Drawing.Line(
                     layer=Drawing.Layer.Assembly,
-                    points=[
-                        r(-hip_x, y + pin_width / 2, rotation),
-                        r(-k, y + pin_width / 2, rotation),
-                        r(-k, y - pin_width / 2, rotation),
-                        r(-hip_x, y - pin_width / 2, rotation),
-                    ],
+                    points=list(islice(points, 4)),
                     width=AssemblyPenWidth))
+            for ret, center, (pad_len, pad_width, pad_x) in zip(rets, pads, self.pads):
+                ret.features.append(
+                    Drawing.Pad(number=n,
+                                center=center,
+                                size=(pad_width, pad_len) if swap else (pad_len, pad_width),
+                                obround=(n != 1)))
+                if n == 1:
+                    ret.features.append(Drawing.Circle(
+                        layer=Drawing.Layer.Silkscreen,
+                        center=(-pad_x - pad_len / 2 - 2 * PenWidth, y),
+                        radius=0.1))
+                ret.features += outline
 
-        y -= pitch
+
+def _pin_line(ret, spec, A, L, T, W, pitch, start_pin, num_pins, rotation):
+    _PinRow([spec], A, L, T, W, pitch).draw([ret], start_pin, num_pins, rotation)
 
 
 def _ild_silkscreen(ret, spec, A, B, LA, LB, T, pitch, pins_leftright, pins_updown):
     x, y = A.nominal, B.nominal
     x2, y2 = None, None
 
+    if spec.silkscreen_clearance is not None:
+        ret.features.append(Drawing.Line(
+            layer=Drawing.Layer.Silkscreen,
+            points=[(-x / 2, y / 2), (x / 2, y / 2), (x / 2, -y / 2), (-x / 2, -y / 2), (-x / 2, y / 2)],
+            width=PenWidth))
+        ret.clip_silkscreen(spec.silkscreen_clearance)
+        return
+
     if (x >= spec.InnerPadSpan(LA, T) - PenWidth and
         x <= spec.OuterPadSpan(LA, T) + PenWidth):
         # Vertical silkscreen would overlap with the L/R pins, so pull
@@ -271,21 +316,31 @@ def in_line_pin_device(A, B, LA, LB, T, W, pitch, pins_leftright, pins_updown, s
     This is a generic footprint builder that will accept any
     LandPatternSize.
     """
-    ret = Drawing()
+    return in_line_pin_device_profiles(A, B, LA, LB, T, W, pitch, pins_leftright, pins_updown, [spec])[0]
 
-    _pin_line(ret=ret, spec=spec, A=A, L=LA, T=T, W=W, pitch=pitch,
-              start_pin=1, num_pins=pins_leftright, rotation=0)
-    _pin_line(ret=ret, spec=spec, A=B, L=LB, T=T, W=W, pitch=pitch,
-              start_pin=pins_leftright + 1,
-              num_pins=pins_updown, rotation=90)
-    _pin_line(ret=ret, spec=spec, A=A, L=LA, T=T, W=W, pitch=pitch,
-              start_pin=pins_leftright + pins_updown + 1,
-              num_pins=pins_leftright, rotation=180)
-    _pin_line(ret=ret, spec=spec, A=B, L=LB, T=T, W=W, pitch=pitch,
-              start_pin=2 * pins_leftright + pins_updown + 1,
-              num_pins=pins_updown, rotation=270)
 
-    ret.features += [
+def in_line_pin_device_profiles(A, B, LA, LB, T, W, pitch, pins_leftright, pins_updown, specs):
+    """Returns drawings for a dual/quad in-line symmetric device, one per spec.
+
+    This is equivalent to calling in_line_pin_device once for each of
+    specs, typically the Most, Nominal and Least profiles of the
+    device. The pin outlines, assembly and documentation layers do
+    not depend on the spec, so they are computed once, and their
+    feature objects are shared by all the drawings.
+    """
+    rets = [Drawing() for _ in specs]
+
+    leftright = _PinRow(specs, A, LA, T, W, pitch)
+    if (B, LB) == (A, LA):
+        updown = leftright
+    else:
+        updown = _PinRow(specs, B, LB, T, W, pitch)
+    leftright.draw(rets, 1, pins_leftright, 0)
+    updown.draw(rets, pins_leftright + 1, pins_updown, 90)
+    leftright.draw(rets, pins_leftright + pins_updown + 1, pins_leftright, 180)
+    updown.draw(rets, 2 * pins_leftright + pins_updown + 1, pins_updown, 270)
+
+    outline = [
         Drawing.Line(
             layer=Drawing.Layer.Assembly,
             points=[(A.nominal / 2, B.nominal / 2),
@@ -305,9 +360,11 @@ def in_line_pin_device(A, B, LA, LB, T, W, pitch, pins_leftright, pins_updown, s
             width=PenWidth),
     ]
 
-    _ild_silkscreen(ret, spec, A, B, LA, LB, T, pitch, pins_leftright, pins_updown)
-    _courtyard(ret, spec)
-    return ret
+    for ret, spec in zip(rets, specs):
+        ret.features += outline
+        _ild_silkscreen(ret, spec, A, B, LA, LB, T, pitch, pins_leftright, pins_updown)
+        _courtyard(ret, spec)
+    return rets
 
 
 def sot23_3(A, B, L, T, W, pitch, spec):
@@ -430,60 +487,258 @@ def sot23_5(A, B, L, T, W, pitch, spec):
 # as an exercise to the reader using LandPatternSize's math functions?
 
 
+def _extent(bbox, features):
+    """Returns bbox grown to include the features."""
+    (xmin, xmax), (ymin, ymax) = bbox
+    for f in features:
+        e = f.extent()
+        if e is None:
+            continue
+        (fxmin, fxmax), (fymin, fymax) = e
+        xmin, xmax = min(xmin, fxmin), max(xmax, fxmax)
+        ymin, ymax = min(ymin, fymin), max(ymax, fymax)
+    return (xmin, xmax), (ymin, ymax)
+
+
+class _Features(list):
+    """A list of drawing features that caches their bounding box.
+
+    The bounding box grows incrementally as features are added, and
+    is recomputed lazily after any other modification of the list.
+    """
+
+    def __init__(self, features=()):
+        super().__init__(features)
+        # Bounding box of the features, including the origin, or None
+        # if it must be recomputed.
+        self._extent = None
+
+    def _grow(self, features):
+        if self._extent is not None:
+            self._extent = _extent(self._extent, features)
+
+    def invalidate(self):
+        self._extent = None
+
+    def __reduce__(self):
+        # Pickle and copy the features alone, the default would extend
+        # the list before restoring _extent.
+        return _Features, (list(self),)
+
+    @property
+    def extent(self):
+        ret = self._extent
+        if ret is None:
+            ret = self._extent = _extent(((0, 0), (0, 0)), self)
+        return ret
+
+    def append(self, f):
+        super().append(f)
+        self._grow((f,))
+
+    def extend(self, features):
+        n = len(self)
+        super().extend(features)
+        self._grow(self[n:])
+
+    def __iadd__(self, features):
+        self.extend(features)
+        return self
+
+    def insert(self, i, f):
+        super().insert(i, f)
+        self._grow((f,))
+
+
+def _invalidating(name):
+    def method(self, *args, **kwargs):
+        self._extent = None
+        return getattr(list, name)(self, *args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+for _name in ("__setitem__", "__delitem__", "__imul__", "pop", "remove", "clear"):
+    setattr(_Features, _name, _invalidating(_name))
+del _name
+
+
+class _Primitive:
+    """Base class of the Drawing features, which are immutable.
+
+    Drawings share features and cache their bounding box, so features
+    are replaced rather than modified.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, k, v):
+        raise AttributeError(f"{type(self).__name__} is immutable, replace it instead")
+
+    def __delattr__(self, k):
+        raise AttributeError(f"{type(self).__name__} is immutable, replace it instead")
+
+    def __reduce__(self):
+        # The constructors take the slots, in order.
+        return type(self), tuple(getattr(self, k) for k in self.__slots__)
+
+
+_set = object.__setattr__
+
+
 class Drawing:
-    """Container for drawn footprint features."""
+    """Container for drawn footprint features.
+
+    The bounding box of the drawing is cached, and kept up to date as
+    features are added or removed. Features are immutable, so that
+    they cannot change behind the cache's back.
+    """
 
     def __init__(self):
         self.features = []
 
+    @property
+    def features(self):
+        return self._features
+
+    @features.setter
+    def features(self, features):
+        # "drawing.features += ..." assigns the list back to itself.
+        if not isinstance(features, _Features):
+            features = _Features(features)
+        self._features = features
+
+    def invalidate(self):
+        """Forgets the cached bounding box."""
+        self._features.invalidate()
+
     @property
     def length(self):
-        (xmin, xmax), _ = self.bounding_box
+        (xmin, xmax), _ = self._features.extent
         return xmax - xmin
 
     @property
     def width(self):
-        _, (ymin, ymax) = self.bounding_box
+        _, (ymin, ymax) = self._features.extent
         return ymax - ymin
 
     @property
     def bounding_box(self):
-        xmin, xmax = 0, 0
-        ymin, ymax = 0, 0
+        return self._features.extent
+
+    def scale(self, s):
+        """Scales the drawing in place, and returns it.
+
+        The features are replaced by scaled copies rather than
+        modified, so they can safely be shared with other drawings.
+        """
+        self.features = self.scaled(s).features
+        return self
+
+    def scaled(self, s):
+        """Returns a copy of the drawing, scaled by s."""
+        ret = Drawing()
+        ret.features = [f.scaled(s) for f in self._features]
+        return ret
+
+    def transformed(self, t):
+        """Returns a copy of the drawing, moved by the geometry.Affine t.
+
+        Pads are axis-aligned, so if the drawing has pads, t can only
+        rotate by multiples of 90 degrees.
+        """
+        if t.angle % 90 and any(isinstance(f, Drawing.Pad) for f in self.features):
+            raise ValueError("Pads can only be rotated by multiples of 90 degrees", t.angle)
+        swap = t.angle % 180 == 90
+        # Transform the coordinates of all features in a single batch.
+        points = []
         for f in self.features:
             if isinstance(f, Drawing.Line):
-                for p in f.points:
-                    xmin = min(xmin, p[0] - f.width / 2)
-                    xmax = max(xmax, p[0] + f.width / 2)
-                    ymin = min(ymin, p[1] - f.width / 2)
-                    ymax = max(ymax, p[1] + f.width / 2)
-            elif isinstance(f, Drawing.Circle):
-                xmin = min(xmin, f.center[0] - f.radius)
-                xmax = max(xmax, f.center[0] + f.radius)
-                ymin = min(ymin, f.center[1] - f.radius)
-                ymax = max(ymax, f.center[1] + f.radius)
-            elif isinstance(f, Drawing.Pad):
-                xmin = min(xmin, f.center[0] - f.size[0] / 2)
-                xmax = max(xmax, f.center[0] + f.size[0] / 2)
-                ymin = min(ymin, f.center[1] - f.size[1] / 2)
-                ymax = max(ymax, f.center[1] + f.size[1] / 2)
+                points.extend(f.points)
             else:
-                raise RuntimeError("Unexpected drawing feature type")
-        return (xmin, xmax), (ymin, ymax)
-
-    def scale(self, s):
+                points.append(f.center)
+        points = iter(t.apply_all(points))
+        ret = Drawing()
         for f in self.features:
             if isinstance(f, Drawing.Line):
-                f.points = [(x * s, y * s) for x, y in f.points]
-                f.width *= s
+                ret.features.append(Drawing.Line(
+                    f.layer, list(islice(points, len(f.points))), f.width))
             elif isinstance(f, Drawing.Circle):
-                f.center = (f.center[0] * s, f.center[1] * s)
-                f.radius *= s
+                ret.features.append(Drawing.Circle(f.layer, next(points), f.radius))
             elif isinstance(f, Drawing.Pad):
-                f.center = (f.center[0] * s, f.center[1] * s)
-                f.size = (f.size[0] * s, f.size[1] * s)
+                size = (f.size[1], f.size[0]) if swap else f.size
+                ret.features.append(Drawing.Pad(f.number, next(points), size, f.obround, f.mask_margin, f.drill))
+            else:
+                raise RuntimeError("Unknown drawing feature type")
+        return ret
+
+    def clip_silkscreen(self, clearance=0.2):
+        """Cuts silkscreen off the pads, in place, and returns the drawing.
+
+        Silkscreen lines are cut where they come closer than clearance
+        to the solder mask opening of a pad. Pads keep out their
+        bounding box. Pieces of lines shorter than their width are
+        dropped. Circles, such as pin 1 marks, are left alone.
+        """
+        keep_outs = geometry.GridIndex.of(
+            (box, box) for box in (geometry.inflate_box(f.extent(), (f.mask_margin or 0) + clearance)
+                                   for f in self.features if isinstance(f, Drawing.Pad)))
+        if not len(keep_outs):
+            return self
+        features = []
+        for f in self.features:
+            if isinstance(f, Drawing.Line) and f.layer == Drawing.Layer.Silkscreen:
+                features += [Drawing.Line(f.layer, points, f.width)
+                             for points in _clip_polyline(f.points, keep_outs, f.width / 2)]
+            else:
+                features.append(f)
+        self.features = features
         return self
 
+    def optimize(self, union=False):
+        """Redraws the lines of the drawing with fewer features, in place.
+
+        Lines of the same layer and width are simplified together by
+        geometry.simplify_polylines: duplicate and zero-length lines
+        are dropped, and collinear and touching ones are merged. With
+        union, the outlines of pins, body and leads are also unioned
+        into one. Circles and pads are kept as they are.
+
+        Returns the number of features removed.
+        """
+        groups, order = {}, []
+        for f in self.features:
+            if isinstance(f, Drawing.Line):
+                k = (f.layer, f.width)
+                if k not in groups:
+                    groups[k] = []
+                    order.append(k)
+                groups[k].append(f.points)
+            else:
+                order.append(f)
+        features = []
+        for f in order:
+            if isinstance(f, tuple):
+                layer, width = f
+                features += [Drawing.Line(layer, points, width)
+                             for points in geometry.simplify_polylines(groups[f], union)]
+            else:
+                features.append(f)
+        removed = len(self.features) - len(features)
+        self.features = features
+        return removed
+
+    def translated(self, dx, dy):
+        return self.transformed(geometry.Affine.translation(dx, dy))
+
+    def rotated(self, degrees):
+        """Returns a copy of the drawing, rotated counterclockwise."""
+        return self.transformed(geometry.Affine.rotation(degrees))
+
+    def mirrored(self):
+        """Returns a copy of the drawing, mirrored left to right."""
+        return self.transformed(geometry.Affine.mirror_x())
+
     def svg(self, background_color="black", copper_color="red", silkscreen_color="white", assembly_color="yellow", documentation_color="blue", courtyard_color="magenta"):
         """Output an IPC footprint drawing as an SVG file.
         
@@ -503,25 +758,7 @@ class Drawing:
             Drawing.Layer.Documentation: documentation_color,
             Drawing.Layer.Courtyard: courtyard_color,
         }
-        for f in self.features:
-            if isinstance(f, Drawing.Line):
-                pts = [f"{x},{-y}" for x, y in f.points]
-                opacity = 1 if f.layer == Drawing.Layer.Silkscreen else 0.6
-                out.append(
-                    '<polyline points="{0}" stroke="{1}" stroke-width="{2}" opacity="{3}" fill="none" stroke-linecap="round" />'.format(
-                        " ".join(pts), colormap[f.layer], f.width, opacity))
-            elif isinstance(f, Drawing.Circle):
-                out.append(
-                    f'<circle cx="{f.center[0]}" cy="{-f.center[1]}" r="{f.radius}" fill="{colormap[f.layer]}" opacity="0.8" />')
-            elif isinstance(f, Drawing.Pad):
-                out.append(
-                    '<rect x="{0}" y="{1}" width="{2}" height="{3}" rx="{4}" ry="{4}" fill="{5}" opacity="0.8" />'.format(
-                        f.center[0] - f.size[0] / 2, -(f.center[1] + f.size[1] / 2),
-                        f.size[0], f.size[1],
-                        min(f.size[0], f.size[1]) / 2 if f.obround else 0,
-                        copper_color))
-            else:
-                raise RuntimeError("Unknown drawing feature type")
+        out.extend(f.to_svg(colormap, copper_color) for f in self.features)
         out += [
             "</g>",
             "</svg>",
@@ -529,37 +766,121 @@ class Drawing:
         return "\n".join(out)
 
     Layer = Enum(
-        "Layer", ["Silkscreen", "Courtyard", "Assembly", "Documentation"])
+        "Layer", ["Silkscreen", "Courtyard", "Assembly", "Documentation"],
+        qualname="Drawing.Layer")
+
+    class Line(_Primitive):
+        __slots__ = ("layer", "points", "width")
 
-    class Line:
         def __init__(self, layer, points, width):
-            self.layer = layer
-            self.points = points
-            self.width = width
+            _set(self, "layer", layer)
+            # Lists would let points be changed in place.
+            _set(self, "points", tuple(points) if isinstance(points, list) else points)
+            _set(self, "width", width)
+
+        def extent(self):
+            """Returns the bounding box of the line, ((xmin, xmax), (ymin, ymax)).
+
+            Lines without points have no bounding box, and return None.
+            """
+            if not self.points:
+                return None
+            xs = [x for x, _ in self.points]
+            ys = [y for _, y in self.points]
+            w = self.width / 2
+            return (min(xs) - w, max(xs) + w), (min(ys) - w, max(ys) + w)
+
+        def scaled(self, s):
+            return Drawing.Line(self.layer, [(x * s, y * s) for x, y in self.points], self.width * s)
+
+        def to_svg(self, colormap, copper_color):
+            pts = [f"{x},{-y}" for x, y in self.points]
+            opacity = 1 if self.layer == Drawing.Layer.Silkscreen else 0.6
+            return '<polyline points="{0}" stroke="{1}" stroke-width="{2}" opacity="{3}" fill="none" stroke-linecap="round" />'.format(
+                " ".join(pts), colormap[self.layer], self.width, opacity)
+
+    class Circle(_Primitive):
+        __slots__ = ("layer", "center", "radius")
 
-    class Circle:
         def __init__(self, layer, center, radius):
-            self.layer = layer
-            self.center = center
-            self.radius = radius
-
-    class Pad:
-        def __init__(self, number, center, size, obround=False):
-            self.number = number
-            self.center = center
-            self.size = size
-            # Drawing suggestion: obround shape preferred if True,
-            # else square.
-            self.obround = obround
+            _set(self, "layer", layer)
+            _set(self, "center", center)
+            _set(self, "radius", radius)
+
+        def extent(self):
+            (x, y), r = self.center, self.radius
+            return (x - r, x + r), (y - r, y + r)
+
+        def scaled(self, s):
+            return Drawing.Circle(self.layer, (self.center[0] * s, self.center[1] * s), self.radius * s)
+
+        def to_svg(self, colormap, copper_color):
+            return f'<circle cx="{self.center[0]}" cy="{-self.center[1]}" r="{self.radius}" fill="{colormap[self.layer]}" opacity="0.8" />'
+
+    class Pad(_Primitive):
+        # Drawing suggestion: obround shape preferred if obround is
+        # True, else square. mask_margin is the clearance between the
+        # pad and its solder mask opening, negative for solder mask
+        # defined pads. drill is the hole diameter of plated through
+        # hole pads, None for surface mount ones.
+        __slots__ = ("number", "center", "size", "obround", "mask_margin", "drill")
+
+        def __init__(self, number, center, size, obround=False, mask_margin=0, drill=None):
+            _set(self, "number", number)
+            _set(self, "center", center)
+            _set(self, "size", size)
+            _set(self, "obround", obround)
+            _set(self, "mask_margin", mask_margin)
+            _set(self, "drill", drill)
+
+        def extent(self):
+            (x, y), (w, h) = self.center, self.size
+            return (x - w / 2, x + w / 2), (y - h / 2, y + h / 2)
+
+        def scaled(self, s):
+            return Drawing.Pad(self.number, (self.center[0] * s, self.center[1] * s),
+                               (self.size[0] * s, self.size[1] * s), self.obround,
+                               self.mask_margin * s, self.drill and self.drill * s)
+
+        def to_svg(self, colormap, copper_color):
+            return '<rect x="{0}" y="{1}" width="{2}" height="{3}" rx="{4}" ry="{4}" fill="{5}" opacity="0.8" />'.format(
+                self.center[0] - self.size[0] / 2, -(self.center[1] + self.size[1] / 2),
+                self.size[0], self.size[1],
+                min(self.size[0], self.size[1]) / 2 if self.obround else 0,
+                copper_color)
 
 
 class Dimension:
-    """Records a dimension with tolerances."""
+    """Records a dimension with tolerances.
+
+    The min and max values are stored as integer nanometres, so that
+    arithmetic on them is exact, and Dimensions compare and hash by
+    value.
+    """
 
     def __init__(self, min, max):
         """Construct a Dimension given min and max values."""
         assert min <= max
-        self.min, self.max = min, max
+        self.min_nm, self.max_nm = geometry.to_nm(min), geometry.to_nm(max)
+
+    def __eq__(self, other):
+        if not isinstance(other, Dimension):
+            return NotImplemented
+        return (self.min_nm, self.max_nm) == (other.min_nm, other.max_nm)
+
+    def __hash__(self):
+        return hash((self.min_nm, self.max_nm))
+
+    def __repr__(self):
+        return f"Dimension({self.min}, {self.max})"
+
+    @property
+    def min(self):
+        return geometry.from_nm(self.min_nm)
+
+    @property
+    def max(self):
+        return geometry.from_nm(self.max_nm)
 
     @classmethod
     def from_nominal(cls, nominal, plus, minus=None):
@@ -571,12 +892,34 @@ class Dimension:
     @property
     def tolerance(self):
         """The tolerance is the min-max delta of the Dimension."""
-        return self.max - self.min
+        return geometry.from_nm(self.max_nm - self.min_nm)
 
     @property
     def nominal(self):
         """The nominal value of the Dimension, assuming equal plus and minus tolerance."""
-        return self.min + (self.tolerance / 2)
+        return geometry.from_nm((self.min_nm + self.max_nm) / 2)
+
+
+# Gull wing and chip goals, indexed by profile. ipc.batch computes
+# the same specs from these tables.
+_GULLWING_TOE = (0.55, 0.35, 0.15)
+_GULLWING_HEEL = (0.45, 0.35, 0.25)
+# When the leads reach under the body.
+_GULLWING_SHORT_HEEL = (0.25, 0.15, 0.05)
+_GULLWING_SIDE = (0.05, 0.03, 0.01)
+_GULLWING_FINE_PITCH = 0.625
+_GULLWING_FINE_PITCH_SIDE = (0.01, -0.02, -0.04)
+_GULLWING_COURTYARD = (0.5, 0.25, 0.1)
+
+_CHIP_TOE = (0.55, 0.35, 0.15)
+_CHIP_SIDE = (0.05, 0, -0.05)
+_CHIP_COURTYARD = (0.5, 0.25, 0.1)
+_CHIP_ROUNDING = 0.5
+# Chips shorter than this have their own toe, courtyard and rounding.
+_SMALL_CHIP = 1.6
+_SMALL_CHIP_TOE = (0.3, 0.2, 0.1)
+_SMALL_CHIP_COURTYARD = (0.2, 0.15, 0.1)
+_SMALL_CHIP_ROUNDING = 0.2
 
 
 class LandPatternSize:
@@ -608,15 +951,30 @@ class LandPatternSize:
         # Place tolerance is how (im)precisely the pick-and-place
         # machine can place components at the design position.
         self.place_tolerance = 0.05
+        # If set, builders draw whole silkscreen outlines, and clip
+        # them this far from the pads instead of pulling them back by
+        # hand. See Drawing.clip_silkscreen.
+        self.silkscreen_clearance = None
 
     def __eq__(self, other):
+        if not isinstance(other, LandPatternSize):
+            return NotImplemented
         return self.__dict__ == other.__dict__
 
+    # Specs are tweaked after construction, so they do not hash.
+    __hash__ = None
+
+    def _round_down_nm(self, x):
+        # Rounding is done on integer nanometres, where it is exact.
+        x, inc = geometry.to_nm(x), geometry.to_nm(self.rounding_increment)
+        return x - x % inc
+
     def _round_down(self, x):
-        return round(x - (x % self.rounding_increment), 2)
+        return geometry.from_nm(self._round_down_nm(x))
 
     def _round_up(self, x):
-        return self._round_down(x) + self.rounding_increment
+        inc = geometry.to_nm(self.rounding_increment)
+        return geometry.from_nm(self._round_down_nm(x) + inc)
 
     def OuterPadSpan(self, L, T):
         """Returns the outer pad span.
@@ -649,16 +1007,23 @@ class LandPatternSize:
 
         This dimension is called G_min in the standard.
         """
-        # Calculate S, the inner pin-to-pin dimension.
-        rms = _rms(L.tolerance, T.tolerance)
-        S = Dimension(L.min - 2 * T.max + rms / 2,
-                      L.max - 2 * T.min - rms / 2)
-        # and use it to calculate G(min).
-        Gmin = self._round_down(S.max - 2 * self.heel - _rms(S.tolerance, self.pcb_tolerance, self.place_tolerance))
+        Gmin = self._inner_pad_span(L, T)
         if Gmin <= 0:
             raise InfeasibleFootprint(f"Inner pad span is {Gmin}, pads will short together")
         return Gmin
 
+    def _inner_pad_span(self, L, T):
+        # Calculate S, the inner pin-to-pin dimension.
+        # S is computed in nm rather than as a Dimension: without T
+        # tolerance, its min and max are equal and float noise can
+        # put min above max.
+        rms = _rms(L.tolerance, T.tolerance)
+        Smin_nm = geometry.to_nm(L.min - 2 * T.max + rms / 2)
+        Smax_nm = geometry.to_nm(L.max - 2 * T.min - rms / 2)
+        Smax, Stolerance = geometry.from_nm(Smax_nm), geometry.from_nm(Smax_nm - Smin_nm)
+        # and use it to calculate G(min).
+        return self._round_down(Smax - 2 * self.heel - _rms(Stolerance, self.pcb_tolerance, self.place_tolerance))
+
     def PadWidth(self, W):
         """Returns the pad width given component pin width.
 
@@ -677,16 +1042,14 @@ class LandPatternSize:
         This profile notably covers ICs in the SOIC, SOP, SOT, SOD and
         QFP families.
         """
-        toe = [0.55, 0.35, 0.15]
-        heel = [0.45, 0.35, 0.25]
-        side = [0.05, 0.03, 0.01]
-        courtyard = [0.5, 0.25, 0.1]
+        heel = _GULLWING_HEEL
+        side = _GULLWING_SIDE
         Smin = L.min - 2 * T.max
         if Smin <= A.max:
-            heel = [0.25, 0.15, 0.05]
-        if pitch is not None and pitch <= 0.625:
-            side = [0.01, -0.02, -0.04]
-        return cls(toe[profile], heel[profile], side[profile], courtyard[profile])
+            heel = _GULLWING_SHORT_HEEL
+        if pitch is not None and pitch <= _GULLWING_FINE_PITCH:
+            side = _GULLWING_FINE_PITCH_SIDE
+        return cls(_GULLWING_TOE[profile], heel[profile], side[profile], _GULLWING_COURTYARD[profile])
 
     @classmethod
     def J_leads(cls, profile):
@@ -728,17 +1091,16 @@ class LandPatternSize:
         after their physical dimensions: 0603, 2012 (0805 imperial),
         and so forth.
         """
-        toe = [0.55, 0.35, 0.15]
-        side = [0.05, 0, -0.05]
-        courtyard = [0.5, 0.25, 0.1]
-        rounding_increment = 0.5
-        if L.max < 1.6:
-            toe = [0.3, 0.2, 0.1]
-            courtyard = [0.2, 0.15, 0.1]
+        toe = _CHIP_TOE
+        courtyard = _CHIP_COURTYARD
+        rounding_increment = _CHIP_ROUNDING
+        if L.max < _SMALL_CHIP:
+            toe = _SMALL_CHIP_TOE
+            courtyard = _SMALL_CHIP_COURTYARD
             # Small chip components is the only place where rounding
             # is specified to an increment other than 0.5.
-            rounding_increment = 0.2
-        return cls(toe[profile], 0, side[profile], courtyard[profile], rounding_increment)
+            rounding_increment = _SMALL_CHIP_ROUNDING
+        return cls(toe[profile], 0, _CHIP_SIDE[profile], courtyard[profile], rounding_increment)
 
     @classmethod
     def chip_array(cls, profile):
@@ -839,6 +1201,16 @@ class LandPatternSize:
                    [0.2, 0.15, 0.1][profile])
     SOTFL = SODFL
 
+    @classmethod
+    def BGA(cls, profile):
+        """Ball grid arrays.
+
+        BGA lands are sized from the ball diameter rather than by
+        fillets, see kidraw.ipc.bga. Only the courtyard excess
+        depends on the profile.
+        """
+        return cls(0, 0, 0, [2.0, 1.0, 0.5][profile])
+
     # Finally, constructor aliases for the generic classes, so that
     # you don't need to go figure out whether a SOIC is a J-lead,
     # Gullwing, flag, leadless, or whatever package.
@@ -881,6 +1253,47 @@ def _rms(*args):
     return math.sqrt(sum(x**2 for x in args))
 
 
+def _clip_polyline(points, keep_outs, d):
+    """Returns the polylines left of points outside of keep_outs.
+
+    keep_outs is a geometry.GridIndex of boxes, which are grown by d
+    before clipping.
+    """
+    ret, run = [], []
+
+    def flush():
+        if len(run) >= 2 and sum(math.dist(a, b) for a, b in zip(run, run[1:])) >= 2 * d:
+            ret.append(list(run))
+        run.clear()
+
+    for a, b in zip(points, points[1:]):
+        def at(t):
+            if t in (0, 1):
+                return (a, b)[t]
+            return (a[0] + t * (b[0] - a[0]), a[1] + t * (b[1] - a[1]))
+
+        box = ((min(a[0], b[0]), max(a[0], b[0])), (min(a[1], b[1]), max(a[1], b[1])))
+        cuts = []
+        for k in keep_outs.query(geometry.inflate_box(box, d)):
+            c = geometry.clip_segment(a, b, geometry.inflate_box(k, d))
+            if c is not None and c[1] - c[0] > geometry.Epsilon:
+                cuts.append(c)
+        # Keep the parts of the segment between the cuts.
+        t = 0
+        for t0, t1 in sorted(cuts) + [(1, 1)]:
+            if t0 > t:
+                if t > 0:
+                    flush()
+                if not run:
+                    run.append(at(t))
+                run.append(at(t0))
+            t = max(t, t1)
+        if any(t1 >= 1 for _, t1 in cuts):
+            flush()
+    flush()
+    return ret
+
+
 def _courtyard(drawing, spec):
     (xmin, xmax), (ymin, ymax) = drawing.bounding_box
     xmin -= spec.courtyard
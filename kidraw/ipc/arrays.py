@@ -0,0 +1,338 @@
+"""Array-backed storage for ipc.Drawing.
+
+A Drawing holds one object per feature, which is convenient to build
+but slow to move around in bulk. DrawingArrays holds the same
+features as columns of coordinates: polyline vertices and circles
+grouped per layer, and pads. Scaling, transforming and concatenating
+drawings are then a handful of operations on whole columns.
+
+NumPy is used if it is installed, with the fast extra of kidraw.
+Otherwise columns are array("d") and operations fall back to plain
+Python loops. Either way, the results are the same.
+
+>>> panel = DrawingArrays.concatenate(drawings, offsets)
+>>> panel.scaled(30).svg()
+"""
+import math
+from array import array
+
+from kidraw import geometry
+from kidraw.ipc import Drawing
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _column(values=()):
+    if numpy is not None:
+        return numpy.array(values, dtype=float)
+    return array("d", values)
+
+
+def _concat(columns):
+    if numpy is not None:
+        return numpy.concatenate([numpy.asarray(c, dtype=float) for c in columns])
+    ret = array("d")
+    for c in columns:
+        ret.extend(c)
+    return ret
+
+
+def _scale(column, s):
+    if numpy is not None:
+        return column * s
+    return array("d", [v * s for v in column])
+
+
+def _offset(column, d):
+    if not d:
+        return column
+    if numpy is not None:
+        return column + d
+    return array("d", [v + d for v in column])
+
+
+def _transform(t, xs, ys):
+    if numpy is not None:
+        return t.a * xs + t.b * ys + t.c, t.d * xs + t.e * ys + t.f
+    return t.apply_columns(xs, ys)
+
+
+def _values(column):
+    if numpy is not None:
+        return column.tolist()
+    return list(column)
+
+
+class _Group:
+    """Columns for one kind of feature.
+
+    _points names the X and Y columns that transforms move, _sizes the
+    columns that scaling multiplies, and _other the columns that are
+    carried along as-is. Columns are never modified in place, so
+    groups share them freely.
+    """
+
+    _points = ("x", "y")
+    _sizes = ()
+    _other = ()
+
+    def __init__(self, **columns):
+        for k in self._points + self._sizes:
+            setattr(self, k, columns.get(k, _column()))
+        for k in self._other:
+            setattr(self, k, columns.get(k, []))
+
+    def __len__(self):
+        return len(self.x)
+
+    def _replace(self, **columns):
+        kwargs = {k: getattr(self, k) for k in self._points + self._sizes + self._other}
+        kwargs.update(columns)
+        return type(self)(**kwargs)
+
+    def transformed(self, t):
+        x, y = _transform(t, self.x, self.y)
+        return self._replace(x=x, y=y)
+
+    def scaled(self, s):
+        return self._replace(**{k: _scale(getattr(self, k), s)
+                                for k in self._points + self._sizes})
+
+    @classmethod
+    def concatenate(cls, groups, offsets):
+        columns = {
+            "x": _concat(_offset(g.x, dx) for g, (dx, _) in zip(groups, offsets)),
+            "y": _concat(_offset(g.y, dy) for g, (_, dy) in zip(groups, offsets)),
+        }
+        for k in cls._sizes:
+            columns[k] = _concat(getattr(g, k) for g in groups)
+        for k in cls._other:
+            columns[k] = [v for g in groups for v in getattr(g, k)]
+        return cls(**columns)
+
+
+class _Lines(_Group):
+    # x and y hold the vertices of all polylines end to end, n the
+    # number of vertices of each polyline.
+    _sizes = ("width",)
+    _other = ("n",)
+
+    def extent(self):
+        if numpy is not None:
+            w = numpy.repeat(self.width, self.n) / 2
+            return ((float((self.x - w).min()), float((self.x + w).max())),
+                    (float((self.y - w).min()), float((self.y + w).max())))
+        xmin = ymin = math.inf
+        xmax = ymax = -math.inf
+        i = 0
+        for n, w in zip(self.n, self.width):
+            if not n:
+                continue
+            xs, ys = self.x[i:i + n], self.y[i:i + n]
+            xmin, xmax = min(xmin, min(xs) - w / 2), max(xmax, max(xs) + w / 2)
+            ymin, ymax = min(ymin, min(ys) - w / 2), max(ymax, max(ys) + w / 2)
+            i += n
+        return (xmin, xmax), (ymin, ymax)
+
+    def features(self, layer):
+        xs, ys = _values(self.x), _values(self.y)
+        i = 0
+        for n, w in zip(self.n, _values(self.width)):
+            yield Drawing.Line(layer, list(zip(xs[i:i + n], ys[i:i + n])), w)
+            i += n
+
+
+class _Circles(_Group):
+    _sizes = ("r",)
+
+    def extent(self):
+        return self._span(self.x), self._span(self.y)
+
+    def _span(self, column):
+        if numpy is not None:
+            return float((column - self.r).min()), float((column + self.r).max())
+        return (min(v - r for v, r in zip(column, self.r)),
+                max(v + r for v, r in zip(column, self.r)))
+
+    def features(self, layer):
+        for x, y, r in zip(_values(self.x), _values(self.y), _values(self.r)):
+            yield Drawing.Circle(layer, (x, y), r)
+
+
+class _Pads(_Group):
+    # drill is 0 for surface mount pads.
+    _sizes = ("w", "h", "mask_margin", "drill")
+    _other = ("number", "obround")
+
+    def transformed(self, t):
+        ret = super().transformed(t)
+        if t.angle % 180 == 90:
+            ret.w, ret.h = ret.h, ret.w
+        return ret
+
+    def extent(self):
+        if numpy is not None:
+            return ((float((self.x - self.w / 2).min()), float((self.x + self.w / 2).max())),
+                    (float((self.y - self.h / 2).min()), float((self.y + self.h / 2).max())))
+        return ((min(x - w / 2 for x, w in zip(self.x, self.w)),
+                 max(x + w / 2 for x, w in zip(self.x, self.w))),
+                (min(y - h / 2 for y, h in zip(self.y, self.h)),
+                 max(y + h / 2 for y, h in zip(self.y, self.h))))
+
+    def features(self):
+        for number, x, y, w, h, obround, mask_margin, drill in zip(
+                self.number, _values(self.x), _values(self.y),
+                _values(self.w), _values(self.h), self.obround,
+                _values(self.mask_margin), _values(self.drill)):
+            yield Drawing.Pad(number, (x, y), (w, h), obround, mask_margin, drill or None)
+
+
+class DrawingArrays:
+    """Columnar equivalent of an ipc.Drawing.
+
+    lines and circles map each Drawing.Layer to the columns of its
+    features, pads holds the columns of all pads. All operations
+    return a new DrawingArrays, and leave this one untouched.
+    """
+
+    def __init__(self, lines=None, circles=None, pads=None):
+        self.lines = lines or {}
+        self.circles = circles or {}
+        self.pads = pads or _Pads()
+
+    @classmethod
+    def from_drawing(cls, drawing):
+        lines, circles, pads = {}, {}, []
+        for f in drawing.features:
+            if isinstance(f, Drawing.Line):
+                lines.setdefault(f.layer, []).append(f)
+            elif isinstance(f, Drawing.Circle):
+                circles.setdefault(f.layer, []).append(f)
+            elif isinstance(f, Drawing.Pad):
+                pads.append(f)
+            else:
+                raise RuntimeError("Unknown drawing feature type")
+        ret = cls()
+        for layer, fs in lines.items():
+            ret.lines[layer] = _Lines(
+                x=_column([x for f in fs for x, _ in f.points]),
+                y=_column([y for f in fs for _, y in f.points]),
+                width=_column([f.width for f in fs]),
+                n=[len(f.points) for f in fs])
+        for layer, fs in circles.items():
+            ret.circles[layer] = _Circles(
+                x=_column([f.center[0] for f in fs]),
+                y=_column([f.center[1] for f in fs]),
+                r=_column([f.radius for f in fs]))
+        ret.pads = _Pads(
+            x=_column([f.center[0] for f in pads]),
+            y=_column([f.center[1] for f in pads]),
+            w=_column([f.size[0] for f in pads]),
+            h=_column([f.size[1] for f in pads]),
+            mask_margin=_column([f.mask_margin for f in pads]),
+            drill=_column([f.drill or 0 for f in pads]),
+            number=[f.number for f in pads],
+            obround=[f.obround for f in pads])
+        return ret
+
+    def to_drawing(self):
+        """Returns the features as an ipc.Drawing.
+
+        Features come out grouped by kind and layer, rather than in
+        the order they were originally drawn in.
+        """
+        ret = Drawing()
+        ret.features.extend(self.pads.features())
+        for layer, g in self.lines.items():
+            ret.features.extend(g.features(layer))
+        for layer, g in self.circles.items():
+            ret.features.extend(g.features(layer))
+        return ret
+
+    def _groups(self):
+        yield from self.lines.values()
+        yield from self.circles.values()
+        yield self.pads
+
+    @property
+    def bounding_box(self):
+        """Bounding box of the features, including the origin, as with Drawing."""
+        (xmin, xmax), (ymin, ymax) = (0, 0), (0, 0)
+        for g in self._groups():
+            if len(g):
+                (gxmin, gxmax), (gymin, gymax) = g.extent()
+                xmin, xmax = min(xmin, gxmin), max(xmax, gxmax)
+                ymin, ymax = min(ymin, gymin), max(ymax, gymax)
+        return (xmin, xmax), (ymin, ymax)
+
+    @property
+    def length(self):
+        (xmin, xmax), _ = self.bounding_box
+        return xmax - xmin
+
+    @property
+    def width(self):
+        _, (ymin, ymax) = self.bounding_box
+        return ymax - ymin
+
+    def transformed(self, t):
+        """Returns a copy moved by the geometry.Affine t, see Drawing.transformed."""
+        if t.angle % 90 and len(self.pads):
+            raise ValueError("Pads can only be rotated by multiples of 90 degrees", t.angle)
+        return DrawingArrays(
+            {k: g.transformed(t) for k, g in self.lines.items()},
+            {k: g.transformed(t) for k, g in self.circles.items()},
+            self.pads.transformed(t))
+
+    def translated(self, dx, dy):
+        return self.transformed(geometry.Affine.translation(dx, dy))
+
+    def rotated(self, degrees):
+        """Returns a copy rotated counterclockwise."""
+        return self.transformed(geometry.Affine.rotation(degrees))
+
+    def mirrored(self):
+        """Returns a copy mirrored left to right."""
+        return self.transformed(geometry.Affine.mirror_x())
+
+    def scaled(self, s):
+        """Returns a copy scaled by s, see Drawing.scaled."""
+        return DrawingArrays(
+            {k: g.scaled(s) for k, g in self.lines.items()},
+            {k: g.scaled(s) for k, g in self.circles.items()},
+            self.pads.scaled(s))
+
+    @classmethod
+    def concatenate(cls, drawings, offsets=None):
+        """Returns the union of drawings, each moved by its (dx, dy) offset.
+
+        drawings may be Drawings or DrawingArrays.
+        """
+        drawings = [d if isinstance(d, DrawingArrays) else cls.from_drawing(d)
+                    for d in drawings]
+        if offsets is None:
+            offsets = [(0, 0)] * len(drawings)
+        offsets = list(offsets)
+        if len(offsets) != len(drawings):
+            raise ValueError("Need one offset per drawing")
+
+        def merge(group, attr):
+            ret = {}
+            for d, off in zip(drawings, offsets):
+                for layer, g in getattr(d, attr).items():
+                    ret.setdefault(layer, ([], []))
+                    ret[layer][0].append(g)
+                    ret[layer][1].append(off)
+            return {layer: group.concatenate(gs, offs) for layer, (gs, offs) in ret.items()}
+
+        return cls(
+            merge(_Lines, "lines"),
+            merge(_Circles, "circles"),
+            _Pads.concatenate([d.pads for d in drawings], offsets))
+
+    def svg(self, **kwargs):
+        """Returns the drawing as an SVG file, see Drawing.svg."""
+        return self.to_drawing().svg(**kwargs)
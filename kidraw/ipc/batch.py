@@ -0,0 +1,271 @@
+"""IPC-7351B land pattern math for many parts at once.
+
+LandPatternSize computes the pads of one part at a time. The types in
+this module run the same computations over whole columns of parts,
+for example to compare profiles across a part catalog:
+
+>>> A = DimensionArray(Amin, Amax)
+>>> L, T, W = ...
+>>> spec = LandPatternSizeArray.gullwing_leads(Nominal, A, L, T, pitch)
+>>> Z, G, X, ok = pad_dimensions(spec, L, T, W, pitch)
+
+Results are identical to those of LandPatternSize, row by row. With
+NumPy each step is a vectorized operation. Without it, rows are
+evaluated one at a time by LandPatternSize itself, which is much
+slower on large catalogs. NumPy is an optional dependency, installed
+by the fast extra: pip install kidraw[fast].
+"""
+from array import array
+
+from kidraw import geometry, ipc
+from kidraw.ipc import Dimension, LandPatternSize
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _to_nm(mm):
+    if numpy is not None:
+        return numpy.rint(numpy.asarray(mm, dtype=float) * geometry.NM_PER_MM).astype(numpy.int64)
+    return array("q", [geometry.to_nm(x) for x in mm])
+
+
+def _from_nm(nm):
+    if numpy is not None:
+        return nm / geometry.NM_PER_MM
+    return [geometry.from_nm(x) for x in nm]
+
+
+def _rms(*args):
+    # Same evaluation order as ipc._rms, so that results match exactly.
+    ret = 0
+    for x in args:
+        ret = ret + x ** 2
+    return numpy.sqrt(ret)
+
+
+def _table(values, profile):
+    # The per-profile values of an ipc goal table, for each row.
+    return numpy.array(values)[profile]
+
+
+def _at(column, i):
+    if numpy is not None:
+        return column[i] if numpy.ndim(column) else column
+    return column[i] if isinstance(column, (list, tuple, array)) else column
+
+
+class DimensionArray:
+    """A column of Dimensions.
+
+    As with Dimension, min and max values are stored as integer
+    nanometres, in min_nm and max_nm.
+    """
+
+    def __init__(self, min, max):
+        self.min_nm, self.max_nm = _to_nm(min), _to_nm(max)
+        assert len(self.min_nm) == len(self.max_nm)
+        if numpy is not None:
+            assert (self.min_nm <= self.max_nm).all()
+        else:
+            assert all(a <= b for a, b in zip(self.min_nm, self.max_nm))
+
+    @classmethod
+    def from_dimensions(cls, dims):
+        dims = list(dims)
+        return cls([d.min for d in dims], [d.max for d in dims])
+
+    @classmethod
+    def from_nominal(cls, nominal, plus, minus=None):
+        """Construct a DimensionArray given nominal and plus/minus values.
+
+        plus and minus may be single values, or one per row.
+        """
+        if minus is None:
+            minus = plus
+        if numpy is not None:
+            nominal = numpy.asarray(nominal, dtype=float)
+            return cls(nominal - minus, nominal + plus)
+        n = len(nominal)
+        return cls([_at(nominal, i) - _at(minus, i) for i in range(n)],
+                   [_at(nominal, i) + _at(plus, i) for i in range(n)])
+
+    def __len__(self):
+        return len(self.min_nm)
+
+    def __getitem__(self, i):
+        return Dimension(geometry.from_nm(int(self.min_nm[i])),
+                         geometry.from_nm(int(self.max_nm[i])))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def min(self):
+        return _from_nm(self.min_nm)
+
+    @property
+    def max(self):
+        return _from_nm(self.max_nm)
+
+    @property
+    def tolerance(self):
+        if numpy is not None:
+            return (self.max_nm - self.min_nm) / geometry.NM_PER_MM
+        return [geometry.from_nm(b - a) for a, b in zip(self.min_nm, self.max_nm)]
+
+    @property
+    def nominal(self):
+        if numpy is not None:
+            return (self.min_nm + self.max_nm) / 2 / geometry.NM_PER_MM
+        return [geometry.from_nm((a + b) / 2) for a, b in zip(self.min_nm, self.max_nm)]
+
+
+class LandPatternSizeArray:
+    """A column of LandPatternSizes.
+
+    Each constant may be a single value shared by all rows, or one
+    value per row. The archetype constructors mirror those of
+    LandPatternSize, and accept DimensionArrays and per-row profiles.
+    """
+
+    def __init__(self, toe, heel, side, courtyard, rounding_increment=0.05):
+        if numpy is not None:
+            toe, heel, side, courtyard, rounding_increment = (
+                numpy.asarray(v) for v in (toe, heel, side, courtyard, rounding_increment))
+        self.toe = toe
+        self.heel = heel
+        self.side = side
+        self.courtyard = courtyard
+        self.rounding_increment = rounding_increment
+        self.pcb_tolerance = 0.1
+        self.place_tolerance = 0.05
+
+    def __getitem__(self, i):
+        ret = LandPatternSize(*(_to_scalar(_at(getattr(self, k), i)) for k in
+                                ("toe", "heel", "side", "courtyard", "rounding_increment")))
+        ret.pcb_tolerance = self.pcb_tolerance
+        ret.place_tolerance = self.place_tolerance
+        return ret
+
+    @classmethod
+    def from_specs(cls, specs):
+        """Returns the column of the given LandPatternSizes."""
+        specs = list(specs)
+        ret = cls(*([getattr(s, k) for s in specs] for k in
+                    ("toe", "heel", "side", "courtyard", "rounding_increment")))
+        if specs:
+            ret.pcb_tolerance = specs[0].pcb_tolerance
+            ret.place_tolerance = specs[0].place_tolerance
+        return ret
+
+    def _round_down_nm(self, x):
+        x, inc = _to_nm(x), _to_nm(self.rounding_increment)
+        return x - x % inc
+
+    def _round_down(self, x):
+        return _from_nm(self._round_down_nm(x))
+
+    def _round_up(self, x):
+        return _from_nm(self._round_down_nm(x) + _to_nm(self.rounding_increment))
+
+    def _rows(self, method, *dims):
+        # Without NumPy, each row is computed by LandPatternSize.
+        return [getattr(self[i], method)(*(d[i] for d in dims)) for i in range(len(dims[0]))]
+
+    def OuterPadSpan(self, L, T):
+        """See LandPatternSize.OuterPadSpan."""
+        if numpy is None:
+            return self._rows("OuterPadSpan", L, T)
+        return self._round_up(L.min + 2 * self.toe + _rms(L.tolerance, self.pcb_tolerance, self.place_tolerance))
+
+    def InnerPadSpan(self, L, T):
+        """See LandPatternSize.InnerPadSpan.
+
+        Rows where the pads would short together are not an error,
+        their inner pad span is simply <= 0.
+        """
+        if numpy is None:
+            return self._rows("_inner_pad_span", L, T)
+        rms = _rms(L.tolerance, T.tolerance)
+        Smin_nm = _to_nm(L.min - 2 * T.max + rms / 2)
+        Smax_nm = _to_nm(L.max - 2 * T.min - rms / 2)
+        Smax, Stolerance = _from_nm(Smax_nm), _from_nm(Smax_nm - Smin_nm)
+        return self._round_down(Smax - 2 * self.heel - _rms(Stolerance, self.pcb_tolerance, self.place_tolerance))
+
+    def PadWidth(self, W):
+        """See LandPatternSize.PadWidth."""
+        if numpy is None:
+            return self._rows("PadWidth", W)
+        return self._round_up(W.min + 2 * self.side + _rms(W.tolerance, self.pcb_tolerance, self.place_tolerance))
+
+    @classmethod
+    def gullwing_leads(cls, profile, A, L, T, pitch=None):
+        """See LandPatternSize.gullwing_leads."""
+        if numpy is None:
+            n = len(L)
+            return cls.from_specs(
+                LandPatternSize.gullwing_leads(_at(profile, i), A[i], L[i], T[i],
+                                               None if pitch is None else _at(pitch, i))
+                for i in range(n))
+        profile = numpy.asarray(profile)
+        Smin = L.min - 2 * T.max
+        heel = numpy.where(Smin <= A.max, _table(ipc._GULLWING_SHORT_HEEL, profile),
+                           _table(ipc._GULLWING_HEEL, profile))
+        side = _table(ipc._GULLWING_SIDE, profile)
+        if pitch is not None:
+            side = numpy.where(numpy.asarray(pitch) <= ipc._GULLWING_FINE_PITCH,
+                               _table(ipc._GULLWING_FINE_PITCH_SIDE, profile), side)
+        toe = _table(ipc._GULLWING_TOE, profile)
+        courtyard = _table(ipc._GULLWING_COURTYARD, profile)
+        return cls(toe, heel, side, courtyard)
+
+    outward_L_leads = gullwing_leads
+    SOIC = SOP = SOT = SOD = QFP = CQFP = LQFP = TQFP = gullwing_leads
+
+    @classmethod
+    def chip(cls, profile, L):
+        """See LandPatternSize.chip."""
+        if numpy is None:
+            return cls.from_specs(LandPatternSize.chip(_at(profile, i), L[i]) for i in range(len(L)))
+        profile = numpy.asarray(profile)
+        small = L.max < ipc._SMALL_CHIP
+        return cls(numpy.where(small, _table(ipc._SMALL_CHIP_TOE, profile),
+                               _table(ipc._CHIP_TOE, profile)),
+                   0,
+                   _table(ipc._CHIP_SIDE, profile),
+                   numpy.where(small, _table(ipc._SMALL_CHIP_COURTYARD, profile),
+                               _table(ipc._CHIP_COURTYARD, profile)),
+                   numpy.where(small, ipc._SMALL_CHIP_ROUNDING, ipc._CHIP_ROUNDING))
+
+    chip_resistor = chip_capacitor = chip_inductor = chip_diode = chip
+
+
+def _to_scalar(v):
+    if numpy is not None:
+        return numpy.asarray(v).item()
+    return v
+
+
+def pad_dimensions(spec, L, T, W, pitch=None):
+    """Returns Z, G and X for every row, and a mask of feasible rows.
+
+    spec is a LandPatternSizeArray, L, T and W are DimensionArrays.
+    A row is infeasible where LandPatternSize would raise
+    InfeasibleFootprint: its inner pad span is not positive or, if a
+    pitch is given, its pads are too wide for it. The values of
+    infeasible rows are meaningless.
+    """
+    Z = spec.OuterPadSpan(L, T)
+    G = spec.InnerPadSpan(L, T)
+    X = spec.PadWidth(W)
+    if numpy is None:
+        ok = [g > 0 and (pitch is None or _at(pitch, i) - x >= spec.pcb_tolerance)
+              for i, (g, x) in enumerate(zip(G, X))]
+        return Z, G, X, ok
+    ok = G > 0
+    if pitch is not None:
+        ok &= numpy.asarray(pitch) - X >= spec.pcb_tolerance
+    return Z, G, X, ok
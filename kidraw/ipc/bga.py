@@ -0,0 +1,140 @@
+"""IPC-7351B land patterns for ball grid arrays.
+
+>>> spec = LandPatternSize.BGA(Nominal)
+>>> ball_grid_array(A, B, ball, 1.0, 39, 39, spec, mask=mask)
+
+Balls are named the JEDEC way: rows are lettered from A, skipping
+I, O, Q, S, X and Z, and continue with AA, AB... after Y. Columns
+are numbered from 1. Ball A1 is in the top left corner.
+
+Pad positions are computed for the whole array at once, with NumPy
+if it is installed (see the fast extra of kidraw), so that packages
+with thousands of balls are cheap to generate.
+"""
+from kidraw import geometry
+from kidraw.ipc import AssemblyPenWidth, Drawing, PenWidth, _courtyard
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_ROW_LETTERS = "ABCDEFGHJKLMNPRTUVWY"
+
+
+def row_name(row):
+    """Returns the JEDEC name of the 0-based row."""
+    n = len(_ROW_LETTERS)
+    if row < n:
+        return _ROW_LETTERS[row]
+    if row < n * (n + 1):
+        return _ROW_LETTERS[row // n - 1] + _ROW_LETTERS[row % n]
+    raise ValueError(f"Too many rows for JEDEC ball names: {row + 1}")
+
+
+def ball_name(row, column):
+    """Returns the JEDEC name of the ball at 0-based row and column."""
+    return f"{row_name(row)}{column + 1}"
+
+
+def land_diameter(ball, collapsing=True):
+    """Returns the land diameter for balls of diameter ball, a Dimension.
+
+    Collapsing (eutectic) balls get a land smaller than the nominal
+    ball, by 25% for balls of 0.55mm and up, 20% down to 0.25mm and
+    15% below. Non-collapsing balls get a land 5% larger than the
+    nominal ball. The result is rounded to 0.01mm.
+    """
+    nominal = ball.nominal
+    if not collapsing:
+        d = nominal * 1.05
+    elif nominal >= 0.55:
+        d = nominal * 0.75
+    elif nominal >= 0.25:
+        d = nominal * 0.8
+    else:
+        d = nominal * 0.85
+    return geometry.from_nm(geometry.round_nm(geometry.to_nm(d), 10000))
+
+
+def _ball_positions(rows, columns, pitch, mask):
+    """Returns the rows, columns, X and Y of the populated balls."""
+    if numpy is not None:
+        if mask is None:
+            mask = numpy.ones((rows, columns), dtype=bool)
+        mask = numpy.asarray(mask, dtype=bool)
+        if mask.shape != (rows, columns):
+            raise ValueError(f"Mask is {mask.shape[0]}x{mask.shape[1]}, want {rows}x{columns}")
+        r, c = numpy.nonzero(mask)
+        xs = (c - (columns - 1) / 2) * pitch
+        ys = ((rows - 1) / 2 - r) * pitch
+        return r.tolist(), c.tolist(), xs.tolist(), ys.tolist()
+
+    if mask is None:
+        rc = [(r, c) for r in range(rows) for c in range(columns)]
+    else:
+        mask = [list(row) for row in mask]
+        if len(mask) != rows or any(len(row) != columns for row in mask):
+            raise ValueError(f"Mask is not {rows}x{columns}")
+        rc = [(r, c) for r, row in enumerate(mask) for c, v in enumerate(row) if v]
+    return ([r for r, _ in rc], [c for _, c in rc],
+            [(c - (columns - 1) / 2) * pitch for _, c in rc],
+            [((rows - 1) / 2 - r) * pitch for r, _ in rc])
+
+
+def ball_grid_array(A, B, ball, pitch, rows, columns, spec, mask=None,
+                    collapsing=True, nsmd=True, mask_clearance=0.05):
+    """Returns drawing for a ball grid array.
+
+    A and B are the body width and length, ball the ball diameter. If
+    given, mask has one sequence of booleans per row, True where a
+    ball is present.
+
+    Pads of non solder mask defined (NSMD) lands have a solder mask
+    opening mask_clearance larger than the land. Solder mask defined
+    (SMD) lands have copper mask_clearance larger than the land
+    instead, and the mask opening is the land.
+    """
+    d = land_diameter(ball, collapsing)
+    if nsmd:
+        size, mask_margin = d, mask_clearance
+    else:
+        size, mask_margin = d + 2 * mask_clearance, -mask_clearance
+
+    names = [row_name(r) for r in range(rows)]
+    ret = Drawing()
+    ret.features += [
+        Drawing.Pad(number=f"{names[r]}{c + 1}", center=(x, y), size=(size, size),
+                    obround=True, mask_margin=mask_margin)
+        for r, c, x, y in zip(*_ball_positions(rows, columns, pitch, mask))]
+
+    x, y = A.nominal / 2, B.nominal / 2
+    chamfer = min(1, x / 5, y / 5)
+    ret.features += [
+        Drawing.Line(layer=Drawing.Layer.Documentation,
+                     points=[(A.nominal / 8, 0), (-A.nominal / 8, 0)],
+                     width=PenWidth),
+        Drawing.Line(layer=Drawing.Layer.Documentation,
+                     points=[(0, A.nominal / 8), (0, -A.nominal / 8)],
+                     width=PenWidth),
+
+        # Assembly outline, with ball A1's corner chamfered.
+        Drawing.Line(layer=Drawing.Layer.Assembly,
+                     points=[(-x + chamfer, y), (x, y), (x, -y), (-x, -y),
+                             (-x, y - chamfer), (-x + chamfer, y)],
+                     width=AssemblyPenWidth),
+    ]
+
+    v = PenWidth / 2 + 0.05
+    ret.features += [
+        Drawing.Line(layer=Drawing.Layer.Silkscreen,
+                     points=[(-x - v, y + v), (x + v, y + v), (x + v, -y - v),
+                             (-x - v, -y - v), (-x - v, y + v)],
+                     width=PenWidth),
+        Drawing.Circle(layer=Drawing.Layer.Silkscreen,
+                       center=(-x - v - 0.3, y + v),
+                       radius=0.1),
+    ]
+
+    _courtyard(ret, spec)
+    return ret
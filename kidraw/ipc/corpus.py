@@ -0,0 +1,214 @@
+"""Precomputed land patterns of the standard packages.
+
+The chip sizes, SOT23 and SC70 variants of ipc.library have fixed
+dimensions, so their drawings are the same on every run. build()
+renders all of them, in every profile, into one indexed file:
+
+    python -m kidraw.ipc.corpus
+
+Wheels ship the file, which build.py renders when they are built.
+
+ipc.library then looks standard packages up in that file rather
+than computing them. The file is memory-mapped, and entries are
+decoded on demand, so loading it costs little more than reading its
+index.
+
+The file is stamped with a fingerprint of the code that computes
+land patterns. If that code changes, a stale file is ignored, and
+land patterns are computed as usual until it is rebuilt.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from kidraw import geometry
+from kidraw.ipc import Drawing
+
+PATH = os.path.join(os.path.dirname(__file__), "corpus.bin")
+
+_MAGIC = b"KIDRAWC1"
+_HEADER = struct.Struct("<8s32sI")
+
+_SOURCES = [
+    os.path.join(os.path.dirname(geometry.__file__), "geometry.py"),
+    os.path.join(os.path.dirname(__file__), "__init__.py"),
+    os.path.join(os.path.dirname(__file__), "corpus.py"),
+    os.path.join(os.path.dirname(__file__), "library.py"),
+    os.path.join(os.path.dirname(__file__), "packages.py"),
+    os.path.join(os.path.dirname(__file__), "packages.csv"),
+]
+
+
+def fingerprint():
+    """Returns a digest of the code that computes standard land patterns."""
+    h = hashlib.sha256(_MAGIC)
+    for path in _SOURCES:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.digest()
+
+
+def key(kind, profile, *args):
+    """Returns the corpus key of a package.
+
+    Dimensions are identified by their value, so that equal sizes
+    share an entry.
+    """
+    def part(a):
+        if hasattr(a, "min_nm"):
+            return f"{a.min_nm}-{a.max_nm}"
+        if isinstance(a, (tuple, list)):
+            return ",".join(part(x) for x in a)
+        return str(a)
+    return "/".join([kind, str(profile)] + [part(a) for a in args])
+
+
+def _encode(drawing):
+    out = []
+    for f in drawing.features:
+        if isinstance(f, Drawing.Line):
+            out.append(["L", f.layer.value, f.width, [c for p in f.points for c in p]])
+        elif isinstance(f, Drawing.Circle):
+            out.append(["C", f.layer.value, f.center[0], f.center[1], f.radius])
+        else:
+            out.append(["P", f.number, f.center[0], f.center[1], f.size[0], f.size[1], f.obround, f.mask_margin, f.drill])
+    return json.dumps(out, separators=(",", ":")).encode()
+
+
+def _decode(data):
+    ret = Drawing()
+    features = []
+    for f in json.loads(data):
+        if f[0] == "L":
+            xy = f[3]
+            features.append(Drawing.Line(Drawing.Layer(f[1]), list(zip(xy[::2], xy[1::2])), f[2]))
+        elif f[0] == "C":
+            features.append(Drawing.Circle(Drawing.Layer(f[1]), (f[2], f[3]), f[4]))
+        else:
+            features.append(Drawing.Pad(f[1], (f[2], f[3]), (f[4], f[5]), f[6], f[7], f[8]))
+    ret.features = features
+    return ret
+
+
+def _standard():
+    """Yields the key and drawing of every standard package."""
+    from kidraw.ipc import library as lib
+
+    for size in lib._chip_metric_dimensions.values():
+        for profile in lib._PROFILES:
+            for polarized in (False, True):
+                yield key("chip", profile, size, polarized), lib.chip(profile, size, polarized)
+    for kind, builder, pin_counts in (("SOT23", lib.SOT23, (3, 5, 6, 8)),
+                                      ("SC70", lib.SC70, (5, 6, 8))):
+        for num_pins in pin_counts:
+            for profile in lib._PROFILES:
+                yield key(kind, profile, num_pins), builder(profile, num_pins)
+
+
+def build(path=PATH):
+    """Renders the standard packages into the corpus file at path."""
+    global _default
+    saved, _default = _default, None
+    try:
+        index, blobs, offset = {}, [], 0
+        for k, drawing in _standard():
+            data = _encode(drawing)
+            index[k] = (offset, len(data))
+            blobs.append(data)
+            offset += len(data)
+    finally:
+        _default = saved
+    index = json.dumps(index, separators=(",", ":")).encode()
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, fingerprint(), len(index)))
+        f.write(index)
+        for data in blobs:
+            f.write(data)
+    os.replace(tmp, path)
+
+
+class Corpus:
+    """A corpus file, memory-mapped.
+
+    Raises ValueError if the file is not a corpus, or is stale.
+    """
+
+    def __init__(self, path=PATH):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._map) < _HEADER.size:
+                raise ValueError(f"{path} is not a land pattern corpus")
+            magic, digest, n = _HEADER.unpack_from(self._map)
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a land pattern corpus")
+            if digest != fingerprint():
+                raise ValueError(f"{path} is stale, rebuild it with python -m kidraw.ipc.corpus")
+            self._index = json.loads(self._map[_HEADER.size:_HEADER.size + n])
+            self._start = _HEADER.size + n
+        except BaseException:
+            self._map.close()
+            raise
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, k):
+        return k in self._index
+
+    def keys(self):
+        return self._index.keys()
+
+    def get(self, k):
+        """Returns a new Drawing for key k, or None."""
+        entry = self._index.get(k)
+        if entry is None:
+            return None
+        offset, n = entry
+        offset += self._start
+        return _decode(self._map[offset:offset + n])
+
+    def close(self):
+        self._map.close()
+
+
+_UNLOADED = object()
+_default = _UNLOADED
+_lock = threading.Lock()
+
+
+def _load():
+    global _default
+    with _lock:
+        if _default is _UNLOADED:
+            try:
+                _default = Corpus(PATH)
+            except (OSError, ValueError):
+                _default = None
+    return _default
+
+
+def lookup(kind, profile, *args):
+    """Returns the precomputed Drawing of a standard package, or None.
+
+    None means that the package must be computed: it is not standard,
+    or there is no up to date corpus file.
+    """
+    corpus = _default
+    if corpus is _UNLOADED:
+        corpus = _load()
+    if corpus is None:
+        return None
+    return corpus.get(key(kind, profile, *args))
+
+
+if __name__ == "__main__":
+    # Run as a script, this module is __main__, and not the module
+    # that ipc.library consults.
+    from kidraw.ipc import corpus
+    corpus.build(*sys.argv[1:])
@@ -0,0 +1,155 @@
+"""Generate whole families of standard land patterns.
+
+ipc.library builds one package at a time. This module enumerates
+the standard sizes and variants of a package family, in every
+profile, and yields them as a stream of (name, Drawing):
+
+>>> for name, drawing in generate(chips(), SOIC(), QFP(), processes=8):
+...     save(name, drawing)
+
+Names follow those of the golden tests, for example chip_i_0805_NP
+for the polarized Nominal 0805, or QFP-100_L.
+
+Family members share as much of their construction as they can.
+The three profiles of an in-line package are built in one pass by
+ipc.in_line_pin_device_profiles, and LandPatternSizes are cached,
+so that for example all narrow body SOICs use the same specs.
+
+Profiles that are infeasible for a member, such as Most for 0.4mm
+pitch QFPs, are left out of the stream.
+"""
+import collections
+import functools
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+from kidraw import ipc
+from kidraw.ipc import library as lib
+from kidraw.ipc import packages
+
+_SUFFIX = {
+    lib.Most: "M",
+    lib.Nominal: "N",
+    lib.Least: "L",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _specs(archetype, *args):
+    """Returns the LandPatternSizes of all profiles for an archetype constructor."""
+    return tuple(archetype(p, *args) for p in lib._PROFILES)
+
+
+def _profiles(name, build, specs):
+    """Returns the named drawings of build(specs), one per profile.
+
+    If some of specs are infeasible, the others are built one by one.
+    """
+    try:
+        drawings = build(list(specs))
+    except ipc.InfeasibleFootprint:
+        drawings = []
+        for spec in specs:
+            try:
+                drawings.append(build([spec])[0])
+            except ipc.InfeasibleFootprint:
+                drawings.append(None)
+    return [(f"{name}_{_SUFFIX[p]}", d)
+            for p, d in zip(lib._PROFILES, drawings) if d is not None]
+
+
+def _chip(system, size):
+    A, B, T = (lib.metric if system == "m" else lib.imperial)(size)
+    ret = []
+    for p, spec in zip(lib._PROFILES, _specs(ipc.LandPatternSize.chip, A)):
+        for polarized in (False, True):
+            name = f"chip_{system}_{size}_{_SUFFIX[p]}" + ("P" if polarized else "")
+            ret.append((name, ipc.two_terminal_symmetric_device(A, B, A, T, B, spec, polarized)))
+    return ret
+
+
+def chips(metric=False, sizes=None):
+    """Chip devices, plain and polarized.
+
+    Sizes are EIA imperial codes, or metric ones if metric is True.
+    By default, all the sizes known to ipc.library.
+    """
+    system = "m" if metric else "i"
+    if sizes is None:
+        sizes = lib._chip_metric_dimensions if metric else lib._chip_imperial_dimensions
+    for size in sizes:
+        yield functools.partial(_chip, system, size)
+
+
+def _in_line(name, pins_leftright, pins_updown):
+    p = packages.database()[name]
+    LB = p.L if pins_updown else p.B
+    # Families are named after their LandPatternSize archetype.
+    archetype = getattr(ipc.LandPatternSize, p.family)
+    return _profiles(name, lambda specs: ipc.in_line_pin_device_profiles(
+        p.A, p.B, p.L, LB, p.T, p.W, p.pitch, pins_leftright, pins_updown, specs),
+        _specs(archetype, p.A, p.L, p.T, p.pitch))
+
+
+def SOIC(names=None):
+    """1.27mm pitch SOICs of the package database, SOIC-8 to SOIC-28W.
+
+    Wide body variants are suffixed with W.
+    """
+    for p in packages.database().select(family="SOIC"):
+        if names is None or p.name in names:
+            yield functools.partial(_in_line, p.name, p.pins // 2, 0)
+
+
+def QFP(pin_counts=None):
+    """Square LQFPs of the package database, QFP-32 to QFP-256."""
+    for p in packages.database().select(family="QFP"):
+        if pin_counts is None or p.pins in pin_counts:
+            yield functools.partial(_in_line, p.name, p.pins // 4, p.pins // 4)
+
+
+def _builtin(name, builder, num_pins):
+    return [(f"{name}-{num_pins}_{_SUFFIX[p]}", builder(p, num_pins)) for p in lib._PROFILES]
+
+
+def SOT23(pin_counts=(3, 5, 6, 8)):
+    """The SOT23 variants of ipc.library.SOT23."""
+    for num_pins in pin_counts:
+        yield functools.partial(_builtin, "SOT23", lib.SOT23, num_pins)
+
+
+def SC70(pin_counts=(5, 6, 8)):
+    """The SC70 variants of ipc.library.SC70."""
+    for num_pins in pin_counts:
+        yield functools.partial(_builtin, "SC70", lib.SC70, num_pins)
+
+
+def generate(*families, processes=None):
+    """Yields (name, Drawing) for every member of families.
+
+    families are the iterables returned by the family functions of
+    this module, by default all of them. Members are built lazily,
+    in order. If processes is given, they are built by a pool of that
+    many processes, and still yielded in order. Only a few members
+    per process are built ahead of the stream.
+    """
+    if not families:
+        families = (chips(), chips(metric=True), SOIC(), QFP(), SOT23(), SC70())
+    jobs = itertools.chain.from_iterable(families)
+    if not processes:
+        for job in jobs:
+            yield from job()
+        return
+    with ProcessPoolExecutor(processes) as pool:
+        window = collections.deque()
+        try:
+            for job in jobs:
+                window.append(pool.submit(job))
+                if len(window) >= 2 * processes:
+                    yield from window.popleft().result()
+            while window:
+                yield from window.popleft().result()
+        finally:
+            # The stream may be abandoned, do not build the rest.
+            for f in window:
+                f.cancel()
@@ -6,40 +6,56 @@ that will probably work.
 
 It also provides shorthands for common chip packages, to simplify
 their construction.
+
+Standard packages are read from the precomputed corpus when there is
+an up to date one, see kidraw.ipc.corpus.
 """
 
+from collections.abc import Mapping
+
 from kidraw import ipc
+from kidraw.ipc import bga, corpus, packages, through_hole
 
 Most = ipc.LandPatternSize.Most
 Nominal = ipc.LandPatternSize.Nominal
 Least = ipc.LandPatternSize.Least
+_PROFILES = (Most, Nominal, Least)
 
-_chip_metric_dimensions = {
-    "1005": (ipc.Dimension.from_nominal(1.00, 0.05),
-             ipc.Dimension.from_nominal(0.50, 0.05),
-             ipc.Dimension.from_nominal(0.2, 0.10)),
-    "1608": (ipc.Dimension.from_nominal(1.55, 0.05),
-             ipc.Dimension.from_nominal(0.85, 0.10),
-             ipc.Dimension.from_nominal(0.3, 0.15, 0.20)),
-    "2012": (ipc.Dimension.from_nominal(2.00, 0.10),
-             ipc.Dimension.from_nominal(1.25, 0.15),
-             ipc.Dimension.from_nominal(0.4, 0.1, 0.2)),
-    "3216": (ipc.Dimension.from_nominal(3.20, 0.1, 0.2),
-             ipc.Dimension.from_nominal(1.60, 0.15),
-             ipc.Dimension.from_nominal(0.50, 0.25)),
-}
 
+class _ChipSizes(Mapping):
+    """Chip sizes from the package database, as (A, B, T).
 
-def metric(n):
-    return _chip_metric_dimensions[n]
+    Keys are metric size codes, or imperial ones if imperial is True.
+    """
+
+    def __init__(self, imperial):
+        self._imperial = imperial
+
+    def _packages(self):
+        db = packages.database()
+        return {(p.aliases[0] if self._imperial else p.name): p
+                for p in db.select(family="chip") if p.aliases or not self._imperial}
 
+    def __getitem__(self, n):
+        db = packages.database()
+        p = db.alias(n) if self._imperial else db[n]
+        if p.family != "chip":
+            raise KeyError(n)
+        return p.A, p.B, p.T
 
-_chip_imperial_dimensions = {
-    "0402": metric("1005"),
-    "0603": metric("1608"),
-    "0805": metric("2012"),
-    "1206": metric("3216"),
-}
+    def __iter__(self):
+        return iter(self._packages())
+
+    def __len__(self):
+        return len(self._packages())
+
+
+_chip_metric_dimensions = _ChipSizes(imperial=False)
+_chip_imperial_dimensions = _ChipSizes(imperial=True)
+
+
+def metric(n):
+    return _chip_metric_dimensions[n]
 
 
 def imperial(n):
@@ -53,6 +69,9 @@ def chip(profile, size, polarized=False):
 
     >>> chip(Most, metric('0402'), polarized=True)
     """
+    ret = corpus.lookup("chip", profile, size, polarized)
+    if ret is not None:
+        return ret
     A, B, T = size
     return ipc.two_terminal_symmetric_device(
         A, B, A, T, B, ipc.LandPatternSize.chip(profile, A), polarized)
@@ -79,57 +98,54 @@ def SOIC(profile, A, B, L, T, W, num_pins, pitch=1.27):
 SOP = SOIC
 
 
+def SOIC_profiles(A, B, L, T, W, num_pins, pitch=1.27):
+    """Construct the Most, Nominal and Least land patterns of a SOIC device.
+
+    Returns a list of the three footprints, indexed by profile. They
+    are identical to those of SOIC, but built in one pass.
+    """
+    if num_pins % 2 != 0:
+        raise ValueError("num_pins must be even for SOIC devices")
+    return ipc.in_line_pin_device_profiles(
+        A=A, B=B, LA=L, LB=B, T=T, W=W, pitch=pitch,
+        pins_leftright=int(num_pins / 2), pins_updown=0,
+        specs=[ipc.LandPatternSize.SOIC(
+            profile=profile, A=A, L=L, T=T, pitch=pitch) for profile in _PROFILES])
+
+
+SOP_profiles = SOIC_profiles
+
+
+def _sot(profile, name, spec_pitch=None):
+    """Construct a land pattern for a SOT23-like package of the database."""
+    p = packages.database().get(name)
+    if p is None:
+        raise ValueError(f"No known standard dimensions for {name}")
+    spec = ipc.LandPatternSize.SOT(profile, p.A, p.L, p.T, spec_pitch or p.pitch)
+    if p.pins == 3:
+        return ipc.sot23_3(p.A, p.B, p.L, p.T, p.W, p.pitch, spec)
+    if p.pins == 5:
+        return ipc.sot23_5(p.A, p.B, p.L, p.T, p.W, p.pitch, spec)
+    return ipc.in_line_pin_device(
+        p.A, p.B, p.L, p.B, p.T, p.W, p.pitch, p.pins // 2, 0, spec)
+
+
 def SOT23(profile, num_pins):
     """Construct a land pattern for a SOT23 device.
     
     Supports 3, 5, 6 and 8-pin devices, with dimensions from JEDEC
     TO-236 and MO-178.
     """
-    if num_pins == 3:
-        # Dimensions from JEDEC TO-236-A[AB]
-        A = ipc.Dimension(1.2, 1.4)
-        B = ipc.Dimension(2.8, 3.04)
-        L = ipc.Dimension(2.1, 2.64)
-        T = ipc.Dimension(0.4, 0.6)
-        W = ipc.Dimension(0.3, 0.5)
-        return ipc.sot23_3(
-            A, B, L, T, W, 0.95,
-            ipc.LandPatternSize.SOT(profile, A, L, T, 0.95))
-    if num_pins == 5:
-        # Dimensions from JEDEC MO-178-C variant AA
-        A = ipc.Dimension.from_nominal(1.6, 0.1)
-        B = ipc.Dimension.from_nominal(2.9, 0.1)
-        L = ipc.Dimension.from_nominal(2.8, 0.2)
-        T = ipc.Dimension(0.3, 0.6)
-        W = ipc.Dimension(0.3, 0.5)
-        return ipc.sot23_5(
-            A, B, L, T, W, 0.95,
-            ipc.LandPatternSize.SOT(profile, A, L, T, 0.95))
-    if num_pins == 6:
-        # Dimensions from JEDEC MO-178-C variant AB
-        A = ipc.Dimension.from_nominal(1.6, 0.1)
-        B = ipc.Dimension.from_nominal(2.9, 0.1)
-        L = ipc.Dimension.from_nominal(2.8, 0.2)
-        T = ipc.Dimension(0.3, 0.6)
-        W = ipc.Dimension(0.3, 0.5)
-        return ipc.in_line_pin_device(
-            A, B, L, B, T, W, 0.95, 3, 0,
-            ipc.LandPatternSize.SOT(profile, A, L, T, 0.95))
+    ret = corpus.lookup("SOT23", profile, num_pins)
+    if ret is not None:
+        return ret
     if num_pins == 8:
-        # Dimensions from JEDEC MO-178-C variant BA
-        A = ipc.Dimension.from_nominal(1.6, 0.1)
-        B = ipc.Dimension.from_nominal(2.9, 0.1)
-        L = ipc.Dimension.from_nominal(2.8, 0.2)
-        T = ipc.Dimension(0.3, 0.6)
-        W = ipc.Dimension(0.22, 0.38)
         # SOT23-8 is almost at the threshold where IPC switches to
         # much smaller side fillets. This causes overlap violations
         # with the Most profile. As such, we force the narrower pitch
         # profile here by using a smaller pitch.
-        spec = ipc.LandPatternSize.SOT(profile, A, L, T, 0.6)
-        return ipc.in_line_pin_device(
-            A, B, L, B, T, W, 0.65, 4, 0, spec)
-    raise ValueError(f"No known standard dimensions for SOT23-{num_pins}")
+        return _sot(profile, "SOT23-8", spec_pitch=0.6)
+    return _sot(profile, f"SOT23-{num_pins}")
 
 
 def SC70(profile, num_pins):
@@ -138,28 +154,10 @@ def SC70(profile, num_pins):
     Supports 5, 6 and 8-pin devices, with dimensions from JEDEC
     MO-203.
     """
-    A = ipc.Dimension.from_nominal(1.25, 0.15)
-    B = ipc.Dimension.from_nominal(2, 0.15)
-    L = ipc.Dimension.from_nominal(2.1, 0.3)
-    T = ipc.Dimension(0.26, 0.46)
-    W = ipc.Dimension(0.15, 0.3)
-    if num_pins == 5:
-        # MO-203-C variant AA
-        return ipc.sot23_5(
-            A, B, L, T, W, 0.65,
-            ipc.LandPatternSize.SOT(profile, A, L, T, 0.65))
-    if num_pins == 6:
-        # MO-203-C variant AB
-        return ipc.in_line_pin_device(
-            A, B, L, B, T, W, 0.65, 3, 0,
-            ipc.LandPatternSize.SOT(profile, A, L, T, 0.65))
-    if num_pins == 8:
-        # MO-203-C variant BA
-        W = ipc.Dimension(0.15, 0.27)
-        spec = ipc.LandPatternSize.SOT(profile, A, L, T, 0.5)
-        return ipc.in_line_pin_device(
-            A, B, L, B, T, W, 0.5, 4, 0, spec)
-    raise ValueError(f"No known standard dimensions for SOT23-{num_pins}")
+    ret = corpus.lookup("SC70", profile, num_pins)
+    if ret is not None:
+        return ret
+    return _sot(profile, f"SC70-{num_pins}")
 
 
 def QFP(profile, A, L, T, W, pitch, num_pins):
@@ -176,6 +174,19 @@ def QFP(profile, A, L, T, W, pitch, num_pins):
         ipc.LandPatternSize.QFP(profile, A, L, T, pitch))
 
 
+def QFP_profiles(A, L, T, W, pitch, num_pins):
+    """Construct the Most, Nominal and Least land patterns of a QFP device.
+
+    Returns a list of the three footprints, indexed by profile. They
+    are identical to those of QFP, but built in one pass.
+    """
+    if num_pins % 4 != 0:
+        raise ValueError("num_pins must be a multiple of 4 for QFP devices")
+    return ipc.in_line_pin_device_profiles(
+        A, A, L, L, T, W, pitch, int(num_pins / 4), int(num_pins / 4),
+        [ipc.LandPatternSize.QFP(profile, A, L, T, pitch) for profile in _PROFILES])
+
+
 def QFN(profile, A, T, W, pitch, num_pins):
     """Construct a land pattern for a QFN device.
 
@@ -187,5 +198,57 @@ def QFN(profile, A, T, W, pitch, num_pins):
     if num_pins % 4 != 0:
         raise ValueError("num_pins must be a multiple of 4 for QFP devices")
     return ipc.in_line_pin_device(
-        A, A, A, A, T, W, pitch, num_pins / 4, num_pins / 4,
+        A, A, A, A, T, W, pitch, int(num_pins / 4), int(num_pins / 4),
         ipc.LandPatternSize.QFN(profile))
+
+
+def QFN_profiles(A, T, W, pitch, num_pins):
+    """Construct the Most, Nominal and Least land patterns of a QFN device.
+
+    Returns a list of the three footprints, indexed by profile. They
+    are identical to those of QFN, but built in one pass.
+    """
+    if num_pins % 4 != 0:
+        raise ValueError("num_pins must be a multiple of 4 for QFP devices")
+    return ipc.in_line_pin_device_profiles(
+        A, A, A, A, T, W, pitch, int(num_pins / 4), int(num_pins / 4),
+        [ipc.LandPatternSize.QFN(profile) for profile in _PROFILES])
+
+
+def BGA(profile, A, B, ball, pitch, rows, columns, mask=None, collapsing=True, nsmd=True):
+    """Construct a land pattern for a BGA device.
+
+    mask, if given, has one sequence of booleans per row of balls,
+    True where a ball is present. See kidraw.ipc.bga.
+    """
+    return bga.ball_grid_array(
+        A, B, ball, pitch, rows, columns, ipc.LandPatternSize.BGA(profile),
+        mask=mask, collapsing=collapsing, nsmd=nsmd)
+
+
+def DIP(profile, A, B, lead, num_pins, pitch=2.54, row_spacing=7.62):
+    """Construct a land pattern for a dual in-line package.
+
+    lead is the lead diameter, see kidraw.ipc.through_hole for
+    rectangular leads.
+    """
+    return through_hole.dual_in_line(
+        A, B, lead, pitch, num_pins, row_spacing, through_hole.ThroughHoleSize.level(profile))
+
+
+def pin_header(profile, positions, rows=1, pitch=2.54, lead=None):
+    """Construct a land pattern for a pin header.
+
+    By default, leads are 0.64mm square posts.
+    """
+    if lead is None:
+        lead = through_hole.square_lead(ipc.Dimension(0.59, 0.69))
+    return through_hole.pin_array(lead, pitch, positions,
+                                  through_hole.ThroughHoleSize.level(profile), rows=rows)
+
+
+def connector(profile, A, B, lead, pitch, positions, rows=1, row_pitch=None):
+    """Construct a land pattern for a through-hole connector with an A by B body."""
+    return through_hole.pin_array(lead, pitch, positions,
+                                  through_hole.ThroughHoleSize.level(profile),
+                                  rows=rows, row_pitch=row_pitch, A=A, B=B)
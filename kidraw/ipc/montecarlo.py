@@ -0,0 +1,224 @@
+"""Monte Carlo tolerance analysis of land patterns.
+
+LandPatternSize sizes pads by folding the component, fabrication and
+placement tolerances together with an RMS sum. This module checks
+the result the other way around: it samples many component
+placements, each with its own lead dimensions, pad etching error and
+placement offset, and measures the solder fillets that each one would
+get.
+
+>>> r = simulate(drawing, L, T, W, spec, samples=1000000)
+>>> r.toe.quantile(0.01), r.p_short, r.p_open
+
+Lead dimensions are sampled uniformly within their Dimension. Pad
+dimensions are off by up to half of the spec's pcb_tolerance, and the
+placement by up to half of its place_tolerance along each axis,
+again uniformly. Fillets are those of the worst lead of each sample.
+
+NumPy, from the fast extra of kidraw, makes this fast. Without it,
+samples are drawn one at a time with the random module, which gives
+the same statistics, slowly.
+"""
+import math
+import random
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from kidraw.ipc import Drawing
+
+
+class _Scalar:
+    """The subset of NumPy used by _fillets, on plain floats."""
+
+    minimum = staticmethod(min)
+    maximum = staticmethod(max)
+    abs = staticmethod(abs)
+
+
+class Distribution:
+    """Summary of a sampled fillet, in mm.
+
+    Quantiles come from a histogram with 1um bins, over +/-2mm.
+    """
+
+    _bins = 4000
+    _range = 2.0
+
+    def __init__(self):
+        self.count = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._hist = [0] * self._bins if numpy is None else numpy.zeros(self._bins, dtype=numpy.int64)
+
+    def _bin(self, v):
+        i = int((v + self._range) * self._bins / (2 * self._range))
+        return min(max(i, 0), self._bins - 1)
+
+    def _add(self, values):
+        if numpy is not None:
+            self.count += len(values)
+            self._sum += float(values.sum())
+            self._sumsq += float((values * values).sum())
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            i = ((values + self._range) * (self._bins / (2 * self._range))).astype(numpy.int64)
+            self._hist += numpy.bincount(numpy.clip(i, 0, self._bins - 1), minlength=self._bins)
+            return
+        for v in values:
+            self.count += 1
+            self._sum += v
+            self._sumsq += v * v
+            self.min = min(self.min, v)
+            self.max = max(self.max, v)
+            self._hist[self._bin(v)] += 1
+
+    @property
+    def mean(self):
+        return self._sum / self.count
+
+    @property
+    def std(self):
+        return math.sqrt(max(self._sumsq / self.count - self.mean ** 2, 0))
+
+    def quantile(self, q):
+        """Returns the value below which a fraction q of the samples fall, to within 1um."""
+        want, seen = q * self.count, 0
+        for i, n in enumerate(self._hist):
+            seen += int(n)
+            if seen >= want:
+                return min(max((i + 1) * 2 * self._range / self._bins - self._range, self.min), self.max)
+        return self.max
+
+    def __repr__(self):
+        return f"Distribution(mean={self.mean:.4f}, std={self.std:.4f}, min={self.min:.4f}, max={self.max:.4f})"
+
+
+class Result:
+    """The outcome of simulate().
+
+    toe, heel and side are the Distributions of the fillets. p_short
+    is the fraction of samples where a lead touches a neighbouring
+    pad, or pads touch each other. p_open is the fraction where a lead
+    does not overlap its pad at all.
+    """
+
+    def __init__(self):
+        self.samples = 0
+        self.toe = Distribution()
+        self.heel = Distribution()
+        self.side = Distribution()
+        self.shorts = 0
+        self.opens = 0
+
+    @property
+    def p_short(self):
+        return self.shorts / self.samples
+
+    @property
+    def p_open(self):
+        return self.opens / self.samples
+
+    def __repr__(self):
+        return f"Result(samples={self.samples}, p_short={self.p_short}, p_open={self.p_open}, toe={self.toe}, heel={self.heel}, side={self.side})"
+
+
+def pad_geometry(drawing):
+    """Returns Z, G, X and pitch of the left and right pad rows of drawing.
+
+    pitch is None if the rows have a single pad each.
+    """
+    left = [p for p in drawing.features if isinstance(p, Drawing.Pad) and p.center[0] < -abs(p.center[1])]
+    right = [p for p in drawing.features if isinstance(p, Drawing.Pad) and p.center[0] > abs(p.center[1])]
+    if not left or not right:
+        raise ValueError("Drawing has no left and right pad rows")
+    Z = max(p.center[0] + p.size[0] / 2 for p in right) - min(p.center[0] - p.size[0] / 2 for p in left)
+    G = min(p.center[0] - p.size[0] / 2 for p in right) - max(p.center[0] + p.size[0] / 2 for p in left)
+    X = min(p.size[1] for p in left + right)
+    pitch = None
+    for row in (left, right):
+        ys = sorted(p.center[1] for p in row)
+        for a, b in zip(ys, ys[1:]):
+            if pitch is None or b - a < pitch:
+                pitch = b - a
+    return Z, G, X, pitch
+
+
+def _overlap(a0, a1, b0, b1, xp):
+    return xp.minimum(a1, b1) - xp.maximum(a0, b0)
+
+
+def _fillets(xp, Z, G, X, pitch, L, T, W, dx, dy):
+    """Returns the toe, heel and side fillets, and the short and open flags.
+
+    Z, G and X are the etched pad dimensions, L, T and W the lead
+    dimensions, and dx, dy the placement offset. These are either
+    floats, with xp=_Scalar, or NumPy arrays, with xp=numpy.
+    """
+    adx, ady = xp.abs(dx), xp.abs(dy)
+    toe = (Z - L) / 2 - adx
+    heel = (L - 2 * T - G) / 2 - adx
+    side = (X - W) / 2 - ady
+    # The lead pushed inwards by the offset overlaps its pad the least
+    # lengthwise.
+    length = _overlap(L / 2 - T - adx, L / 2 - adx, G / 2, Z / 2, xp)
+    width = _overlap(ady - W / 2, ady + W / 2, -X / 2, X / 2, xp)
+    opens = (length <= 0) | (width <= 0)
+    shorts = G <= 0
+    if pitch is not None:
+        shorts = shorts | (ady + W / 2 >= pitch - X / 2)
+    return toe, heel, side, shorts, opens
+
+
+def simulate(drawing, L, T, W, spec, samples=1000000, seed=None, batch_size=1 << 18):
+    """Samples placements of a part with lead Dimensions L, T and W onto drawing's pads.
+
+    spec provides the PCB and placement tolerances. Samples are
+    processed in batches of batch_size, so memory use does not grow
+    with their number. Returns a Result.
+    """
+    Z, G, X, pitch = pad_geometry(drawing)
+    return simulate_pads(Z, G, X, pitch, L, T, W, spec.pcb_tolerance, spec.place_tolerance,
+                         samples, seed, batch_size)
+
+
+def simulate_pads(Z, G, X, pitch, L, T, W, pcb_tolerance, place_tolerance,
+                  samples=1000000, seed=None, batch_size=1 << 18):
+    """Like simulate, given the pad dimensions and tolerances directly."""
+    ret = Result()
+    f, p = pcb_tolerance / 2, place_tolerance / 2
+    if numpy is None:
+        rnd = random.Random(seed)
+        u = rnd.uniform
+        for _ in range(samples):
+            toe, heel, side, short, open_ = _fillets(
+                _Scalar, Z + u(-f, f), G + u(-f, f), X + u(-f, f), pitch,
+                u(L.min, L.max), u(T.min, T.max), u(W.min, W.max), u(-p, p), u(-p, p))
+            ret.toe._add((toe,))
+            ret.heel._add((heel,))
+            ret.side._add((side,))
+            ret.shorts += short
+            ret.opens += open_
+        ret.samples = samples
+        return ret
+
+    rng = numpy.random.default_rng(seed)
+    done = 0
+    while done < samples:
+        n = min(batch_size, samples - done)
+        u = rng.uniform
+        toe, heel, side, shorts, opens = _fillets(
+            numpy, Z + u(-f, f, n), G + u(-f, f, n), X + u(-f, f, n), pitch,
+            u(L.min, L.max, n), u(T.min, T.max, n), u(W.min, W.max, n), u(-p, p, n), u(-p, p, n))
+        ret.toe._add(toe)
+        ret.heel._add(heel)
+        ret.side._add(side)
+        ret.shorts += int(numpy.count_nonzero(shorts))
+        ret.opens += int(numpy.count_nonzero(opens))
+        done += n
+    ret.samples = samples
+    return ret
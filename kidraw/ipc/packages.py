@@ -0,0 +1,215 @@
+"""Database of standard package dimensions.
+
+Package outlines are shipped as data, in packages.csv next to this
+module, and loaded on first use. Each package has a family (SOIC,
+QFP...), a lead style (chip or gullwing), and the Dimensions that
+ipc.library's builders take: A and B the body, L the lead span, T
+and W the lead length and width.
+
+Queries select packages by value, and ranges of numeric values use
+sorted indexes:
+
+>>> db = database()
+>>> db["SOT23-5"].pitch
+>>> db.select(style="gullwing", pitch=0.5, A=(6.8, 7.2))
+>>> db.nearest("A", 7, n=3, family="QFP")
+
+Dimensions are compared by their nominal value.
+"""
+import bisect
+import csv
+import os
+import threading
+
+from kidraw import geometry
+from kidraw.ipc import Dimension
+
+PATH = os.path.join(os.path.dirname(__file__), "packages.csv")
+
+_DIMENSIONS = ("A", "B", "L", "T", "W")
+_NUMBERS = ("pins", "pitch") + _DIMENSIONS
+
+
+class Package:
+    """The outline of a standard package.
+
+    Dimensions that do not apply to the package are None, for example
+    L and W for chip devices, and pitch for two terminal ones.
+    """
+
+    def __init__(self, family, style, name, aliases=(), pins=None, pitch=None,
+                 A=None, B=None, L=None, T=None, W=None, source=""):
+        self.family = family
+        self.style = style
+        self.name = name
+        self.aliases = tuple(aliases)
+        self.pins = pins
+        self.pitch = pitch
+        self.A = A
+        self.B = B
+        self.L = L
+        self.T = T
+        self.W = W
+        self.source = source
+
+    def __repr__(self):
+        return f"Package({self.name})"
+
+    def _key(self, field):
+        """Returns the sort key of field, or None.
+
+        Keys are integers: pin counts, or twice the nominal value in
+        nanometres, so that they compare exactly.
+        """
+        v = getattr(self, field)
+        if v is None:
+            return None
+        if field == "pins":
+            return v
+        if field == "pitch":
+            return 2 * geometry.to_nm(v)
+        return v.min_nm + v.max_nm
+
+
+def _range_key(field, value):
+    """Returns the (lo, hi) key range that matches value for field.
+
+    value is a number, a (min, max) pair, or a Dimension.
+    """
+    if isinstance(value, Dimension):
+        value = (value.min, value.max)
+    elif not isinstance(value, (tuple, list)):
+        value = (value, value)
+    lo, hi = value
+    if field == "pins":
+        return lo, hi
+    return 2 * geometry.to_nm(lo), 2 * geometry.to_nm(hi)
+
+
+class Database:
+    """An indexed collection of Packages.
+
+    Each numeric field has a sorted index, which range and nearest
+    queries search by bisection.
+    """
+
+    def __init__(self, packages):
+        self.packages = list(packages)
+        self._by_name = {}
+        self._by_alias = {}
+        for p in self.packages:
+            if p.name in self._by_name:
+                raise ValueError(f"Duplicate package {p.name}")
+            self._by_name[p.name] = p
+            for a in p.aliases:
+                self._by_alias[a] = p
+        self._index = {}
+        for field in _NUMBERS:
+            entries = sorted((p._key(field), i) for i, p in enumerate(self.packages)
+                             if getattr(p, field) is not None)
+            self._index[field] = ([k for k, _ in entries], [i for _, i in entries])
+
+    @classmethod
+    def load(cls, path=PATH):
+        """Loads a Database from a CSV file."""
+        def dim(row, k):
+            if not row[k + "_min"]:
+                return None
+            return Dimension(float(row[k + "_min"]), float(row[k + "_max"]))
+
+        with open(path, newline="") as f:
+            return cls(Package(family=row["family"],
+                               style=row["style"],
+                               name=row["name"],
+                               aliases=row["aliases"].split(),
+                               pins=int(row["pins"]) if row["pins"] else None,
+                               pitch=float(row["pitch"]) if row["pitch"] else None,
+                               source=row["source"],
+                               **{k: dim(row, k) for k in _DIMENSIONS})
+                       for row in csv.DictReader(f))
+
+    def __len__(self):
+        return len(self.packages)
+
+    def __iter__(self):
+        return iter(self.packages)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def get(self, name, default=None):
+        return self._by_name.get(name, default)
+
+    def alias(self, name):
+        """Returns the package that is also known as name."""
+        return self._by_alias[name]
+
+    def _matches(self, p, criteria):
+        for field, value in criteria.items():
+            if field in _NUMBERS:
+                k = p._key(field)
+                lo, hi = _range_key(field, value)
+                if k is None or not lo <= k <= hi:
+                    return False
+            elif getattr(p, field) != value:
+                return False
+        return True
+
+    def _range(self, field, lo, hi):
+        keys, rows = self._index[field]
+        return rows[bisect.bisect_left(keys, lo):bisect.bisect_right(keys, hi)]
+
+    def select(self, **criteria):
+        """Returns the packages that match all criteria, in database order.
+
+        Criteria on text fields must match exactly. Numeric fields
+        (pins, pitch, A, B, L, T, W) match a single value, an
+        inclusive (min, max) range, or the range of a Dimension.
+        """
+        ranges = [(field, *_range_key(field, criteria[field]))
+                  for field in _NUMBERS if field in criteria]
+        if not ranges:
+            rows = range(len(self.packages))
+        else:
+            # Start from the narrowest of the indexed ranges.
+            rows = min((self._range(*r) for r in ranges), key=len)
+        return [self.packages[i] for i in sorted(rows)
+                if self._matches(self.packages[i], criteria)]
+
+    def nearest(self, field, value, n=1, **criteria):
+        """Returns the n packages whose field is closest to value.
+
+        Only packages that match criteria, as in select(), are
+        considered. Packages are returned closest first, ties in no
+        particular order.
+        """
+        keys, rows = self._index[field]
+        target = _range_key(field, value)[0]
+        ret = []
+        hi = bisect.bisect_left(keys, target)
+        lo = hi - 1
+        while len(ret) < n and (lo >= 0 or hi < len(keys)):
+            if hi >= len(keys) or (lo >= 0 and target - keys[lo] <= keys[hi] - target):
+                i, lo = rows[lo], lo - 1
+            else:
+                i, hi = rows[hi], hi + 1
+            if self._matches(self.packages[i], criteria):
+                ret.append(self.packages[i])
+        return ret
+
+
+_default = None
+_lock = threading.Lock()
+
+
+def database():
+    """Returns the standard package Database, loading it on first use."""
+    global _default
+    if _default is None:
+        with _lock:
+            if _default is None:
+                _default = Database.load()
+    return _default
@@ -0,0 +1,148 @@
+"""Find a feasible land pattern for parts that the Standard rejects.
+
+Fine pitch parts or parts with short leads are often infeasible with
+some of the Standard's profiles: the pads would short together across
+the package (InnerPadSpan), or sit too close to their neighbours for
+the PCB etching tolerance (the pitch check of pin rows). solve() looks
+for the feasible land pattern that is closest to a preferred profile:
+
+>>> s = solve(lambda p: LandPatternSize.QFP(p, A, L, T, pitch), L, T, W, pitch)
+>>> s.spec.OuterPadSpan(L, T), s.G, s.X
+
+Profiles are tried from the preferred one towards Least, whose pads
+are the smallest. If even Least is infeasible, its heel and side
+fillets are reduced as little as possible until the pattern fits.
+"""
+from kidraw import geometry
+from kidraw.ipc import InfeasibleFootprint, LandPatternSize, _rms
+
+
+class Solution:
+    """A feasible land pattern, and its margins.
+
+    spec is the LandPatternSize to use, profile the profile it derives
+    from, and adjusted True if its fillets were reduced from those of
+    the profile. G and X are the inner pad span and pad width it
+    yields. clearance is the copper gap between neighbouring pads of
+    a row, or None if no pitch was given.
+    """
+
+    def __init__(self, spec, profile, adjusted, G, X, clearance):
+        self.spec = spec
+        self.profile = profile
+        self.adjusted = adjusted
+        self.G = G
+        self.X = X
+        self.clearance = clearance
+
+    def __repr__(self):
+        return f"Solution(profile={self.profile}, adjusted={self.adjusted}, G={self.G}, X={self.X}, clearance={self.clearance})"
+
+
+def _fits_inside(spec, L, T):
+    return spec._inner_pad_span(L, T) > 0
+
+
+def _fits_pitch(spec, W, pitch):
+    return pitch - spec.PadWidth(W) >= spec.pcb_tolerance
+
+
+def _max_fillet(ok, estimates, lo, hi):
+    """Returns the largest fillet in [lo, hi] such that ok(fillet), or None.
+
+    Fillets are in integer nanometres, and ok must be monotonic. The
+    answer is found by bisection. estimates are closed form guesses
+    of the answer: it is normally within a few nanometres of one of
+    them, which keeps the bisection short.
+    """
+    if ok(hi):
+        return hi
+    if not ok(lo):
+        return None
+    slack = 4
+    for e in estimates:
+        a, b = max(lo, e - slack), min(hi, e + slack)
+        if a < b and ok(a) and not ok(b):
+            lo, hi = a, b
+            break
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if ok(mid):
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def _adjust(spec, L, T, W, pitch):
+    """Returns spec with heel and side reduced just enough to be feasible, or None."""
+    inc = geometry.to_nm(spec.rounding_increment)
+    heel, side = geometry.to_nm(spec.heel), geometry.to_nm(spec.side)
+
+    def with_fillets(h, s):
+        ret = LandPatternSize(spec.toe, geometry.from_nm(h), geometry.from_nm(s),
+                              spec.courtyard, spec.rounding_increment)
+        ret.pcb_tolerance = spec.pcb_tolerance
+        ret.place_tolerance = spec.place_tolerance
+        return ret
+
+    if not _fits_inside(spec, L, T):
+        # G = round_down(Smax - 2 * heel - rms) must be at least one
+        # rounding increment.
+        rms = _rms(L.tolerance, T.tolerance)
+        Smin, Smax = L.min - 2 * T.max + rms / 2, L.max - 2 * T.min - rms / 2
+        Srms = _rms(Smax - Smin, spec.pcb_tolerance, spec.place_tolerance)
+        estimate = (geometry.to_nm(Smax - Srms) - inc) // 2
+        # Pads may at most reach back to the middle of the lead.
+        lo = -geometry.to_nm(T.max / 2)
+        heel = _max_fillet(lambda h: _fits_inside(with_fillets(h, side), L, T), (estimate,), lo, heel)
+        if heel is None:
+            return None
+
+    if pitch is not None and not _fits_pitch(spec, W, pitch):
+        # X = round_down(Wmin + 2 * side + rms) + increment must leave
+        # pcb_tolerance of copper gap at the given pitch.
+        rms = _rms(W.tolerance, spec.pcb_tolerance, spec.place_tolerance)
+        most = geometry.to_nm(pitch - spec.pcb_tolerance) - inc
+        most = most - most % inc + inc - 1
+        estimate = (most - geometry.to_nm(W.min + rms)) // 2
+        # Pads may not be narrower than half the lead.
+        lo = -geometry.to_nm(W.min / 4)
+        # The pitch check is done in floating point, which may reject
+        # an exact fit, and cost one more rounding increment.
+        side = _max_fillet(lambda s: _fits_pitch(with_fillets(heel, s), W, pitch),
+                           (estimate, estimate - inc // 2), lo, side)
+        if side is None:
+            return None
+
+    return with_fillets(heel, side)
+
+
+def solve(profile_spec, L, T, W, pitch=None, profile=LandPatternSize.Nominal):
+    """Returns the Solution closest to the given profile.
+
+    profile_spec(profile) must return the LandPatternSize of the part
+    for that profile, typically by calling one of LandPatternSize's
+    archetype constructors. pitch is the pin pitch of the part, if it
+    has rows of pins.
+
+    Toe fillets are never adjusted, since they do not affect
+    feasibility. Raises InfeasibleFootprint if no reasonable fillets
+    make the part feasible.
+    """
+    for p in range(profile, LandPatternSize.Least + 1):
+        spec = profile_spec(p)
+        if _fits_inside(spec, L, T) and (pitch is None or _fits_pitch(spec, W, pitch)):
+            return _solution(spec, p, False, L, T, W, pitch)
+    adjusted = _adjust(spec, L, T, W, pitch)
+    if adjusted is None:
+        raise InfeasibleFootprint("No land pattern fits these part dimensions")
+    return _solution(adjusted, LandPatternSize.Least, True, L, T, W, pitch)
+
+
+def _solution(spec, profile, adjusted, L, T, W, pitch):
+    X = spec.PadWidth(W)
+    clearance = None
+    if pitch is not None:
+        clearance = geometry.from_nm(geometry.to_nm(pitch) - geometry.to_nm(X))
+    return Solution(spec, profile, adjusted, spec.InnerPadSpan(L, T), X, clearance)
@@ -0,0 +1,91 @@
+import unittest
+from itertools import starmap
+
+from kidraw import geometry, ipc
+from kidraw.ipc import arrays
+from kidraw.ipc import library as ipc_lib
+
+
+def _as_string(d):
+    ret = []
+    for f in d.features:
+        if isinstance(f, ipc.Drawing.Line):
+            pts = " ".join(starmap("({0:.4f} {1:.4f})".format, f.points))
+            ret.append(f"LINE {f.layer.name} {f.width:.4f} {pts}")
+        elif isinstance(f, ipc.Drawing.Circle):
+            ret.append(f"CIRCLE {f.layer.name} ({f.center[0]:.4f} {f.center[1]:.4f}) {f.radius:.4f}")
+        else:
+            ret.append(f"PAD {f.number} ({f.center[0]:.4f} {f.center[1]:.4f}) ({f.size[0]:.4f} {f.size[1]:.4f}) {f.obround}")
+    return "\n".join(sorted(x.replace("-0.0000", "0.0000") for x in ret))
+
+
+def _drawings():
+    spec = ipc.LandPatternSize.Nominal
+    D = ipc.Dimension
+    return [
+        ipc_lib.chip(spec, ipc_lib.imperial("0805"), polarized=True),
+        ipc_lib.SOT23(spec, 5),
+        ipc_lib.QFP(spec, D(6.8, 7.2), D(8.8, 9.2), D(0.45, 0.75), D(0.3, 0.45), 0.8, 32),
+    ]
+
+
+class DrawingArraysTest(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+
+    def assertSameDrawing(self, got, want):
+        self.assertEqual(_as_string(got.to_drawing()), _as_string(want))
+        for g, w in zip(got.bounding_box, want.bounding_box):
+            self.assertAlmostEqual(g[0], w[0])
+            self.assertAlmostEqual(g[1], w[1])
+
+    def testRoundTrip(self):
+        for d in _drawings():
+            a = arrays.DrawingArrays.from_drawing(d)
+            self.assertSameDrawing(a, d)
+            self.assertEqual(a.length, d.length)
+            self.assertEqual(a.width, d.width)
+        self.assertEqual(arrays.DrawingArrays().bounding_box, ((0, 0), (0, 0)))
+        d = ipc.Drawing()
+        d.features += [ipc.Drawing.Line(ipc.Drawing.Layer.Silkscreen, [], 0.15),
+                       ipc.Drawing.Line(ipc.Drawing.Layer.Silkscreen, [(1, 1), (2, 1)], 0.2)]
+        self.assertSameDrawing(arrays.DrawingArrays.from_drawing(d), d)
+
+    def testTransforms(self):
+        t = geometry.Affine.translation(3, -1) @ geometry.Affine.rotation(90) @ geometry.Affine.mirror_x()
+        for d in _drawings():
+            a = arrays.DrawingArrays.from_drawing(d)
+            self.assertSameDrawing(a.scaled(30), d.scaled(30))
+            self.assertSameDrawing(a.transformed(t), d.transformed(t))
+            self.assertSameDrawing(a.translated(1, 2), d.translated(1, 2))
+            self.assertSameDrawing(a.rotated(270), d.rotated(270))
+            self.assertSameDrawing(a.mirrored(), d.mirrored())
+            # The original is untouched.
+            self.assertSameDrawing(a, d)
+            with self.assertRaises(ValueError):
+                a.rotated(45)
+
+    def testConcatenate(self):
+        ds = _drawings()
+        offsets = [(0, 0), (10, 0), (10, 20)]
+        a = arrays.DrawingArrays.concatenate(
+            [ds[0], arrays.DrawingArrays.from_drawing(ds[1]), ds[2]], offsets)
+        want = ipc.Drawing()
+        for d, (dx, dy) in zip(ds, offsets):
+            want.features += d.translated(dx, dy).features
+        self.assertSameDrawing(a, want)
+        self.assertEqual(len(a.pads), sum(
+            isinstance(f, ipc.Drawing.Pad) for d in ds for f in d.features))
+        with self.assertRaises(ValueError):
+            arrays.DrawingArrays.concatenate(ds, offsets[:1])
+
+
+class PurePythonTest(DrawingArraysTest):
+    """The same tests, without NumPy."""
+
+    def setUp(self):
+        super().setUp()
+        self._numpy, arrays.numpy = arrays.numpy, None
+
+    def tearDown(self):
+        arrays.numpy = self._numpy
@@ -0,0 +1,108 @@
+import random
+import unittest
+
+from kidraw import ipc
+from kidraw.ipc import batch
+
+
+def _catalog(n):
+    rnd = random.Random(7351)
+    A, L, T, W, pitch, H = [], [], [], [], [], []
+    for _ in range(n):
+        a = round(rnd.uniform(1, 20), 2)
+        lead = round(rnd.uniform(0.2, 2), 2)
+        A.append(ipc.Dimension.from_nominal(a, round(rnd.uniform(0, 0.2), 3)))
+        L.append(ipc.Dimension.from_nominal(round(a + rnd.uniform(-0.5, 2) * lead, 2), round(rnd.uniform(0, 0.3), 3)))
+        T.append(ipc.Dimension.from_nominal(lead, round(rnd.uniform(0, 0.3), 3)))
+        W.append(ipc.Dimension.from_nominal(round(rnd.uniform(0.1, 1), 2), round(rnd.uniform(0, 0.1), 3)))
+        pitch.append(rnd.choice([0.4, 0.5, 0.65, 0.8, 1.27]))
+        H.append(rnd.choice([0, 1, 2]))
+    return A, L, T, W, pitch, H
+
+
+def _scalar(spec, L, T, W, pitch):
+    Z, X = spec.OuterPadSpan(L, T), spec.PadWidth(W)
+    try:
+        G = spec.InnerPadSpan(L, T)
+    except ipc.InfeasibleFootprint:
+        return Z, None, X, False
+    return Z, G, X, pitch - X >= spec.pcb_tolerance
+
+
+class BatchTest(unittest.TestCase):
+    def testDimensionArray(self):
+        d = batch.DimensionArray.from_nominal([1, 2.5], 0.1, [0.2, 0])
+        self.assertEqual(list(d), [ipc.Dimension(0.8, 1.1), ipc.Dimension(2.5, 2.6)])
+        self.assertEqual(list(d.tolerance), [0.3, 0.1])
+        self.assertEqual(list(d.nominal), [0.95, 2.55])
+        self.assertEqual(len(batch.DimensionArray.from_dimensions(d)), 2)
+
+    def testGullwing(self):
+        A, L, T, W, pitch, profiles = _catalog(500)
+        dims = [batch.DimensionArray.from_dimensions(x) for x in (A, L, T, W)]
+        spec = batch.LandPatternSizeArray.gullwing_leads(profiles, *dims[:3], pitch)
+        Z, G, X, ok = batch.pad_dimensions(spec, dims[1], dims[2], dims[3], pitch)
+        infeasible = 0
+        for i in range(len(A)):
+            s = ipc.LandPatternSize.gullwing_leads(profiles[i], A[i], L[i], T[i], pitch[i])
+            self.assertEqual(spec[i], s)
+            z, g, x, feasible = _scalar(s, L[i], T[i], W[i], pitch[i])
+            self.assertEqual((Z[i], X[i], bool(ok[i])), (z, x, feasible))
+            if g is not None:
+                self.assertEqual(G[i], g)
+            else:
+                infeasible += 1
+        # The catalog does exercise both cases.
+        self.assertTrue(0 < infeasible < len(A))
+
+    def testZeroTolerance(self):
+        # Without T tolerance, S min and max only differ by float noise.
+        A, L, T, W = ([ipc.Dimension(0.9, 0.9), ipc.Dimension(3.8, 4.0)],
+                      [ipc.Dimension(1, 1.13), ipc.Dimension(5.8, 6.2)],
+                      [ipc.Dimension(0.33, 0.33), ipc.Dimension(0.22, 0.22)],
+                      [ipc.Dimension(0.2, 0.2), ipc.Dimension(0.4, 0.5)])
+        dims = [batch.DimensionArray.from_dimensions(x) for x in (A, L, T, W)]
+        spec = batch.LandPatternSizeArray.gullwing_leads(1, *dims[:3])
+        Z, G, X, ok = batch.pad_dimensions(spec, *dims[1:])
+        for i in range(len(A)):
+            s = ipc.LandPatternSize.gullwing_leads(1, A[i], L[i], T[i])
+            z, g, x, feasible = _scalar(s, L[i], T[i], W[i], 1e9)
+            self.assertEqual((Z[i], X[i], bool(ok[i])), (z, x, feasible))
+            if g is not None:
+                self.assertEqual(G[i], g)
+        self.assertEqual(list(ok), [False, True])
+
+    def testChip(self):
+        _, L, T, W, _, _ = _catalog(200)
+        # Chip bodies on both sides of the small chip threshold.
+        rnd = random.Random(1608)
+        A = [ipc.Dimension.from_nominal(round(rnd.uniform(0.4, 3.2), 2), 0.05) for _ in L]
+        small = sum(a.max < ipc._SMALL_CHIP for a in A)
+        self.assertTrue(0 < small < len(A))
+        dims = [batch.DimensionArray.from_dimensions(x) for x in (L, T, W)]
+        bodies = batch.DimensionArray.from_dimensions(A)
+        for profile in (ipc.LandPatternSize.Most, ipc.LandPatternSize.Least):
+            spec = batch.LandPatternSizeArray.chip(profile, bodies)
+            Z, G, X, ok = batch.pad_dimensions(spec, *dims)
+            for i in range(len(L)):
+                s = ipc.LandPatternSize.chip(profile, A[i])
+                self.assertEqual(spec[i], s)
+                z, g, x, feasible = _scalar(s, L[i], T[i], W[i], 1e9)
+                self.assertEqual((Z[i], X[i], bool(ok[i])), (z, x, feasible))
+                if g is not None:
+                    self.assertEqual(G[i], g)
+
+    def testFromSpecs(self):
+        specs = [ipc.LandPatternSize.QFN(p) for p in range(3)]
+        spec = batch.LandPatternSizeArray.from_specs(specs)
+        self.assertEqual([spec[i] for i in range(3)], specs)
+
+
+class PurePythonTest(BatchTest):
+    """The same tests, without NumPy."""
+
+    def setUp(self):
+        self._numpy, batch.numpy = batch.numpy, None
+
+    def tearDown(self):
+        batch.numpy = self._numpy
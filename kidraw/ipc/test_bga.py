@@ -0,0 +1,99 @@
+import unittest
+
+from kidraw import footprint as fp
+from kidraw.footprint import sexpr
+from kidraw import ipc
+from kidraw.ipc import arrays, bga
+
+
+def _pads(drawing):
+    return [f for f in drawing.features if isinstance(f, ipc.Drawing.Pad)]
+
+
+class BGATest(unittest.TestCase):
+    A = ipc.Dimension.from_nominal(10, 0.1)
+    ball = ipc.Dimension.from_nominal(0.5, 0.05)
+
+    def testNames(self):
+        names = [bga.row_name(r) for r in range(60)]
+        self.assertEqual(names[:8], ["A", "B", "C", "D", "E", "F", "G", "H"])
+        self.assertEqual(names[19:22], ["Y", "AA", "AB"])
+        self.assertEqual(names[39:41], ["AY", "BA"])
+        self.assertFalse(any(set(n) & set("IOQSXZ") for n in names))
+        self.assertEqual(len(set(names)), len(names))
+        self.assertEqual(bga.ball_name(0, 0), "A1")
+        self.assertEqual(bga.ball_name(8, 11), "J12")
+
+    def testLandDiameter(self):
+        D = ipc.Dimension.from_nominal
+        self.assertEqual(bga.land_diameter(D(0.6, 0.05)), 0.45)
+        self.assertEqual(bga.land_diameter(D(0.5, 0.05)), 0.4)
+        self.assertEqual(bga.land_diameter(D(0.2, 0.02)), 0.17)
+        self.assertEqual(bga.land_diameter(D(0.6, 0.05), collapsing=False), 0.63)
+
+    def testGrid(self):
+        d = bga.ball_grid_array(self.A, self.A, self.ball, 0.8, 10, 12,
+                                ipc.LandPatternSize.BGA(ipc.LandPatternSize.Nominal))
+        pads = _pads(d)
+        self.assertEqual(len(pads), 120)
+        by_name = {p.number: p for p in pads}
+        self.assertEqual(by_name["A1"].center, (-4.4, 3.6))
+        self.assertEqual(by_name["K12"].center, (4.4, -3.6))
+        self.assertEqual(by_name["A1"].size, (0.4, 0.4))
+        self.assertEqual(by_name["A1"].mask_margin, 0.05)
+        self.assertTrue(all(p.obround for p in pads))
+
+    def testMask(self):
+        mask = [[not (2 <= r < 4 and 2 <= c < 4) for c in range(6)] for r in range(6)]
+        d = bga.ball_grid_array(self.A, self.A, self.ball, 1, 6, 6,
+                                ipc.LandPatternSize.BGA(ipc.LandPatternSize.Most),
+                                mask=mask, nsmd=False)
+        names = {p.number for p in _pads(d)}
+        self.assertEqual(len(names), 32)
+        self.assertNotIn("C3", names)
+        self.assertNotIn("D4", names)
+        self.assertIn("C2", names)
+        p = _pads(d)[0]
+        self.assertAlmostEqual(p.size[0], 0.5)
+        self.assertEqual(p.mask_margin, -0.05)
+        with self.assertRaises(ValueError):
+            bga.ball_grid_array(self.A, self.A, self.ball, 1, 6, 5,
+                                ipc.LandPatternSize.BGA(0), mask=mask)
+
+    def testLarge(self):
+        A = ipc.Dimension.from_nominal(45, 0.2)
+        d = bga.ball_grid_array(A, A, self.ball, 1, 45, 45, ipc.LandPatternSize.BGA(0))
+        pads = _pads(d)
+        self.assertEqual(len(pads), 2025)
+        self.assertEqual(pads[-1].number, "BE45")
+
+    def testFootprint(self):
+        d = bga.ball_grid_array(self.A, self.A, self.ball, 1, 4, 4,
+                                ipc.LandPatternSize.BGA(0), nsmd=False)
+        f = fp.Footprint(name="BGA").from_ipc(d)
+        pads = [p for p in f.features if isinstance(p, fp.SurfaceMountPad)]
+        self.assertEqual(len(pads), 16)
+        self.assertEqual(pads[0].solder_mask_margin, -0.05)
+        self.assertEqual(pads[0].shape, fp.PadShape.Obround)
+        self.assertIn("(solder_mask_margin -0.05)", str(f))
+        # Footprints that convert IPC features lazily write the same pads.
+        lazy = fp.Footprint(name="BGA").from_ipc(d, lazy=True)
+        self.assertEqual(sexpr.dumps(lazy), sexpr.dumps(f))
+        self.assertEqual(lazy.features.extents, f.features.extents)
+
+    def testMaskMarginKept(self):
+        d = bga.ball_grid_array(self.A, self.A, self.ball, 1, 2, 2, ipc.LandPatternSize.BGA(0))
+        self.assertEqual(_pads(d.scaled(10))[0].mask_margin, 0.5)
+        self.assertEqual(_pads(d.rotated(90))[0].mask_margin, 0.05)
+        a = arrays.DrawingArrays.from_drawing(d)
+        self.assertEqual([p.mask_margin for p in _pads(a.to_drawing())], [0.05] * 4)
+
+
+class PurePythonTest(BGATest):
+    """The same tests, without NumPy."""
+
+    def setUp(self):
+        self._numpy, bga.numpy = bga.numpy, None
+
+    def tearDown(self):
+        bga.numpy = self._numpy
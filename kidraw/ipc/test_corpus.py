@@ -0,0 +1,91 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+
+from kidraw.ipc import corpus
+from kidraw.ipc import library as lib
+
+
+class CorpusTest(unittest.TestCase):
+    def setUp(self):
+        self._default, corpus._default = corpus._default, None
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, "corpus.bin")
+
+    def tearDown(self):
+        corpus._default = self._default
+        self._dir.cleanup()
+
+    def testRoundTrip(self):
+        corpus.build(self.path)
+        c = corpus.Corpus(self.path)
+        try:
+            self.assertEqual(len(c), 7 * 3 * 2 + 7 * 3)
+            for k, drawing in corpus._standard():
+                self.assertEqual(c.get(k).svg(), drawing.svg())
+            self.assertIsNone(c.get("chip/1/nonexistent"))
+        finally:
+            c.close()
+
+    def testLookup(self):
+        corpus.build(self.path)
+        want = lib.SOT23(lib.Least, 6).svg()
+        corpus._default = corpus.Corpus(self.path)
+        try:
+            self.assertIsNotNone(corpus.lookup("SOT23", lib.Least, 6))
+            self.assertEqual(lib.SOT23(lib.Least, 6).svg(), want)
+            # Imperial and metric names of a size share an entry.
+            self.assertEqual(corpus.lookup("chip", lib.Most, lib.imperial("0805"), True).svg(),
+                             corpus.lookup("chip", lib.Most, lib.metric("2012"), True).svg())
+            # Each lookup returns a new drawing.
+            a = lib.chip(lib.Most, lib.metric("1005"))
+            b = lib.chip(lib.Most, lib.metric("1005"))
+            self.assertIsNot(a, b)
+            a.scale(50)
+            self.assertNotEqual(a.svg(), b.svg())
+        finally:
+            corpus._default.close()
+
+    def testStale(self):
+        corpus.build(self.path)
+        with open(self.path, "r+b") as f:
+            f.seek(len(corpus._MAGIC))
+            f.write(b"\0" * 32)
+        with self.assertRaises(ValueError):
+            corpus.Corpus(self.path)
+
+    def testNotCorpus(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a corpus")
+        with self.assertRaises(ValueError):
+            corpus.Corpus(self.path)
+
+    def testWheel(self):
+        # Wheels are built by poetry, whose build script renders the
+        # corpus that they ship.
+        try:
+            import poetry.core  # noqa: F401
+        except ImportError:
+            self.skipTest("poetry-core is not installed")
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(corpus.__file__))))
+        if not os.path.exists(os.path.join(root, "pyproject.toml")):
+            self.skipTest("not running from a source tree")
+        src = os.path.join(self._dir.name, "src")
+        shutil.copytree(os.path.join(root, "kidraw"), os.path.join(src, "kidraw"),
+                        ignore=shutil.ignore_patterns("__pycache__", "corpus.bin"))
+        for name in ("pyproject.toml", "build.py", "README.md", "LICENSE"):
+            shutil.copy(os.path.join(root, name), src)
+        out = subprocess.run(
+            [sys.executable, "-c", "from poetry.core.masonry.api import build_wheel; print(build_wheel('dist'))"],
+            cwd=src, check=True, capture_output=True, text=True)
+        with zipfile.ZipFile(os.path.join(src, "dist", out.stdout.split()[-1])) as z:
+            z.extract("kidraw/ipc/corpus.bin", self._dir.name)
+        c = corpus.Corpus(os.path.join(self._dir.name, "kidraw", "ipc", "corpus.bin"))
+        try:
+            self.assertEqual(len(c), 7 * 3 * 2 + 7 * 3)
+        finally:
+            c.close()
@@ -0,0 +1,68 @@
+import unittest
+
+from kidraw import ipc
+from kidraw.ipc import family
+from kidraw.ipc import library as lib
+
+
+class FamilyTest(unittest.TestCase):
+    def testChips(self):
+        got = dict(family.generate(family.chips(sizes=["0805", "2512"])))
+        self.assertEqual(len(got), 2 * 3 * 2)
+        self.assertEqual(got["chip_i_0805_NP"].svg(),
+                         lib.chip(lib.Nominal, lib.imperial("0805"), True).svg())
+        self.assertEqual(got["chip_i_2512_M"].svg(),
+                         lib.chip(lib.Most, lib.imperial("2512")).svg())
+
+    def testQFP(self):
+        got = dict(family.generate(family.QFP([32, 128])))
+        # Most is infeasible at 0.4mm pitch.
+        self.assertEqual(sorted(got), ["QFP-128_L", "QFP-128_N", "QFP-32_L", "QFP-32_M", "QFP-32_N"])
+        for p, n in ((lib.Most, "M"), (lib.Least, "L")):
+            self.assertEqual(got["QFP-32_" + n].svg(), lib.QFP(
+                p, ipc.Dimension(6.8, 7.2), ipc.Dimension(8.8, 9.2),
+                ipc.Dimension(0.45, 0.75), ipc.Dimension(0.3, 0.45), 0.8, 32).svg())
+        with self.assertRaises(ipc.InfeasibleFootprint):
+            lib.QFP(lib.Most, ipc.Dimension(13.8, 14.2), ipc.Dimension(15.8, 16.2),
+                    ipc.Dimension(0.45, 0.75), ipc.Dimension(0.13, 0.23), 0.4, 128)
+
+    def testSOIC(self):
+        got = dict(family.generate(family.SOIC(["SOIC-8"])))
+        self.assertEqual(got["SOIC-8_N"].svg(), lib.SOIC(
+            lib.Nominal, ipc.Dimension(3.8, 4.0), ipc.Dimension(4.8, 5.0),
+            ipc.Dimension(5.8, 6.2), ipc.Dimension(0.4, 1.27),
+            ipc.Dimension(0.31, 0.51), 8).svg())
+
+    def testBuiltin(self):
+        got = dict(family.generate(family.SOT23([3]), family.SC70([8])))
+        self.assertEqual(sorted(got), ["SC70-8_L", "SC70-8_M", "SC70-8_N",
+                                       "SOT23-3_L", "SOT23-3_M", "SOT23-3_N"])
+        self.assertEqual(got["SOT23-3_L"].svg(), lib.SOT23(lib.Least, 3).svg())
+
+    def testProcesses(self):
+        serial = [(n, d.svg()) for n, d in family.generate()]
+        parallel = [(n, d.svg()) for n, d in family.generate(processes=4)]
+        self.assertEqual(serial, parallel)
+        names = [n for n, _ in serial]
+        self.assertEqual(len(names), len(set(names)))
+        self.assertIn("QFP-256_L", names)
+        self.assertIn("chip_m_6332_MP", names)
+
+    def testLazy(self):
+        built = []
+
+        def families():
+            for n in (3, 5, 6, 8):
+                built.append(n)
+                yield from family.SOT23([n])
+
+        stream = family.generate(families())
+        next(stream)
+        self.assertEqual(built, [3])
+
+        # Processes only build a window of members ahead.
+        del built[:]
+        stream = family.generate(families(), processes=1)
+        self.assertEqual(next(stream)[0], "SOT23-3_M")
+        self.assertEqual(built, [3, 5])
+        stream.close()
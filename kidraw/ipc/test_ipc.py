@@ -1,7 +1,7 @@
 import unittest
 from itertools import starmap
 
-from kidraw import ipc
+from kidraw import geometry, ipc, rules
 
 
 class TestTrivialDrawing(unittest.TestCase):
@@ -16,6 +16,46 @@ class TestTrivialDrawing(unittest.TestCase):
         ipc.Drawing.Pad(number=1, center=2, size=3)
 
 
+class TestBoundingBox(unittest.TestCase):
+    def testCached(self):
+        d = ipc.Drawing()
+        self.assertEqual(d.bounding_box, ((0, 0), (0, 0)))
+        d.features.append(ipc.Drawing.Pad(number=1, center=(2, 0), size=(1, 1)))
+        self.assertEqual(d.bounding_box, ((0, 2.5), (-0.5, 0.5)))
+        d.features += [ipc.Drawing.Circle(ipc.Drawing.Layer.Silkscreen, (-2, 0), 1)]
+        self.assertEqual(d.bounding_box, ((-3, 2.5), (-1, 1)))
+        self.assertEqual((d.length, d.width), (5.5, 2))
+
+        del d.features[1]
+        self.assertEqual(d.bounding_box, ((0, 2.5), (-0.5, 0.5)))
+        d.features[0] = ipc.Drawing.Line(ipc.Drawing.Layer.Silkscreen, [(0, 0), (0, 4)], 1)
+        self.assertEqual(d.bounding_box, ((-0.5, 0.5), (-0.5, 4.5)))
+
+        # Features are immutable, and are replaced instead.
+        line = d.features[0]
+        with self.assertRaises(AttributeError):
+            line.points = [(0, 0), (0, 2)]
+        with self.assertRaises(AttributeError):
+            line.points.append((0, 2))
+        self.assertEqual(d.width, 5)
+        d.features[0] = ipc.Drawing.Line(line.layer, [(0, 0), (0, 2)], line.width)
+        self.assertEqual(d.width, 3)
+
+        d.features = [ipc.Drawing.Pad(number=1, center=(0, 0), size=(2, 2))]
+        self.assertEqual(d.bounding_box, ((-1, 1), (-1, 1)))
+
+    def testEmptyLine(self):
+        d = ipc.Drawing()
+        d.features.append(ipc.Drawing.Line(ipc.Drawing.Layer.Silkscreen, [], 0.15))
+        self.assertEqual(d.bounding_box, ((0, 0), (0, 0)))
+        d.features.append(ipc.Drawing.Line(ipc.Drawing.Layer.Silkscreen, [(1, 1), (2, 1)], 0.2))
+        self.assertEqual(d.bounding_box, ((0, 2.1), (0, 1.1)))
+
+    def testSlots(self):
+        with self.assertRaises(AttributeError):
+            ipc.Drawing.Pad(number=1, center=(0, 0), size=(1, 1)).shape = "round"
+
+
 class TestDimension(unittest.TestCase):
     def testConstruct(self):
         d = ipc.Dimension(1, 2)
@@ -35,6 +75,22 @@ class TestDimension(unittest.TestCase):
         self.assertEqual(d2.nominal, 2.5)
         self.assertEqual(d1.nominal, d2.nominal)
 
+    def testExact(self):
+        d = ipc.Dimension(3.8, 4)
+        self.assertEqual(d.tolerance, 0.2)
+        self.assertEqual(d.nominal, 3.9)
+        self.assertEqual(d, ipc.Dimension.from_nominal(3.9, 0.1))
+        self.assertEqual(len({d, ipc.Dimension(3.8, 4.0), ipc.Dimension(3.8, 4.1)}), 2)
+
+    def testRounding(self):
+        spec = ipc.LandPatternSize(toe=0, heel=0, side=0, courtyard=0)
+        self.assertEqual(spec._round_down(0.15), 0.15)
+        self.assertEqual(spec._round_down(0.3 - 0.1 + 0.01), 0.2)
+        self.assertEqual(spec._round_up(5.1118), 5.15)
+        self.assertEqual(spec, ipc.LandPatternSize(toe=0, heel=0, side=0, courtyard=0))
+        self.assertNotEqual(spec, None)
+        self.assertNotIn(spec, [None])
+
 
 class TestLandPatternSize(unittest.TestCase):
     # These tests don't check for exact values, since that would just
@@ -213,8 +269,8 @@ class TestDrawing(unittest.TestCase):
 PAD 1 (-4.50 0.00) (1.15 5.15)
 PAD 2 (4.50 0.00) (1.15 5.15)
 
-LINE Silkscreen 0.15 (-3.72 -2.57) (3.72 -2.57)
-LINE Silkscreen 0.15 (-3.72 2.57) (3.72 2.57)
+LINE Silkscreen 0.15 (-3.72 -2.58) (3.72 -2.58)
+LINE Silkscreen 0.15 (-3.72 2.58) (3.72 2.58)
 
 LINE Assembly 0.07 (-5.00 2.50) (-5.00 -2.50) (5.00 -2.50) (5.00 2.50) (-5.00 2.50)
 
@@ -231,9 +287,9 @@ LINE Courtyard 0.15 (-5.08 -2.65) (5.08 -2.65) (5.08 2.65) (-5.08 2.65) (-5.08 -
 PAD 1 (-4.50 0.00) (1.15 5.15)
 PAD 2 (4.50 0.00) (1.15 5.15)
 
-LINE Silkscreen 0.15 (-3.72 -2.57) (3.72 -2.57)
-LINE Silkscreen 0.15 (-3.72 2.57) (-3.72 -2.57)
-LINE Silkscreen 0.15 (-3.72 2.57) (3.72 2.57)
+LINE Silkscreen 0.15 (-3.72 -2.58) (3.72 -2.58)
+LINE Silkscreen 0.15 (-3.72 2.58) (-3.72 -2.58)
+LINE Silkscreen 0.15 (-3.72 2.58) (3.72 2.58)
 CIRCLE Silkscreen (-5.28 0.00) 0.10
 
 LINE Assembly 0.07 (-5.00 2.50) (-5.00 -2.50) (5.00 -2.50) (5.00 2.50) (-5.00 2.50)
@@ -260,12 +316,12 @@ LINE Courtyard 0.15 (-5.38 -2.65) (5.08 -2.65) (5.08 2.65) (-5.38 2.65) (-5.38 -
 PAD 1 (-4.50 0.00) (1.15 5.15)
 PAD 2 (4.50 0.00) (1.15 5.15)
 
-LINE Silkscreen 0.15 (-5.00 -2.77) (-5.00 -3.50)
+LINE Silkscreen 0.15 (-5.00 -2.78) (-5.00 -3.50)
 LINE Silkscreen 0.15 (-5.00 -3.50) (5.00 -3.50)
-LINE Silkscreen 0.15 (-5.00 2.77) (-5.00 3.50)
+LINE Silkscreen 0.15 (-5.00 2.78) (-5.00 3.50)
 LINE Silkscreen 0.15 (-5.00 3.50) (5.00 3.50)
-LINE Silkscreen 0.15 (5.00 -2.77) (5.00 -3.50)
-LINE Silkscreen 0.15 (5.00 2.77) (5.00 3.50)
+LINE Silkscreen 0.15 (5.00 -2.78) (5.00 -3.50)
+LINE Silkscreen 0.15 (5.00 2.78) (5.00 3.50)
 
 LINE Assembly 0.07 (-5.00 3.50) (-5.00 -3.50) (5.00 -3.50) (5.00 3.50) (-5.00 3.50)
 
@@ -282,12 +338,12 @@ LINE Courtyard 0.15 (-5.08 -3.58) (5.08 -3.58) (5.08 3.58) (-5.08 3.58) (-5.08 -
 PAD 1 (-4.50 0.00) (1.15 5.15)
 PAD 2 (4.50 0.00) (1.15 5.15)
 
-LINE Silkscreen 0.15 (-5.00 -2.77) (-5.00 -3.50)
+LINE Silkscreen 0.15 (-5.00 -2.78) (-5.00 -3.50)
 LINE Silkscreen 0.15 (-5.00 -3.50) (5.00 -3.50)
-LINE Silkscreen 0.15 (-5.00 2.77) (-5.00 3.50)
+LINE Silkscreen 0.15 (-5.00 2.78) (-5.00 3.50)
 LINE Silkscreen 0.15 (-5.00 3.50) (5.00 3.50)
-LINE Silkscreen 0.15 (5.00 -2.77) (5.00 -3.50)
-LINE Silkscreen 0.15 (5.00 2.77) (5.00 3.50)
+LINE Silkscreen 0.15 (5.00 -2.78) (5.00 -3.50)
+LINE Silkscreen 0.15 (5.00 2.78) (5.00 3.50)
 CIRCLE Silkscreen (-5.30 3.50) 0.10
 
 LINE Assembly 0.07 (-5.00 3.50) (-5.00 -3.50) (5.00 -3.50) (5.00 3.50) (-5.00 3.50)
@@ -371,7 +427,7 @@ LINE Silkscreen 0.15 (-2.50 2.50) (-2.50 2.15)
 LINE Silkscreen 0.15 (-2.50 2.50) (2.50 2.50)
 LINE Silkscreen 0.15 (2.50 -2.50) (2.50 -2.15)
 LINE Silkscreen 0.15 (2.50 2.50) (2.50 2.15)
-CIRCLE Silkscreen (-2.87 1.50) 0.10
+CIRCLE Silkscreen (-2.88 1.50) 0.10
 
 LINE Assembly 0.07 (-2.00 -0.25) (-2.50 -0.25) (-2.50 -0.75) (-2.00 -0.75) (-2.00 -0.25)
 LINE Assembly 0.07 (-2.00 -1.25) (-2.50 -1.25) (-2.50 -1.75) (-2.00 -1.75) (-2.00 -1.25)
@@ -386,7 +442,7 @@ LINE Assembly 0.07 (2.50 2.50) (2.50 -2.50) (-2.50 -2.50) (-2.50 2.50) (2.50 2.5
 LINE Documentation 0.15 (0.00 0.62) (0.00 -0.62)
 LINE Documentation 0.15 (0.62 0.00) (-0.62 0.00)
 
-LINE Courtyard 0.15 (-2.97 -2.58) (2.58 -2.58) (2.58 2.58) (-2.97 2.58) (-2.97 -2.58)
+LINE Courtyard 0.15 (-2.98 -2.58) (2.58 -2.58) (2.58 2.58) (-2.98 2.58) (-2.98 -2.58)
 """
         self._check_drawing(
             ipc.in_line_pin_device(
@@ -465,7 +521,7 @@ LINE Silkscreen 0.15 (2.50 -2.50) (1.15 -2.50)
 LINE Silkscreen 0.15 (2.50 -2.50) (2.50 -1.15)
 LINE Silkscreen 0.15 (2.50 2.50) (1.15 2.50)
 LINE Silkscreen 0.15 (2.50 2.50) (2.50 1.15)
-CIRCLE Silkscreen (-2.87 0.50) 0.10
+CIRCLE Silkscreen (-2.88 0.50) 0.10
 
 LINE Assembly 0.07 (-0.25 2.00) (-0.25 2.50) (-0.75 2.50) (-0.75 2.00) (-0.25 2.00)
 LINE Assembly 0.07 (-0.75 -2.00) (-0.75 -2.50) (-0.25 -2.50) (-0.25 -2.00) (-0.75 -2.00)
@@ -480,8 +536,104 @@ LINE Assembly 0.07 (2.50 2.50) (2.50 -2.50) (-2.50 -2.50) (-2.50 2.50) (2.50 2.5
 LINE Documentation 0.15 (0.00 0.62) (0.00 -0.62)
 LINE Documentation 0.15 (0.62 0.00) (-0.62 0.00)
 
-LINE Courtyard 0.15 (-2.97 -2.58) (2.58 -2.58) (2.58 2.58) (-2.97 2.58) (-2.97 -2.58)
+LINE Courtyard 0.15 (-2.98 -2.58) (2.58 -2.58) (2.58 2.58) (-2.98 2.58) (-2.98 -2.58)
 """
         self._check_drawing(
             ipc.in_line_pin_device(
                 A, B, LA, LB, T, W, pitch, 2, 2, spec), expected)
+
+    def testQuarterTurnsExact(self):
+        D = ipc.Dimension.from_nominal
+        d = ipc.in_line_pin_device(
+            D(28, 0.1), D(28, 0.1), D(30, 0.2), D(30, 0.2), D(0.6, 0.15), D(0.18, 0.02),
+            0.4, 64, 64, ipc.LandPatternSize(toe=0.35, heel=0.35, side=-0.03, courtyard=0.25))
+        pads = [f for f in d.features if isinstance(f, ipc.Drawing.Pad)]
+        self.assertEqual(len(pads), 256)
+        # All four sides are exact rotations of the first one.
+        for side in range(4):
+            t = geometry.Affine.rotation(90 * side)
+            for a, b in zip(pads[:64], pads[64 * side:64 * side + 64]):
+                self.assertEqual(t.apply(a.center), b.center)
+                self.assertEqual(a.size, b.size[::-1] if side % 2 else b.size)
+
+    def testClipSilkscreen(self):
+        d = ipc.Drawing()
+        d.features += [
+            ipc.Drawing.Pad(number=1, center=(0, 0), size=(1, 1)),
+            ipc.Drawing.Pad(number=2, center=(3, 0), size=(1, 1), mask_margin=0.05),
+            ipc.Drawing.Line(layer=ipc.Drawing.Layer.Silkscreen,
+                             points=[(-2, 0), (5, 0), (5, 2), (-2, 2)], width=0.1),
+            # Too short once clipped.
+            ipc.Drawing.Line(layer=ipc.Drawing.Layer.Silkscreen,
+                             points=[(0, -0.82), (0, 0)], width=0.1),
+            ipc.Drawing.Line(layer=ipc.Drawing.Layer.Assembly,
+                             points=[(-2, 0), (5, 0)], width=0.1),
+            ipc.Drawing.Circle(layer=ipc.Drawing.Layer.Silkscreen, center=(0.5, 0.5), radius=0.1),
+        ]
+        self.assertIs(d.clip_silkscreen(0.2), d)
+        self._check_drawing(d, """
+PAD 1 (0.00 0.00) (1.00 1.00)
+PAD 2 (3.00 0.00) (1.00 1.00)
+LINE Silkscreen 0.10 (-2.00 0.00) (-0.75 0.00)
+LINE Silkscreen 0.10 (0.75 0.00) (2.20 0.00)
+LINE Silkscreen 0.10 (3.80 0.00) (5.00 0.00) (5.00 2.00) (-2.00 2.00)
+LINE Assembly 0.10 (-2.00 0.00) (5.00 0.00)
+CIRCLE Silkscreen (0.50 0.50) 0.10
+""")
+
+    def testClipSilkscreenOption(self):
+        D = ipc.Dimension.from_nominal
+        A, L, T, W = D(10, 0.1), D(12, 0.2), D(0.6, 0.15), D(0.22, 0.05)
+        spec = ipc.LandPatternSize.QFP(ipc.LandPatternSize.Nominal, A, L, T, 0.5)
+        default = ipc.in_line_pin_device(A, A, L, L, T, W, 0.5, 16, 16, spec)
+        spec.silkscreen_clearance = 0.2
+        d = ipc.in_line_pin_device(A, A, L, L, T, W, 0.5, 16, 16, spec)
+        self.assertEqual(len(d.features), len(default.features) - 3)
+        self.assertEqual(rules.check(d, silk_clearance=0.2 - geometry.Epsilon), [])
+        # The outline is kept up to the pads, past the hand-placed
+        # corner notches.
+        silk = [f for f in d.features
+                if isinstance(f, ipc.Drawing.Line) and f.layer == ipc.Drawing.Layer.Silkscreen]
+        self.assertEqual(len(silk), 5)
+        self.assertEqual(silk[0].points[0], (-5, 5))
+
+        A, B, T = D(2, 0.1), D(1.25, 0.1), D(0.5, 0.25)
+        spec = ipc.LandPatternSize.chip(ipc.LandPatternSize.Nominal, A)
+        spec.silkscreen_clearance = 0.2
+        d = ipc.two_terminal_symmetric_device(A, B, A, T, B, spec, True)
+        self.assertEqual(rules.check(d, silk_clearance=0.2 - geometry.Epsilon), [])
+        self.assertEqual(len([f for f in d.features if isinstance(f, ipc.Drawing.Circle)]), 1)
+
+    def testOptimize(self):
+        D = ipc.Dimension
+        d = ipc.in_line_pin_device(D(3.8, 4), D(4.8, 5), D(5.8, 6.2), D(4.8, 5), D(0.4, 1.27),
+                                   D(0.31, 0.51), 1.27, 4, 0,
+                                   ipc.LandPatternSize.SOIC(ipc.LandPatternSize.Nominal,
+                                                            D(3.8, 4), D(5.8, 6.2), D(0.4, 1.27), 1.27))
+        pads = [f for f in d.features if not isinstance(f, ipc.Drawing.Line)]
+        n, box = len(d.features), d.bounding_box
+        # The notches of the silkscreen outline are zero-length lines.
+        self.assertEqual(d.optimize(), 4)
+        self.assertEqual(len(d.features), n - 4)
+        self.assertEqual(d.optimize(), 0)
+        self.assertEqual(d.optimize(union=True), 16)
+        self.assertEqual([f for f in d.features if not isinstance(f, ipc.Drawing.Line)], pads)
+        self.assertEqual(d.bounding_box, box)
+        assembly = [f for f in d.features
+                    if isinstance(f, ipc.Drawing.Line) and f.layer == ipc.Drawing.Layer.Assembly]
+        # Body and leads are a single outline, without the lines
+        # between them.
+        self.assertEqual(len(assembly), 1)
+        self.assertEqual(len(assembly[0].points), 37)
+        self.assertNotIn((-2.165, 2.11), assembly[0].points)
+
+    def testOptimizeShrinks(self):
+        D = ipc.Dimension.from_nominal
+        d = ipc.in_line_pin_device(
+            D(10, 0.1), D(10, 0.1), D(12, 0.2), D(12, 0.2), D(0.6, 0.15), D(0.22, 0.05),
+            0.5, 16, 16, ipc.LandPatternSize(toe=0.35, heel=0.35, side=-0.03, courtyard=0.25))
+        segments = sum(len(f.points) - 1 for f in d.features if isinstance(f, ipc.Drawing.Line))
+        d.optimize(union=True)
+        self.assertLess(sum(len(f.points) - 1 for f in d.features if isinstance(f, ipc.Drawing.Line)),
+                        segments * 2 / 3)
+        self.assertEqual(rules.check(d), [])
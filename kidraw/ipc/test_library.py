@@ -148,3 +148,31 @@ Diff SVG written to {1} for inspection.
                          0.5,
                          32)
             self._check_svg(name, fp)
+
+    def testProfiles(self):
+        A = ipc.Dimension(6.8, 7.2)
+        L = ipc.Dimension(8.8, 9.2)
+        T = ipc.Dimension(0.45, 0.75)
+        W = ipc.Dimension(0.3, 0.45)
+        fps = lib.QFP_profiles(A, L, T, W, 0.8, 32)
+        for p in self.PROFILES:
+            self.assertEqual(fps[p].svg(), lib.QFP(p, A, L, T, W, 0.8, 32).svg())
+
+        A = ipc.Dimension(3.8, 4)
+        B = ipc.Dimension(4.8, 5)
+        L = ipc.Dimension(5.8, 6.2)
+        T = ipc.Dimension(0.4, 1.27)
+        W = ipc.Dimension(0.3, 0.5)
+        fps = lib.SOIC_profiles(A, B, L, T, W, 8)
+        for p in self.PROFILES:
+            self.assertEqual(fps[p].svg(), lib.SOIC(p, A, B, L, T, W, 8).svg())
+
+        A = ipc.Dimension(4.9, 5.1)
+        T = ipc.Dimension(0.3, 0.5)
+        W = ipc.Dimension(0.18, 0.28)
+        fps = lib.QFN_profiles(A, T, W, 0.5, 32)
+        for p in self.PROFILES:
+            # Scaling one footprint must not affect the others, which
+            # share some of its features.
+            self.assertEqual(fps[p].svg(), lib.QFN(p, A, T, W, 0.5, 32).svg())
+            fps[p].scale(50)
@@ -0,0 +1,78 @@
+import unittest
+
+from kidraw import ipc
+from kidraw.ipc import library as ipc_lib
+from kidraw.ipc import montecarlo as mc
+
+D = ipc.Dimension
+
+
+class MonteCarloTest(unittest.TestCase):
+    samples = 200000
+
+    def testPadGeometry(self):
+        spec = ipc.LandPatternSize(toe=0.35, heel=0.35, side=0.03, courtyard=0.25)
+        d = ipc.in_line_pin_device(D(6.8, 7.2), D(6.8, 7.2), D(8.8, 9.2), D(8.8, 9.2),
+                                   D(0.45, 0.75), D(0.3, 0.45), 0.8, 8, 8, spec)
+        Z, G, X, pitch = mc.pad_geometry(d)
+        self.assertAlmostEqual(Z, spec.OuterPadSpan(D(8.8, 9.2), D(0.45, 0.75)))
+        self.assertAlmostEqual(G, spec.InnerPadSpan(D(8.8, 9.2), D(0.45, 0.75)))
+        self.assertAlmostEqual(X, spec.PadWidth(D(0.3, 0.45)))
+        self.assertAlmostEqual(pitch, 0.8)
+
+        d = ipc_lib.chip(ipc_lib.Nominal, ipc_lib.imperial("0805"))
+        self.assertIsNone(mc.pad_geometry(d)[3])
+        with self.assertRaises(ValueError):
+            mc.pad_geometry(ipc.Drawing())
+
+    def testExact(self):
+        # Without any tolerance, every sample is the nominal case.
+        r = mc.simulate_pads(3, 1, 1, None, D(2, 2), D(0.4, 0.4), D(0.8, 0.8), 0, 0, samples=1000)
+        self.assertEqual(r.samples, 1000)
+        self.assertEqual((r.toe.min, r.toe.max), (0.5, 0.5))
+        self.assertAlmostEqual(r.heel.mean, 0.1)
+        self.assertAlmostEqual(r.side.mean, 0.1)
+        self.assertAlmostEqual(r.side.std, 0)
+        self.assertEqual((r.p_short, r.p_open), (0, 0))
+
+    def testStatistics(self):
+        r = mc.simulate_pads(3, 1, 1, None, D(1.9, 2.1), D(0.4, 0.4), D(0.8, 0.8), 0, 0,
+                             samples=self.samples, seed=1)
+        # Toe fillet is uniform over [0.45, 0.55].
+        self.assertAlmostEqual(r.toe.mean, 0.5, places=2)
+        self.assertAlmostEqual(r.toe.std, 0.1 / 12 ** 0.5, places=2)
+        self.assertAlmostEqual(r.toe.quantile(0.5), 0.5, delta=0.002)
+        self.assertAlmostEqual(r.toe.quantile(0.1), 0.46, delta=0.002)
+        self.assertGreaterEqual(r.toe.min, 0.45)
+        self.assertLessEqual(r.toe.max, 0.55)
+
+    def testShortOpen(self):
+        # Leads wider than the gap to the next pad always short.
+        r = mc.simulate_pads(3, 1, 0.5, 0.6, D(2, 2), D(0.4, 0.4), D(0.8, 0.8), 0.1, 0.05,
+                             samples=self.samples, seed=1)
+        self.assertEqual(r.p_short, 1)
+        # Pads clear of the leads never connect.
+        r = mc.simulate_pads(6, 4, 1, None, D(2, 2), D(0.4, 0.4), D(0.8, 0.8), 0, 0,
+                             samples=100)
+        self.assertEqual(r.p_open, 1)
+        # Placement off by up to one lead width, misses half the time.
+        r = mc.simulate_pads(3, 1, 0.2, None, D(2, 2), D(0.4, 0.4), D(0.2, 0.2), 0, 0.8,
+                             samples=self.samples, seed=1)
+        self.assertAlmostEqual(r.p_open, 0.5, delta=0.01)
+
+    def testBatches(self):
+        args = (3, 1, 1, 1.5, D(1.9, 2.1), D(0.3, 0.5), D(0.7, 0.9), 0.1, 0.05)
+        r = mc.simulate_pads(*args, samples=1000, batch_size=64, seed=1)
+        self.assertEqual((r.samples, r.toe.count), (1000, 1000))
+
+
+class PurePythonTest(MonteCarloTest):
+    """The same tests, without NumPy."""
+
+    samples = 20000
+
+    def setUp(self):
+        self._numpy, mc.numpy = mc.numpy, None
+
+    def tearDown(self):
+        mc.numpy = self._numpy
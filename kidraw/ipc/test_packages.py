@@ -0,0 +1,53 @@
+import unittest
+
+from kidraw import ipc
+from kidraw.ipc import packages
+
+
+class PackagesTest(unittest.TestCase):
+    def setUp(self):
+        self.db = packages.database()
+
+    def testLoad(self):
+        self.assertIs(packages.database(), self.db)
+        p = self.db["SOT23-3"]
+        self.assertEqual((p.family, p.style, p.pins, p.pitch), ("SOT23", "gullwing", 3, 0.95))
+        self.assertEqual(p.A, ipc.Dimension(1.2, 1.4))
+        self.assertIs(self.db.alias("TO-236"), p)
+        c = self.db.alias("0805")
+        self.assertEqual(c.name, "2012")
+        self.assertIsNone(c.pitch)
+        self.assertIsNone(c.L)
+        self.assertNotIn("0805", self.db)
+
+    def testSelect(self):
+        got = self.db.select(style="gullwing", pitch=0.5, A=ipc.Dimension.from_nominal(7, 0.2))
+        self.assertEqual([p.name for p in got], ["QFP-48"])
+        got = self.db.select(family="SOIC", B=(9, 12))
+        self.assertEqual([p.name for p in got], ["SOIC-16", "SOIC-16W", "SOIC-18W"])
+        got = self.db.select(pins=(100, 300), pitch=0.4)
+        self.assertEqual([p.name for p in got], ["QFP-128", "QFP-256"])
+        self.assertEqual(len(self.db.select(family="chip")), 7)
+        self.assertEqual(self.db.select(family="chip", pitch=0.5), [])
+
+    def testSelectMatchesScan(self):
+        for lo, hi in ((0, 1), (1.2, 1.6), (6.9, 7.0), (4.4, 14), (100, 200)):
+            for field in ("A", "B", "L", "W", "pitch"):
+                want = [p for p in self.db
+                        if getattr(p, field) is not None
+                        and lo <= getattr(getattr(p, field), "nominal", getattr(p, field)) <= hi]
+                self.assertEqual(self.db.select(**{field: (lo, hi)}), want, (field, lo, hi))
+
+    def testNearest(self):
+        got = self.db.nearest("A", 7.1, n=3, family="QFP")
+        # QFP-32 and QFP-48 have the same body, and are equally close.
+        self.assertEqual({p.name for p in got[:2]}, {"QFP-32", "QFP-48"})
+        self.assertEqual(got[2].name, "QFP-44")
+        got = self.db.nearest("pitch", 0.6, style="gullwing")
+        self.assertEqual(got[0].pitch, 0.65)
+        self.assertEqual(len(self.db.nearest("B", 100, n=1000)), len(self.db))
+
+    def testDuplicate(self):
+        p = self.db["SOIC-8"]
+        with self.assertRaises(ValueError):
+            packages.Database([p, p])
@@ -0,0 +1,57 @@
+import unittest
+
+from kidraw import ipc
+from kidraw.ipc import solver
+
+D = ipc.Dimension.from_nominal
+
+
+def _qfp(A, L, T, pitch):
+    return lambda p: ipc.LandPatternSize.QFP(p, A, L, T, pitch)
+
+
+class SolverTest(unittest.TestCase):
+    def testProfile(self):
+        A, L, T, W = D(7, 0.1), D(9, 0.2), D(0.6, 0.15), D(0.22, 0.05)
+        s = solver.solve(_qfp(A, L, T, 0.5), L, T, W, 0.5)
+        self.assertEqual((s.profile, s.adjusted), (ipc.LandPatternSize.Nominal, False))
+        self.assertEqual(s.spec, ipc.LandPatternSize.QFP(ipc.LandPatternSize.Nominal, A, L, T, 0.5))
+        self.assertEqual((s.G, s.X, s.clearance), (6.8, 0.3, 0.2))
+
+        s = solver.solve(_qfp(A, L, T, 0.5), L, T, W, 0.5, profile=ipc.LandPatternSize.Most)
+        self.assertEqual(s.profile, ipc.LandPatternSize.Most)
+
+    def testFallback(self):
+        # Too wide for Most and Nominal at this pitch.
+        A, L, T, W = D(7, 0.1), D(9, 0.2), D(0.6, 0.15), D(0.3, 0.03)
+        with self.assertRaises(ipc.InfeasibleFootprint):
+            ipc.in_line_pin_device(A, A, L, L, T, W, 0.45, 4, 4, ipc.LandPatternSize.QFP(ipc.LandPatternSize.Nominal, A, L, T, 0.45))
+        s = solver.solve(_qfp(A, L, T, 0.45), L, T, W, 0.45, profile=ipc.LandPatternSize.Most)
+        self.assertEqual((s.profile, s.adjusted), (ipc.LandPatternSize.Least, False))
+        ipc.in_line_pin_device(A, A, L, L, T, W, 0.45, 4, 4, s.spec)
+
+    def testAdjust(self):
+        # Even Least shorts the pads together, and is too wide.
+        A, L, T, W, pitch = D(1, 0.1), D(2.4, 0.1), D(1.1, 0.1), D(0.4, 0.05), 0.65
+        least = ipc.LandPatternSize.QFP(ipc.LandPatternSize.Least, A, L, T, pitch)
+        with self.assertRaises(ipc.InfeasibleFootprint):
+            least.InnerPadSpan(L, T)
+        s = solver.solve(_qfp(A, L, T, pitch), L, T, W, pitch)
+        self.assertEqual((s.profile, s.adjusted), (ipc.LandPatternSize.Least, True))
+        self.assertEqual(s.spec.toe, least.toe)
+        self.assertLess(s.spec.heel, least.heel)
+        self.assertLess(s.spec.side, least.side)
+        self.assertGreater(s.G, 0)
+        ipc.in_line_pin_device(A, A, L, L, T, W, pitch, 2, 2, s.spec)
+
+        # The adjustment is the smallest that works.
+        def bumped(heel, side):
+            return ipc.LandPatternSize(s.spec.toe, heel, side, s.spec.courtyard)
+        with self.assertRaises(ipc.InfeasibleFootprint):
+            bumped(s.spec.heel + 1e-6, s.spec.side).InnerPadSpan(L, T)
+        self.assertLess(pitch - bumped(s.spec.heel, s.spec.side + 1e-6).PadWidth(W), 0.1)
+
+    def testInfeasible(self):
+        A, L, T, W = D(7, 0.1), D(9, 0.2), D(0.6, 0.15), D(0.22, 0.05)
+        with self.assertRaises(ipc.InfeasibleFootprint):
+            solver.solve(_qfp(A, L, T, 0.3), L, T, W, 0.3)
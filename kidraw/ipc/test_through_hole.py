@@ -0,0 +1,82 @@
+import unittest
+
+from kidraw import footprint as fp
+from kidraw.footprint import sexpr
+from kidraw import ipc
+from kidraw.ipc import arrays, through_hole as th
+
+
+def _pads(drawing):
+    return [f for f in drawing.features if isinstance(f, ipc.Drawing.Pad)]
+
+
+class ThroughHoleTest(unittest.TestCase):
+    lead = th.square_lead(ipc.Dimension(0.59, 0.69))
+
+    def testSizes(self):
+        self.assertAlmostEqual(self.lead.max, 0.9758, places=4)
+        self.assertEqual([th.ThroughHoleSize.level(p).HoleDiameter(self.lead) for p in range(3)],
+                         [1.25, 1.2, 1.15])
+        spec = th.ThroughHoleSize.level(ipc.LandPatternSize.Nominal)
+        self.assertEqual(spec.PadDiameter(self.lead), 1.8)
+        self.assertEqual(spec.PadDiameter(self.lead, 2.54), 1.8)
+        self.assertEqual(spec.PadDiameter(self.lead, 2.0), 1.8)
+        self.assertEqual(spec.PadDiameter(self.lead, 1.5), 1.3)
+        with self.assertRaises(ipc.InfeasibleFootprint):
+            spec.PadDiameter(self.lead, 1.27)
+
+    def testDIP(self):
+        d = th.dual_in_line(ipc.Dimension(6.1, 7.11), ipc.Dimension(18.67, 19.69),
+                            ipc.Dimension(0.42, 0.66), 2.54, 16, 7.62,
+                            th.ThroughHoleSize.level(ipc.LandPatternSize.Nominal))
+        pads = _pads(d)
+        self.assertEqual([p.number for p in pads], list(range(1, 17)))
+        self.assertEqual(pads[0].center, (-3.81, 8.89))
+        self.assertEqual(pads[7].center, (-3.81, -8.89))
+        self.assertEqual(pads[8].center, (3.81, -8.89))
+        self.assertEqual(pads[15].center, (3.81, 8.89))
+        self.assertEqual(pads[0].drill, 0.9)
+        self.assertEqual([p.obround for p in pads[:2]], [False, True])
+        with self.assertRaises(ValueError):
+            th.dual_in_line(ipc.Dimension(6.1, 7.11), ipc.Dimension(18.67, 19.69),
+                            ipc.Dimension(0.42, 0.66), 2.54, 15, 7.62,
+                            th.ThroughHoleSize.level(0))
+
+    def testHeader(self):
+        spec = th.ThroughHoleSize.level(ipc.LandPatternSize.Least)
+        d = th.pin_array(self.lead, 2.54, 6, spec, rows=2)
+        self.assertEqual([p.center for p in _pads(d)],
+                         [(-1.27, 2.54), (1.27, 2.54), (-1.27, 0), (1.27, 0),
+                          (-1.27, -2.54), (1.27, -2.54)])
+        with self.assertRaises(ValueError):
+            th.pin_array(self.lead, 2.54, 7, spec, rows=2)
+
+    def testLargeConnector(self):
+        d = th.pin_array(ipc.Dimension(0.5, 0.6), 2, 400, th.ThroughHoleSize.level(0), rows=4,
+                         A=ipc.Dimension.from_nominal(10, 0.1),
+                         B=ipc.Dimension.from_nominal(202, 0.2))
+        pads = _pads(d)
+        self.assertEqual(len(pads), 400)
+        self.assertEqual(pads[-1].center, (3, -99))
+        self.assertEqual(len({p.center for p in pads}), 400)
+
+    def testFootprint(self):
+        d = th.pin_array(self.lead, 2.54, 3, th.ThroughHoleSize.level(ipc.LandPatternSize.Nominal))
+        f = fp.Footprint(name="Header").from_ipc(d)
+        pads = [p for p in f.features if isinstance(p, fp.ThroughHolePad)]
+        self.assertEqual(len(pads), 3)
+        self.assertEqual([p.shape for p in pads], [fp.PadShape.Rectangle, fp.PadShape.Circle, fp.PadShape.Circle])
+        self.assertEqual(pads[0].drill_size, 1.2)
+        self.assertEqual(pads[1].center, (0, 0))
+        self.assertIn("(drill 1.2)", str(f))
+        self.assertNotIn("-0.000", str(f))
+        lazy = fp.Footprint(name="Header").from_ipc(d, lazy=True)
+        self.assertEqual(sexpr.dumps(lazy), sexpr.dumps(f))
+        self.assertEqual(lazy.features.extents, f.features.extents)
+
+    def testDrillKept(self):
+        d = th.pin_array(self.lead, 2.54, 2, th.ThroughHoleSize.level(0))
+        self.assertEqual(_pads(d.scaled(2))[0].drill, 2.5)
+        self.assertEqual(_pads(d.rotated(90))[0].drill, 1.25)
+        a = arrays.DrawingArrays.from_drawing(d)
+        self.assertEqual([p.drill for p in _pads(a.to_drawing())], [1.25, 1.25])
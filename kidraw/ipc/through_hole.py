@@ -0,0 +1,184 @@
+"""Land patterns for through-hole parts.
+
+Holes and annular rings are sized per IPC-2222, with the Most,
+Nominal and Least profiles mapping to producibility levels A, B and
+C:
+
+>>> spec = ThroughHoleSize.level(Nominal)
+>>> dual_in_line(A, B, rectangular_lead(W, T), 2.54, 16, 7.62, spec)
+>>> pin_array(square_lead(ipc.Dimension(0.59, 0.69)), 2.54, 40, spec, rows=2)
+
+Leads are described by their diameter. Rectangular and square leads
+are sized by their diagonal, see rectangular_lead and square_lead.
+
+Pads are Drawing.Pads with a drill, which Footprint.from_ipc turns
+into ThroughHolePads. Pin 1 has a square pad.
+"""
+import math
+
+from kidraw import geometry
+from kidraw.ipc import (AssemblyPenWidth, Dimension, Drawing, InfeasibleFootprint,
+                        PenWidth, _courtyard)
+
+
+def rectangular_lead(W, T):
+    """Returns the diameter Dimension of a lead W wide and T thick."""
+    return Dimension(math.hypot(W.min, T.min), math.hypot(W.max, T.max))
+
+
+def square_lead(W):
+    """Returns the diameter Dimension of a square lead of side W."""
+    return rectangular_lead(W, W)
+
+
+class ThroughHoleSize:
+    """IPC-2222 hole and pad sizing.
+
+    The hole is hole_clearance larger than the largest lead. The pad
+    adds twice the minimum annular_ring to the hole, plus the
+    fabrication_allowance of the producibility level. Next to
+    neighbouring pads, pads are shrunk to leave spacing of copper
+    between them, down to the minimum annular ring.
+    """
+
+    def __init__(self, hole_clearance, fabrication_allowance, courtyard,
+                 annular_ring=0.05, spacing=0.2, rounding_increment=0.05):
+        self.hole_clearance = hole_clearance
+        self.fabrication_allowance = fabrication_allowance
+        self.courtyard = courtyard
+        self.annular_ring = annular_ring
+        self.spacing = spacing
+        self.rounding_increment = rounding_increment
+
+    @classmethod
+    def level(cls, profile):
+        """Producibility level A, B or C, for profile Most, Nominal or Least."""
+        return cls([0.25, 0.2, 0.15][profile],
+                   [0.6, 0.5, 0.4][profile],
+                   [0.5, 0.25, 0.1][profile])
+
+    def _round_up(self, x):
+        x, inc = geometry.to_nm(x), geometry.to_nm(self.rounding_increment)
+        return geometry.from_nm(-(-x // inc) * inc)
+
+    def _round_down(self, x):
+        x, inc = geometry.to_nm(x), geometry.to_nm(self.rounding_increment)
+        return geometry.from_nm(x // inc * inc)
+
+    def HoleDiameter(self, lead):
+        return self._round_up(lead.max + self.hole_clearance)
+
+    def PadDiameter(self, lead, pitch=None):
+        """Returns the pad diameter for lead, at the given pin pitch."""
+        hole = self.HoleDiameter(lead)
+        ret = self._round_up(hole + 2 * self.annular_ring + self.fabrication_allowance)
+        if pitch is not None:
+            most = self._round_down(pitch - self.spacing)
+            if most < hole + 2 * self.annular_ring:
+                raise InfeasibleFootprint(f"Pads for {hole}mm holes do not fit at pitch {pitch}")
+            ret = min(ret, most)
+        return ret
+
+
+def _pads(numbers, xs, ys, size, hole):
+    return [Drawing.Pad(number=n, center=(x, y), size=(size, size),
+                        obround=(n != 1), drill=hole)
+            for n, x, y in zip(numbers, xs, ys)]
+
+
+def _outline(layer, x, y, width):
+    return Drawing.Line(layer=layer,
+                        points=[(-x, y), (x, y), (x, -y), (-x, -y), (-x, y)],
+                        width=width)
+
+
+def dual_in_line(A, B, lead, pitch, num_pins, row_spacing, spec):
+    """Returns drawing for a dual in-line package.
+
+    A is the body width across the rows, B its length, row_spacing
+    the distance between the two rows of pins. Pins are numbered
+    counterclockwise from the top left.
+    """
+    if num_pins % 2 != 0:
+        raise ValueError("num_pins must be even for DIP devices")
+    n = num_pins // 2
+    hole = spec.HoleDiameter(lead)
+    size = spec.PadDiameter(lead, pitch)
+    if row_spacing - size < spec.spacing:
+        raise InfeasibleFootprint(f"Pads of {size}mm overlap across rows {row_spacing} apart")
+
+    # The left row, top to bottom. The right row is the left one
+    # turned around the origin.
+    xs = [-row_spacing / 2] * n
+    ys = [((n - 1) / 2 - i) * pitch for i in range(n)]
+    rxs, rys = geometry.Affine.rotation(180).apply_columns(xs, ys)
+
+    ret = Drawing()
+    ret.features += _pads(range(1, num_pins + 1), xs + list(rxs), ys + list(rys), size, hole)
+
+    x, y = A.nominal / 2, B.nominal / 2
+    notch = min(1, x / 2)
+    ret.features += [
+        Drawing.Line(layer=Drawing.Layer.Documentation,
+                     points=[(A.nominal / 8, 0), (-A.nominal / 8, 0)],
+                     width=PenWidth),
+        Drawing.Line(layer=Drawing.Layer.Documentation,
+                     points=[(0, A.nominal / 8), (0, -A.nominal / 8)],
+                     width=PenWidth),
+        _outline(Drawing.Layer.Assembly, x, y, AssemblyPenWidth),
+    ]
+
+    # Silkscreen follows the body, but stays clear of the pads, with
+    # the pin 1 notch at the top.
+    x = min(x, row_spacing / 2 - size / 2 - PenWidth / 2 - 0.1)
+    ret.features += [
+        Drawing.Line(layer=Drawing.Layer.Silkscreen,
+                     points=[(-notch / 2, y), (-x, y), (-x, -y), (x, -y), (x, y), (notch / 2, y)],
+                     width=PenWidth),
+        Drawing.Line(layer=Drawing.Layer.Silkscreen,
+                     points=[(-notch / 2, y), (0, y - notch / 2), (notch / 2, y)],
+                     width=PenWidth),
+    ]
+
+    _courtyard(ret, spec)
+    return ret
+
+
+def pin_array(lead, pitch, positions, spec, rows=1, row_pitch=None, A=None, B=None):
+    """Returns drawing for a pin header or connector.
+
+    positions pins are laid out in rows columns (vertical rows of
+    pins) row_pitch apart, by default pitch. Pin 1 is at the top
+    left, and pins are numbered across the rows first, so that the
+    pins of a dual row header alternate left and right.
+
+    A and B are the body width and length. By default, the body is
+    that of a pin header, half a pitch around the pins.
+    """
+    if positions % rows != 0:
+        raise ValueError(f"{positions} positions do not fill {rows} rows")
+    if row_pitch is None:
+        row_pitch = pitch
+    n = positions // rows
+    hole = spec.HoleDiameter(lead)
+    size = spec.PadDiameter(lead, min(pitch, row_pitch) if rows > 1 else pitch)
+
+    idx = range(positions)
+    xs = [(i % rows - (rows - 1) / 2) * row_pitch for i in idx]
+    ys = [((n - 1) / 2 - i // rows) * pitch for i in idx]
+
+    ret = Drawing()
+    ret.features += _pads(range(1, positions + 1), xs, ys, size, hole)
+
+    x = A.nominal / 2 if A is not None else rows * row_pitch / 2
+    y = B.nominal / 2 if B is not None else n * pitch / 2
+    ret.features += [
+        _outline(Drawing.Layer.Assembly, x, y, AssemblyPenWidth),
+        _outline(Drawing.Layer.Silkscreen, x + PenWidth / 2, y + PenWidth / 2, PenWidth),
+        Drawing.Circle(layer=Drawing.Layer.Silkscreen,
+                       center=(-x - PenWidth / 2 - 0.3, ys[0]),
+                       radius=0.1),
+    ]
+
+    _courtyard(ret, spec)
+    return ret
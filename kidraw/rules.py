@@ -0,0 +1,294 @@
+"""Geometric design rule checks for land patterns and footprints.
+
+An Index holds the copper, silkscreen and courtyard geometry of an
+ipc.Drawing or a footprint.Footprint, in a geometry.GridIndex, so
+that checks and queries only compare features that are close to
+each other:
+
+>>> index = Index.of(drawing)
+>>> index.features_near((0, 0), 1)
+>>> for v in index.check(clearance=0.1):
+...     print(v)
+
+The rules are:
+
+  clearance: copper of two pads with different names is closer than
+    clearance.
+  silk_over_pad: silkscreen is closer than silk_clearance to the
+    solder mask opening of a pad.
+  courtyard: a feature is not inside the courtyard. Drawings
+    without a courtyard are not checked.
+
+Pads are rectangles, or circles and stadiums if they are round or
+obround. Silkscreen and courtyard circles and arcs are checked as
+polylines, text by its bounding box.
+"""
+import math
+
+from kidraw import footprint as fp
+from kidraw import geometry, ipc
+
+Top = fp.Layer.TopCopper
+Bottom = fp.Layer.BottomCopper
+
+# Segments per full turn of circles and arcs.
+_ARC_SEGMENTS = 32
+
+
+class _Disc:
+    """A box with rounded corners: all points within radius of core."""
+
+    __slots__ = ("kind", "feature", "side", "core", "radius", "name", "margin", "sides")
+
+    def __init__(self, kind, feature, side, core, radius, name=None, margin=0, sides=()):
+        self.kind = kind
+        self.feature = feature
+        self.side = side
+        self.core = core
+        self.radius = radius
+        # Pads only: their name, solder mask margin and copper sides.
+        self.name = name
+        self.margin = margin
+        self.sides = sides
+
+    @property
+    def box(self):
+        return geometry.inflate_box(self.core, self.radius + max(self.margin, 0))
+
+    def distance(self, box):
+        return geometry.box_distance(self.core, box) - self.radius
+
+
+class _Segment:
+    """A stroke of the given radius along the segment from a to b."""
+
+    __slots__ = ("kind", "feature", "side", "a", "b", "radius")
+
+    def __init__(self, kind, feature, side, a, b, radius):
+        self.kind = kind
+        self.feature = feature
+        self.side = side
+        self.a = a
+        self.b = b
+        self.radius = radius
+
+    @property
+    def box(self):
+        (ax, ay), (bx, by) = self.a, self.b
+        return geometry.inflate_box(((min(ax, bx), max(ax, bx)), (min(ay, by), max(ay, by))), self.radius)
+
+    def distance(self, box):
+        return geometry.segment_box_distance(self.a, self.b, box) - self.radius
+
+
+def _pad_core(center, size, round_ends, angle=0):
+    """Returns the core and radius of a pad."""
+    (x, y), (w, h) = center, size
+    if angle % 90:
+        # Off-axis pads are checked as their circumscribed circle.
+        return ((x, x), (y, y)), math.hypot(w, h) / 2
+    if angle % 180:
+        w, h = h, w
+    if not round_ends:
+        return ((x - w / 2, x + w / 2), (y - h / 2, y + h / 2)), 0
+    r = min(w, h) / 2
+    return ((x - w / 2 + r, x + w / 2 - r), (y - h / 2 + r, y + h / 2 - r)), r
+
+
+def _segments(kind, feature, side, points, radius):
+    if len(points) == 1:
+        points = points * 2
+    return [_Segment(kind, feature, side, a, b, radius) for a, b in zip(points, points[1:])]
+
+
+def _arc_points(center, radius, start_angle, sweep):
+    # Footprint arcs measure angles from +Y, towards +X.
+    n = max(1, math.ceil(abs(sweep) / 360 * _ARC_SEGMENTS))
+    return [(center[0] + math.sin(a) * radius, center[1] + math.cos(a) * radius)
+            for a in (math.radians(start_angle + sweep * i / n) for i in range(n + 1))]
+
+
+_IPC_KINDS = {
+    ipc.Drawing.Layer.Silkscreen: "silk",
+    ipc.Drawing.Layer.Courtyard: "courtyard",
+}
+
+
+def _ipc_shapes(f):
+    if isinstance(f, ipc.Drawing.Pad):
+        core, r = _pad_core(f.center, f.size, f.obround)
+        sides = (Top, Bottom) if f.drill is not None else (Top,)
+        return [_Disc("pad", f, Top, core, r, f.number, f.mask_margin or 0, sides)]
+    kind = _IPC_KINDS.get(f.layer, "other")
+    if isinstance(f, ipc.Drawing.Line):
+        return _segments(kind, f, Top, f.points, f.width / 2)
+    if isinstance(f, ipc.Drawing.Circle):
+        (x, y) = f.center
+        return [_Disc(kind, f, Top, ((x, x), (y, y)), f.radius)]
+    raise RuntimeError("Unknown drawing feature type")
+
+
+def _fp_kind(layer):
+    if layer in (fp.Layer.TopSilkscreen, fp.Layer.BottomSilkscreen):
+        return "silk"
+    if layer in (fp.Layer.TopCourtyard, fp.Layer.BottomCourtyard):
+        return "courtyard"
+    return "other"
+
+
+def _fp_shapes(f):
+    if isinstance(f, (fp.SurfaceMountPad, fp.ThroughHolePad, fp.TestPad)):
+        core, r = _pad_core(f.center, f.size, f.shape != fp.PadShape.Rectangle, f.angle)
+        sides = (Top, Bottom) if isinstance(f, fp.ThroughHolePad) else (f.layer,)
+        return [_Disc("pad", f, f.layer, core, r, f.name, f.solder_mask_margin, sides)]
+    side = Top if f.layer.name.startswith("Top") else Bottom
+    kind = _fp_kind(f.layer)
+    w = f.line_width / 2
+    if isinstance(f, fp.Line):
+        return _segments(kind, f, side, [f.start, f.end], w)
+    if isinstance(f, fp.Poly):
+        return _segments(kind, f, side, list(f.points) + list(f.points[:1]), w)
+    if isinstance(f, fp.Circle):
+        return _segments(kind, f, side, _arc_points(f.center, f.radius, 0, 360), w)
+    if isinstance(f, fp.Arc):
+        return _segments(kind, f, side, _arc_points(
+            f.center, f.radius, f.start_angle, f.end_angle - f.start_angle), w)
+    (xmin, xmax), (ymin, ymax) = f.bounding_box
+    return [_Disc("text" if isinstance(f, fp.Text) else kind, f, side,
+                  ((xmin, xmax), (ymin, ymax)), 0)]
+
+
+class Violation:
+    """A broken rule.
+
+    features are the offending features, and distance the gap between
+    them, negative if they overlap. Courtyard violations have a
+    distance of None.
+    """
+
+    __slots__ = ("rule", "features", "distance")
+
+    def __init__(self, rule, features, distance=None):
+        self.rule = rule
+        self.features = features
+        self.distance = distance
+
+    def __repr__(self):
+        names = [getattr(f, "number", getattr(f, "name", type(f).__name__)) for f in self.features]
+        if self.distance is None:
+            return f"Violation({self.rule}, {names})"
+        return f"Violation({self.rule}, {names}, {self.distance:.3f})"
+
+
+class Index:
+    """Spatial index of the features of a drawing or footprint."""
+
+    def __init__(self, features, shapes):
+        self.features = features
+        self._shapes = [s for f in features for s in shapes(f)]
+        self._index = geometry.GridIndex.of((s.box, s) for s in self._shapes)
+
+    @classmethod
+    def of(cls, x):
+        """Returns the Index of an ipc.Drawing or a footprint.Footprint."""
+        if isinstance(x, ipc.Drawing):
+            return cls(list(x.features), _ipc_shapes)
+        if isinstance(x, fp.Footprint):
+            return cls(list(x.features), _fp_shapes)
+        raise TypeError(f"Cannot index {type(x).__name__}")
+
+    def features_near(self, point, r):
+        """Returns the features within r of point, in drawing order."""
+        x, y = point
+        p = ((x, x), (y, y))
+        hits = {id(s.feature) for s in self._index.near(point, r) if s.distance(p) <= r}
+        return [f for f in self.features if id(f) in hits]
+
+    def check(self, clearance=0.1, silk_clearance=0.05, courtyard=True):
+        """Returns the list of Violations of the drawing."""
+        return (self._clearance(clearance) + self._silk_over_pad(silk_clearance)
+                + (self._courtyard() if courtyard else []))
+
+    def _pads(self):
+        return [s for s in self._shapes if s.kind == "pad"]
+
+    def _clearance(self, clearance):
+        ret = []
+        order = {id(s): i for i, s in enumerate(self._shapes)}
+        for a in self._pads():
+            for b in self._index.query(geometry.inflate_box(a.box, clearance)):
+                if (b.kind != "pad" or order[id(b)] <= order[id(a)] or b.name == a.name
+                        or not set(a.sides) & set(b.sides)):
+                    continue
+                d = b.distance(a.core) - a.radius
+                if d < clearance:
+                    ret.append(Violation("clearance", (a.feature, b.feature), d))
+        return ret
+
+    def _silk_over_pad(self, silk_clearance):
+        # Silkscreen features are made of several segments, report
+        # the closest one to each pad.
+        ret = {}
+        for s in self._shapes:
+            if s.kind != "silk":
+                continue
+            for p in self._index.query(geometry.inflate_box(s.box, silk_clearance)):
+                if p.kind != "pad" or s.side not in p.sides:
+                    continue
+                d = s.distance(p.core) - p.radius - p.margin
+                k = (id(s.feature), id(p.feature))
+                if d < silk_clearance and (k not in ret or d < ret[k].distance):
+                    ret[k] = Violation("silk_over_pad", (s.feature, p.feature), d)
+        return list(ret.values())
+
+    def _courtyard(self):
+        ret = []
+        edges = {}
+        for s in self._shapes:
+            if s.kind == "courtyard" and isinstance(s, _Segment):
+                edges.setdefault(s.side, []).append((s.a, s.b))
+        done = set()
+        for s in self._shapes:
+            if s.kind in ("courtyard", "text") or id(s.feature) in done:
+                continue
+            sides = s.sides if s.kind == "pad" else (s.side,)
+            if not any(side in edges for side in sides):
+                continue
+            if not all(_inside(s.box, edges[side]) for side in sides if side in edges):
+                done.add(id(s.feature))
+                ret.append(Violation("courtyard", (s.feature,)))
+        return ret
+
+
+def _inside_point(p, edges):
+    """Even-odd test of p against the closed outlines made of edges."""
+    x, y = p
+    ret = False
+    for (ax, ay), (bx, by) in edges:
+        if (ay > y) != (by > y) and x < ax + (y - ay) * (bx - ax) / (by - ay):
+            ret = not ret
+    return ret
+
+
+def _inside(box, edges):
+    """Returns True if box is inside the outlines made of edges.
+
+    Boxes touching the outline are inside.
+    """
+    (xmin, xmax), (ymin, ymax) = box
+    # No edge may cross the interior of the box...
+    e = geometry.Epsilon
+    interior = ((xmin + e, xmax - e), (ymin + e, ymax - e))
+    if interior[0][0] < interior[0][1] and interior[1][0] < interior[1][1]:
+        if any(geometry.clip_segment(a, b, interior) is not None for a, b in edges):
+            return False
+    # ... so the box is on one side of the outline, that of its center.
+    return _inside_point(((xmin + xmax) / 2, (ymin + ymax) / 2), edges)
+
+
+def check(x, **kwargs):
+    """Returns the Violations of an ipc.Drawing or footprint.Footprint.
+
+    See Index.check for the arguments.
+    """
+    return Index.of(x).check(**kwargs)
@@ -1,6 +1,6 @@
 
 import math
-from copy import deepcopy
+from copy import copy, deepcopy
 from itertools import starmap
 
 
@@ -206,9 +206,10 @@ class Pin(_Struct):
     }
 
     def __str__(self):
-        if isinstance(self.numbers, int):
-            self.numbers = [self.numbers]
-        n, os = self.numbers[0], self.numbers[1:]
+        numbers = self.numbers
+        if isinstance(numbers, int):
+            numbers = [numbers]
+        n, os = numbers[0], numbers[1:]
         ret = [
             f"X {self.name} {n} {self.pos[0]:.0f} {self.pos[1]:.0f} {self.len} {self.dir} {self.font_size} {self.font_size} 0 1 {self.type} {self.shape}",
         ]
@@ -270,40 +271,28 @@ class ICBuilder:
         x, y = x1 - self._pin_len, y1 - self._edge_margin
         for s in self._slots_by_side[Pin.Left]:
             if s is not None:
-                s.len = self._pin_len
-                s.pos = x, y
-                s.dir = Pin.Right
-                self._schematic.features.append(s)
+                self._schematic.features.append(self._place(s, (x, y), Pin.Right))
             y -= self._slot_spacing
 
         # right pins
         x, y = x1 + w + self._pin_len, y1 - self._edge_margin
         for s in self._slots_by_side[Pin.Right]:
             if s is not None:
-                s.len = self._pin_len
-                s.pos = x, y
-                s.dir = Pin.Left
-                self._schematic.features.append(s)
+                self._schematic.features.append(self._place(s, (x, y), Pin.Left))
             y -= self._slot_spacing
 
         # top pins
         x, y = x1 + self._edge_margin, y1 + self._pin_len
         for s in self._slots_by_side[Pin.Up]:
             if s is not None:
-                s.len = self._pin_len
-                s.pos = x, y
-                s.dir = Pin.Down
-                self._schematic.features.append(s)
+                self._schematic.features.append(self._place(s, (x, y), Pin.Down))
             x += self._slot_spacing
 
         # bottom pins
         x, y = x1 + self._edge_margin, y1 - h - self._pin_len
         for s in self._slots_by_side[Pin.Down]:
             if s is not None:
-                s.len = self._pin_len
-                s.pos = x, y
-                s.dir = Pin.Up
-                self._schematic.features.append(s)
+                self._schematic.features.append(self._place(s, (x, y), Pin.Up))
             x += self._slot_spacing
 
         # Chip outline
@@ -323,6 +312,15 @@ class ICBuilder:
             self._schematic.features.append(
                 Pin(numbers=n, pos=(x1 + n, y1 - 1), type=Pin.NotConnected, shape=Pin.Hidden))
 
+    def _place(self, pin, pos, dir):
+        # The pins returned by pin() are left alone, so that they can
+        # be reused (e.g. in another builder) without surprises.
+        ret = copy(pin)
+        ret.len = self._pin_len
+        ret.pos = pos
+        ret.dir = dir
+        return ret
+
     def _correct_aspect_ratio(self, slots_lr, slots_ud):
         if slots_ud > 0 and slots_lr > slots_ud:
             while slots_lr / slots_ud > self._target_aspect_ratio:
@@ -0,0 +1,140 @@
+import unittest
+
+from kidraw import geometry
+
+
+class MergeCollinearTest(unittest.TestCase):
+    def testOpen(self):
+        self.assertEqual(geometry.merge_collinear([(0, 0), (1, 0)]), [(0, 0), (1, 0)])
+        self.assertEqual(
+            geometry.merge_collinear([(0, 0), (1, 0), (1, 0), (2, 0), (2, 1), (2, 3)]),
+            [(0, 0), (2, 0), (2, 3)])
+        # Doubling back is not a merge.
+        self.assertEqual(
+            geometry.merge_collinear([(0, 0), (2, 0), (1, 0)]),
+            [(0, 0), (2, 0), (1, 0)])
+
+    def testClosed(self):
+        square = [(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]
+        self.assertEqual(geometry.merge_collinear(square), square)
+        # Starts in the middle of an edge.
+        self.assertEqual(
+            geometry.merge_collinear([(0.5, 0), (1, 0), (1, 1), (0, 1), (0, 0), (0.5, 0)]),
+            [(1, 0), (1, 1), (0, 1), (0, 0), (1, 0)])
+
+    def testDegenerate(self):
+        self.assertEqual(geometry.merge_collinear([(1, 1), (1, 1)]), [(1, 1), (1, 1)])
+
+
+class AffineTest(unittest.TestCase):
+    def testCompose(self):
+        A = geometry.Affine
+        t = A.translation(1, 2) @ A.rotation(90)
+        self.assertEqual(t.apply((1, 0)), (1, 3))
+        self.assertEqual(t.angle, 90)
+        self.assertFalse(t.mirrored)
+        self.assertEqual(A.rotation(90) @ A.rotation(-90), A())
+        # Quarter turns are exact.
+        self.assertEqual(A.rotation(270).apply_all([(2, 1)]), [(1, -2)])
+
+    def testMirror(self):
+        A = geometry.Affine
+        t = A.rotation(30) @ A.mirror_x()
+        self.assertTrue(t.mirrored)
+        self.assertEqual(t.angle, 30)
+        self.assertEqual((A.mirror_x() @ A.rotation(30)).angle, 330)
+        self.assertEqual(A.mirror_y().angle, 180)
+
+    def testColumns(self):
+        xs, ys = [0, 1, 2.5], [1, -1, 3]
+        for t in (geometry.Affine.rotation(90), geometry.Affine.mirror_x(),
+                  geometry.Affine.translation(1, 1) @ geometry.Affine.rotation(33)):
+            x2, y2 = t.apply_columns(xs, ys)
+            self.assertEqual(list(zip(x2, y2)), t.apply_all(zip(xs, ys)))
+
+
+class NanometreTest(unittest.TestCase):
+    def testConvert(self):
+        self.assertEqual(geometry.to_nm(2.0749999999999997), 2075000)
+        self.assertEqual(geometry.from_nm(2075000), 2.075)
+
+    def testRound(self):
+        self.assertEqual(geometry.round_nm(2587500, 1000), 2588000)
+        self.assertEqual(geometry.round_nm(-2587500, 1000), -2588000)
+        self.assertEqual(geometry.round_nm(-2587499, 1000), -2587000)
+
+    def testFormat(self):
+        for nm, s in ((0, "0"), (1000000, "1"), (-1500000, "-1.5"), (-1, "-0.000001"),
+                      (12345678, "12.345678")):
+            self.assertEqual(geometry.format_nm(nm), s)
+
+
+class ClipTest(unittest.TestCase):
+    box = ((0, 2), (0, 1))
+
+    def testClip(self):
+        self.assertEqual(geometry.clip_segment((-1, 0.5), (3, 0.5), self.box), (0.25, 0.75))
+        self.assertEqual(geometry.clip_segment((0.5, 0.5), (1, 0.5), self.box), (0, 1))
+        self.assertIsNone(geometry.clip_segment((-1, 2), (3, 2), self.box))
+        self.assertIsNone(geometry.clip_segment((-1, 0), (0, 2), self.box))
+        # Touching counts.
+        self.assertEqual(geometry.clip_segment((2, 0), (3, 0), self.box), (0, 0))
+
+    def testDistance(self):
+        self.assertEqual(geometry.inflate_box(self.box, 0.5), ((-0.5, 2.5), (-0.5, 1.5)))
+        self.assertEqual(geometry.box_distance(self.box, ((3, 4), (2, 3))), 2 ** 0.5)
+        self.assertEqual(geometry.box_distance(self.box, ((1, 4), (0.5, 3))), 0)
+        self.assertEqual(geometry.segment_box_distance((-1, 0.5), (3, 0.5), self.box), 0)
+        self.assertEqual(geometry.segment_box_distance((3, 0), (3, 1), self.box), 1)
+        self.assertAlmostEqual(geometry.segment_box_distance((2, 2), (3, 1), self.box), 0.5 ** 0.5)
+
+
+class GridIndexTest(unittest.TestCase):
+    def testQuery(self):
+        index = geometry.GridIndex(1)
+        for i in range(10):
+            index.insert(((i, i + 0.5), (0, 0.5)), i)
+        index.insert(((-20, 20), (-1, -0.5)), "wide")
+        self.assertEqual(len(index), 11)
+        self.assertEqual(index.query(((2.2, 4.2), (0, 1))), [2, 3, 4])
+        self.assertEqual(index.query(((0, 0), (-0.7, -0.7))), ["wide"])
+        self.assertEqual(index.near((5.75, 0.25), 0.25), [5, 6])
+        self.assertEqual(index.near((5.75, 0.25), 0.2), [])
+        self.assertEqual(index.query(((-100, 100), (-100, 100))), list(range(10)) + ["wide"])
+
+    def testOf(self):
+        index = geometry.GridIndex.of((((i, i + 2), (0, 2)), i) for i in range(5))
+        self.assertEqual(index.cell, 2)
+        self.assertEqual(index.near((-1, 1), 1), [0])
+        with self.assertRaises(ValueError):
+            geometry.GridIndex(0)
+
+
+class SimplifyTest(unittest.TestCase):
+    square = [(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]
+
+    def testMerge(self):
+        self.assertEqual(
+            geometry.simplify_polylines([[(0, 0), (1, 0)], [(1, 0), (2, 0), (2, 1)],
+                                         [(1.5, 0), (0.5, 0)], [(3, 3), (3, 3)]]),
+            [[(0, 0), (2, 0), (2, 1)]])
+        # Crossing lines are kept apart, loops stay closed.
+        self.assertEqual(geometry.simplify_polylines([[(-1, 0), (1, 0)], [(0, -1), (0, 1)]]),
+                         [[(-1, 0), (1, 0)], [(0, -1), (0, 1)]])
+        self.assertEqual(geometry.simplify_polylines([self.square, self.square[::-1]]),
+                         [[(0, 0), (0, 1), (1, 1), (1, 0), (0, 0)]])
+        self.assertEqual(geometry.simplify_polylines([]), [])
+
+    def testUnion(self):
+        right = [(x + 1, y) for x, y in self.square]
+        self.assertEqual(sum(len(p) - 1 for p in geometry.simplify_polylines([self.square, right])), 5)
+        self.assertEqual(geometry.simplify_polylines([self.square, right], union=True),
+                         [[(0, 0), (0, 1), (2, 1), (2, 0), (0, 0)]])
+        # An open outline drawn against a closed one encloses a region.
+        lead = [(1, 0.25), (2, 0.25), (2, 0.75), (1, 0.75)]
+        self.assertEqual(geometry.simplify_polylines([self.square, lead], union=True),
+                         [[(0, 0), (0, 1), (1, 1), (1, 0.75), (2, 0.75), (2, 0.25),
+                           (1, 0.25), (1, 0), (0, 0)]])
+        # Lines that enclose nothing are left alone.
+        self.assertEqual(geometry.simplify_polylines([[(0, 0), (1, 0), (1, 1)]], union=True),
+                         [[(0, 0), (1, 0), (1, 1)]])
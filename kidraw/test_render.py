@@ -0,0 +1,109 @@
+import os
+import os.path
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import kidraw
+from kidraw import ipc
+from kidraw import schematic as sch
+from kidraw.footprint import library as lib
+from kidraw.footprint import sexpr
+from kidraw.ipc import library as ipc_lib
+
+
+def _schematic():
+    s = sch.Schematic(name="TEST", description="Test chip")
+    with sch.ICBuilder(s, 10) as b:
+        b.side(sch.Pin.Left)
+        b.pin([1, 2], name="VCC", type=sch.Pin.Power)
+        b.pin(3, name="EN")
+        b.side(sch.Pin.Right)
+        b.pin(4, name="OUT", type=sch.Pin.Output)
+        b.gap(1)
+        b.pin(5, name="GND", type=sch.Pin.Power)
+    return s
+
+
+def _footprints():
+    D = ipc.Dimension
+    return [
+        lib.chip(lib.imperial("0805"), polarized=True),
+        lib.SOT23(5),
+        lib.QFP(D(6.8, 7.2), D(8.8, 9.2), D(0.45, 0.75), D(0.3, 0.45), 0.8, 32),
+    ]
+
+
+def _renders(s, footprints, drawing):
+    return (
+        s.sch(),
+        s.doc(),
+        [sexpr.dumps(f) for f in footprints],
+        [sexpr.dumps(f, compact=True) for f in footprints],
+        drawing.svg(),
+    )
+
+
+class ConcurrentRenderTest(unittest.TestCase):
+    def testStress(self):
+        s = _schematic()
+        footprints = _footprints()
+        drawing = ipc_lib.SOT23(ipc.LandPatternSize.Nominal, 5)
+        want = _renders(s, footprints, drawing)
+
+        with ThreadPoolExecutor(8) as pool:
+            got = list(pool.map(lambda _: _renders(s, footprints, drawing), range(64)))
+        for g in got:
+            self.assertEqual(g, want)
+        # Rendering left the inputs untouched.
+        self.assertEqual(_renders(s, footprints, drawing), want)
+
+    def testLibrary(self):
+        def save(d, threads):
+            l = kidraw.Library(os.path.join(d, "test"))
+            l.devices.append(kidraw.Device(_schematic(), _footprints()))
+            l.devices.append(kidraw.Device(_schematic()))
+            l.save(threads=threads)
+            ret = {}
+            for root, _, files in os.walk(d):
+                for f in files:
+                    path = os.path.join(root, f)
+                    with open(path) as fd:
+                        ret[os.path.relpath(path, d)] = fd.read()
+            return ret
+
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            want = save(a, None)
+            self.assertEqual(len(want), 5)
+            self.assertEqual(save(b, 4), want)
+
+
+class SideEffectTest(unittest.TestCase):
+    def testPin(self):
+        p = sch.Pin(numbers=1)
+        str(p)
+        self.assertEqual(p.numbers, 1)
+
+    def testBuilder(self):
+        s = sch.Schematic(name="TEST")
+        with sch.ICBuilder(s, 1) as b:
+            b.side(sch.Pin.Left)
+            p = b.pin(1, name="A")
+        self.assertEqual(p.pos, (0, 0))
+        self.assertEqual(p.len, 0)
+        self.assertEqual(p.dir, sch.Pin.Left)
+        self.assertEqual(s.features[0].dir, sch.Pin.Right)
+
+    def testDevice(self):
+        a, b = kidraw.Device(), kidraw.Device()
+        a.footprints.append(None)
+        self.assertEqual(b.footprints, [])
+
+    def testScaled(self):
+        d = ipc_lib.SOT23(ipc.LandPatternSize.Nominal, 5)
+        before = d.svg()
+        s = d.scaled(10)
+        self.assertEqual(d.svg(), before)
+        self.assertNotEqual(s.svg(), before)
+        d.scale(10)
+        self.assertEqual(d.svg(), s.svg())
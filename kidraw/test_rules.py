@@ -0,0 +1,102 @@
+import unittest
+
+from kidraw import footprint as fp
+from kidraw import ipc, rules
+from kidraw.footprint import library as fplib
+from kidraw.ipc import family
+from kidraw.ipc import library as lib
+
+D = ipc.Dimension
+
+
+def _pad(number, x, y, size=(1, 1), **kwargs):
+    return ipc.Drawing.Pad(number=number, center=(x, y), size=size, **kwargs)
+
+
+def _silk(*points):
+    return ipc.Drawing.Line(layer=ipc.Drawing.Layer.Silkscreen, points=list(points), width=0.1)
+
+
+def _courtyard(x, y):
+    return ipc.Drawing.Line(layer=ipc.Drawing.Layer.Courtyard,
+                            points=[(-x, -y), (x, -y), (x, y), (-x, y), (-x, -y)],
+                            width=0.05)
+
+
+class RulesTest(unittest.TestCase):
+    def testLibraryIsClean(self):
+        for name, d in family.generate(family.chips(), family.SOIC(names=("SOIC-8",)),
+                                       family.QFP(pin_counts=(64,)), family.SOT23()):
+            self.assertEqual(rules.check(d), [], name)
+        d = lib.BGA(lib.Nominal, D.from_nominal(10, 0.1), D.from_nominal(10, 0.1),
+                    D.from_nominal(0.5, 0.05), 0.8, 10, 10)
+        self.assertEqual(rules.check(d), [])
+        self.assertEqual(rules.check(fplib.pin_header(10, rows=2)), [])
+
+    def testClearance(self):
+        d = ipc.Drawing()
+        d.features += [
+            _pad(1, 0, 0), _pad(2, 1.05, 0), _pad(3, 2.5, 0, obround=True),
+            _pad(4, 3.2, 0.6, obround=True),
+            # Same name, same net.
+            _pad(1, 0, 1.02),
+        ]
+        v = rules.check(d, clearance=0.1)
+        self.assertEqual([(x.rule, [f.number for f in x.features]) for x in v],
+                         [("clearance", [1, 2]), ("clearance", [2, 1]), ("clearance", [3, 4])])
+        self.assertAlmostEqual(v[0].distance, 0.05)
+        self.assertAlmostEqual(v[2].distance, (0.7 ** 2 + 0.6 ** 2) ** 0.5 - 1)
+        self.assertEqual([x.features[0].number for x in rules.check(d, clearance=0.01)], [3])
+
+    def testSilkOverPad(self):
+        d = ipc.Drawing()
+        d.features += [
+            _pad(1, 0, 0, mask_margin=0.05),
+            _pad(2, 3, 0, obround=True),
+            _silk((-1, 0.6), (1, 0.6)),
+            _silk((3.52, -1), (3.52, 1)),
+            _silk((5, 0), (6, 0)),
+        ]
+        v = rules.check(d, silk_clearance=0.05)
+        self.assertEqual([[getattr(f, "number", None) for f in x.features] for x in v],
+                         [[None, 1], [None, 2]])
+        self.assertAlmostEqual(v[0].distance, -0.0)
+        self.assertAlmostEqual(v[1].distance, -0.03)
+
+    def testCourtyard(self):
+        d = ipc.Drawing()
+        d.features += [_pad(1, 0, 0), _pad(2, 2.6, 0), _silk((-1, 1), (1, 1)), _courtyard(2, 2)]
+        v = rules.check(d)
+        self.assertEqual([(x.rule, x.features) for x in v], [("courtyard", (d.features[1],))])
+        self.assertEqual(rules.check(d, courtyard=False), [])
+
+    def testFootprint(self):
+        f = fplib.DIP(D(6.1, 7.11), D(9.02, 10.16), D(0.42, 0.66), 8)
+        self.assertEqual(rules.check(f), [])
+        f.features.append(fp.Line(start=(-3.81, -5), end=(-3.81, 5), layer=fp.Layer.TopSilkscreen))
+        f.features.append(fp.Text(text="X", position=(20, 0)))
+        v = rules.check(f)
+        self.assertEqual([x.rule for x in v], ["silk_over_pad"] * 4)
+        # Bottom side silkscreen is over the other side of through-hole pads.
+        f = fplib.pin_header(2)
+        f.features.append(fp.Circle(center=(0, -1.27), radius=0.5, layer=fp.Layer.BottomSilkscreen))
+        self.assertEqual([x.rule for x in rules.check(f)], ["silk_over_pad"])
+
+    def testFeaturesNear(self):
+        d = ipc.Drawing()
+        d.features += [_pad(1, 0, 0), _pad(2, 3, 0), _silk((-1, 2), (4, 2))]
+        index = rules.Index.of(d)
+        self.assertEqual(index.features_near((0, 0), 0), [d.features[0]])
+        self.assertEqual(index.features_near((1.5, 0), 1), [d.features[0], d.features[1]])
+        self.assertEqual(index.features_near((1.5, 1.5), 0.5), [d.features[2]])
+        self.assertEqual(index.features_near((1.5, 0), 0.9), [])
+        with self.assertRaises(TypeError):
+            rules.Index.of([])
+
+    def testLarge(self):
+        d = lib.BGA(lib.Most, D.from_nominal(101, 0.1), D.from_nominal(101, 0.1),
+                    D.from_nominal(0.5, 0.05), 1, 100, 100)
+        index = rules.Index.of(d)
+        self.assertEqual(index.check(), [])
+        # Every ball is too close to its 2 to 4 neighbours.
+        self.assertEqual(len(index.check(clearance=0.61)), 2 * 100 * 99)